@@ -0,0 +1,154 @@
+"""
+Бенчмарк рассылки обновлений тикеров через channel layer.
+
+Сравнивает прежнюю рассылку (group_send на каждый символ и json.dumps
+в каждом consumer), рассылку готовых кадров с group_send по одному
+(serial) и publish_prices, которая отправляет сообщения групп
+одновременно. Для каждого количества клиентов выводится время CPU
+на один сброс у слушателя и суммарно у всех consumer, длительность
+сброса при задержке --rtt на каждый group_send и число вызовов слоя.
+
+Запуск из корня проекта:
+    python benchmarks/broadcast.py --symbols 300 --clients 1 10 100
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'binance_ws.test_settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from channels.layers import InMemoryChannelLayer  # noqa: E402
+
+from tickers.broadcast import publish_prices, ticker_frame  # noqa: E402
+from tickers.groups import WILDCARD_GROUP, symbol_group  # noqa: E402
+
+
+async def publish_legacy(channel_layer, prices):
+    """Прежняя рассылка: одно сообщение с данными на каждый символ"""
+    for symbol, (price, event_time) in prices.items():
+        await channel_layer.group_send(
+            WILDCARD_GROUP,
+            {
+                'type': 'send_ticker',
+                'data': {
+                    'symbol': symbol,
+                    'price': price,
+                    'event_time': event_time.isoformat(),
+                },
+            },
+        )
+
+
+async def publish_serial(channel_layer, prices):
+    """Готовые кадры, но group_send групп символов по одному"""
+    frames = {
+        symbol: ticker_frame(symbol, price, event_time)
+        for symbol, (price, event_time) in prices.items()
+    }
+    await channel_layer.group_send(
+        WILDCARD_GROUP, {'type': 'send_frames', 'frames': frames}
+    )
+    for symbol, frame in frames.items():
+        await channel_layer.group_send(
+            symbol_group(symbol),
+            {'type': 'send_frames', 'frames': {symbol: frame}},
+        )
+
+
+class CountingLayer(InMemoryChannelLayer):
+    """InMemoryChannelLayer с подсчетом group_send и задержкой сети"""
+
+    def __init__(self, rtt=0, **kwargs):
+        super().__init__(**kwargs)
+        self.rtt = rtt
+        self.calls = 0
+
+    async def group_send(self, group, message):
+        self.calls += 1
+        if self.rtt:
+            # Обращение к Redis по сети
+            await asyncio.sleep(self.rtt)
+        await super().group_send(group, message)
+
+
+def deliver(message):
+    """Работа consumer по одному сообщению: текст для self.send"""
+    if message['type'] == 'send_ticker':
+        return [json.dumps(message['data'])]
+    return list(message['frames'].values())
+
+
+async def run_flush(publish, prices, clients, rtt):
+    """
+    Возвращает (CPU слушателя, CPU consumer, длительность сброса,
+    вызовов group_send) на один сброс; время в мс
+    """
+    channel_layer = CountingLayer(rtt, capacity=len(prices) + 10)
+    channels = []
+    for _ in range(clients):
+        channel = await channel_layer.new_channel()
+        await channel_layer.group_add(WILDCARD_GROUP, channel)
+        channels.append(channel)
+
+    started = time.process_time()
+    wall = time.perf_counter()
+    await publish(channel_layer, prices)
+    listener = time.process_time() - started
+    wall = time.perf_counter() - wall
+
+    started = time.process_time()
+    for channel in channels:
+        frames = 0
+        while frames < len(prices):
+            frames += len(deliver(await channel_layer.receive(channel)))
+    consumers = time.process_time() - started
+    return listener * 1000, consumers * 1000, wall * 1000, channel_layer.calls
+
+
+async def main(options):
+    now = datetime.now(timezone.utc)
+    prices = {
+        f'SYM{index}USDT': (f'{index}.12345678', now)
+        for index in range(options.symbols)
+    }
+    print(
+        f'{"клиенты":>8} | {"режим":>7} | {"слушатель, мс":>14} | '
+        f'{"consumer, мс":>13} | {"на клиента, мкс":>16} | '
+        f'{"сброс, мс":>10} | {"group_send":>10}'
+    )
+    for clients in options.clients:
+        for name, publish in (
+            ('legacy', publish_legacy), ('serial', publish_serial),
+            ('frames', publish_prices),
+        ):
+            listener, consumers, wall, calls = await run_flush(
+                publish, prices, clients, options.rtt / 1000
+            )
+            print(
+                f'{clients:>8} | {name:>7} | {listener:>14.2f} | '
+                f'{consumers:>13.2f} | {consumers / clients * 1000:>16.1f} | '
+                f'{wall:>10.1f} | {calls:>10}'
+            )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--symbols', type=int, default=300)
+    parser.add_argument(
+        '--clients', type=int, nargs='+', default=[1, 10, 100]
+    )
+    parser.add_argument(
+        '--rtt', type=float, default=0.5,
+        help='Задержка одного group_send (обращения к Redis), в мс'
+    )
+    asyncio.run(main(parser.parse_args()))
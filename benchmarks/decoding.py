@@ -0,0 +1,137 @@
+"""
+Бенчмарк разбора кадров Binance слушателем.
+
+Сравнивает прежний разбор (корутина на каждый кадр, json.loads
+и datetime для каждого тика) с decode_ticks для каждой установленной
+JSON-библиотеки. Кадры читаются из файла (один JSON-кадр на строку)
+или генерируются. Выводится количество кадров в секунду.
+
+Запуск из корня проекта:
+    python benchmarks/decoding.py --messages 200000 --symbols 300
+    python benchmarks/decoding.py --frames frames.ndjson
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from tickers.decoding import decode_ticks, select_backend  # noqa: E402
+
+
+async def extract_legacy(message):
+    """Прежний разбор кадра: json.loads и datetime в корутине"""
+    try:
+        data = json.loads(message)
+        if 'data' not in data:
+            return None, None, None
+        ticker_data = data['data']
+        symbol = ticker_data.get('s')
+        price = ticker_data.get('c')
+        event_time_ms = ticker_data.get('E')
+        if not symbol or not price or not event_time_ms:
+            return None, None, None
+        event_time = datetime.fromtimestamp(
+            int(event_time_ms) / 1000, tz=timezone.utc
+        )
+        return symbol, price, event_time
+    except Exception:
+        return None, None, None
+
+
+def generate_frames(messages, symbols):
+    """Кадры комбинированного потока @ticker в формате Binance"""
+    started = int(time.time() * 1000)
+    frames = []
+    for index in range(messages):
+        symbol = f'SYM{index % symbols}USDT'
+        frames.append(json.dumps({
+            'stream': f'{symbol.lower()}@ticker',
+            'data': {
+                'e': '24hrTicker',
+                'E': started + index,
+                's': symbol,
+                'p': '0.10000000',
+                'P': '0.100',
+                'w': '100.00000000',
+                'c': f'{100 + index % 1000 / 100:.8f}',
+                'Q': '0.01000000',
+                'o': '100.00000000',
+                'h': '110.00000000',
+                'l': '90.00000000',
+                'v': '1000.00000000',
+                'q': '100000.00000000',
+                'O': started - 86400000,
+                'C': started + index,
+                'F': 1,
+                'L': 1000,
+                'n': 1000,
+            },
+        }))
+    return frames
+
+
+def read_frames(path):
+    with open(path, encoding='utf-8') as frames:
+        return [line.rstrip('\n') for line in frames if line.strip()]
+
+
+async def run_legacy(frames):
+    ticks = 0
+    for frame in frames:
+        symbol, _, _ = await extract_legacy(frame)
+        ticks += symbol is not None
+    return ticks
+
+
+def run_fast(frames, loads):
+    ticks = 0
+    for frame in frames:
+        ticks += len(decode_ticks(frame, loads=loads))
+    return ticks
+
+
+def report(name, frames, elapsed, ticks):
+    print(
+        f'{name:>8} | {len(frames) / elapsed:>12,.0f} | '
+        f'{elapsed * 1000:>9.1f} | {ticks:>8}'
+    )
+
+
+def main(options):
+    if options.frames:
+        frames = read_frames(options.frames)
+    else:
+        frames = generate_frames(options.messages, options.symbols)
+    print(
+        f'{"разбор":>8} | {"кадров/с":>12} | {"время, мс":>9} | '
+        f'{"тиков":>8}'
+    )
+
+    started = time.perf_counter()
+    ticks = asyncio.run(run_legacy(frames))
+    report('legacy', frames, time.perf_counter() - started, ticks)
+
+    for name in ('json', 'msgspec', 'orjson'):
+        try:
+            _, loads = select_backend(name)
+        except ValueError:
+            continue
+        started = time.perf_counter()
+        ticks = run_fast(frames, loads)
+        report(name, frames, time.perf_counter() - started, ticks)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--messages', type=int, default=200000)
+    parser.add_argument('--symbols', type=int, default=300)
+    parser.add_argument(
+        '--frames', help='Файл с кадрами, по одному JSON-кадру на строку'
+    )
+    main(parser.parse_args())
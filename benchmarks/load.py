@@ -0,0 +1,145 @@
+"""
+Сквозной нагрузочный бенчмарк: симулятор -> слушатель -> /ws/tickers/.
+
+Запускает в одном процессе симулятор потока Binance, слушатель
+binance_ws_listener, подключенный к симулятору, и N клиентов
+/ws/tickers/ (ASGI-приложение с InMemoryChannelLayer и SQLite в памяти).
+Выводит скорость приема тиков, длительность сбросов в БД, перцентили
+задержки от времени события до клиента и пиковую память процесса.
+Внешние сервисы и сеть не нужны.
+
+Запуск из корня проекта:
+    python benchmarks/load.py --symbols 500 --rate 2000 --clients 10
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import resource
+import statistics
+import sys
+import time
+from datetime import datetime
+from unittest.mock import patch
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'binance_ws.test_settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from asgiref.sync import sync_to_async  # noqa: E402
+from channels.testing import WebsocketCommunicator  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+
+import simulator  # noqa: E402
+from binance_ws.asgi import application  # noqa: E402
+from tickers import metrics  # noqa: E402
+from tickers.management.commands.binance_ws_listener import (  # noqa: E402
+    Command,
+)
+from tickers.persistence import TickerWriter  # noqa: E402
+
+
+async def client(latencies):
+    """Клиент /ws/tickers/: задержка от времени события до получения"""
+    communicator = WebsocketCommunicator(application, '/ws/tickers/')
+    await communicator.connect()
+    try:
+        while True:
+            # Таймаут коммуникатора завершает приложение, поэтому клиент
+            # ждет без него, а в конце замера задача отменяется
+            frame = await communicator.receive_from(timeout=3600)
+            event_time = datetime.fromisoformat(
+                json.loads(frame)['event_time']
+            )
+            latencies.append(time.time() - event_time.timestamp())
+    finally:
+        await communicator.disconnect()
+
+
+def percentiles(values):
+    if len(values) < 2:
+        return [values[0] * 1000 if values else 0.0] * 3
+    cuts = statistics.quantiles(values, n=100)
+    return [cuts[49] * 1000, cuts[94] * 1000, cuts[98] * 1000]
+
+
+async def main(options):
+    await sync_to_async(call_command)('migrate', verbosity=0)
+    sim, server, url = await simulator.start(
+        symbols=options.symbols, rate=options.rate
+    )
+
+    flushes = []
+    write = TickerWriter.write
+
+    def timed_write(writer, rows):
+        started = time.perf_counter()
+        try:
+            return write(writer, rows)
+        finally:
+            flushes.append(time.perf_counter() - started)
+
+    latencies = []
+    clients = [
+        asyncio.create_task(client(latencies))
+        for _ in range(options.clients)
+    ]
+    command = Command(stdout=io.StringIO())
+    ticks_before = metrics.TICKS_PARSED.value
+    started = time.monotonic()
+    with patch.object(TickerWriter, 'write', timed_write):
+        listener = asyncio.create_task(command.listen(
+            [symbol.lower() for symbol in sim.symbols],
+            shards=options.shards,
+            save_interval=options.save_interval,
+            broadcast_interval=options.broadcast_interval,
+            ws_url=url,
+        ))
+        await asyncio.sleep(options.duration)
+        elapsed = time.monotonic() - started
+        ticks = metrics.TICKS_PARSED.value - ticks_before
+        listener.cancel()
+        await asyncio.gather(listener, return_exceptions=True)
+    for task in clients:
+        task.cancel()
+    await asyncio.gather(*clients, return_exceptions=True)
+    server.close()
+    await server.wait_closed()
+
+    p50, p95, p99 = percentiles(latencies)
+    flush_p50, flush_p95, _ = percentiles(flushes)
+    print(f'Длительность:           {elapsed:.1f} с')
+    print(f'Отправлено симулятором: {sim.sent / elapsed:,.0f} кадров/с')
+    print(f'Принято слушателем:     {ticks / elapsed:,.0f} тиков/с')
+    print(
+        f'Сбросов в БД:           {len(flushes)}, '
+        f'p50 {flush_p50:.1f} мс, p95 {flush_p95:.1f} мс'
+    )
+    print(
+        f'Доставлено клиентам:    {len(latencies)} кадров, '
+        f'задержка p50 {p50:.1f} мс, p95 {p95:.1f} мс, p99 {p99:.1f} мс'
+    )
+    print(
+        'Пиковая память:         '
+        f'{resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} МБ'
+    )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--symbols', type=int, default=500)
+    parser.add_argument(
+        '--rate', type=int, default=2000,
+        help='Тиков в секунду на одно соединение симулятора'
+    )
+    parser.add_argument('--clients', type=int, default=10)
+    parser.add_argument('--shards', type=int, default=None)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--save-interval', type=float, default=1)
+    parser.add_argument('--broadcast-interval', type=float, default=0.25)
+    asyncio.run(main(parser.parse_args()))
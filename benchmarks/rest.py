@@ -0,0 +1,185 @@
+"""
+Бенчмарк конкурентных запросов к /api/tickers/ и /api/tickers/history/.
+
+Сравнивает синхронные views DRF, которые ASGI-обработчик Django
+выполняет в потоке sync_to_async на каждый запрос, с async-версиями
+ticker_list_view и ticker_history_view. Запросы отправляются прямо
+в ASGI-приложение Django (как у daphne, но без сети): N клиентов
+повторяют запрос в течение заданного времени. Для каждого сценария
+и числа клиентов выводятся запросы в секунду и задержки p50/p99.
+
+Синхронные хуки MIDDLEWARE Django выполняет в потоке и для
+async-представлений; с --without-middleware замеряется предел
+без них.
+
+История хранится во временном файле SQLite: у SQLite в памяти
+каждый поток видел бы свою пустую БД.
+
+Запуск из корня проекта:
+    python benchmarks/rest.py --rows 100000 --concurrency 1 10 100
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+import types
+from datetime import datetime, timedelta, timezone
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'binance_ws.test_settings')
+
+from django.conf import settings  # noqa: E402
+
+DATABASE = os.path.join(tempfile.mkdtemp(), 'rest.sqlite3')
+settings.DATABASES['default']['NAME'] = DATABASE
+settings.DEBUG = False
+settings.ALLOWED_HOSTS = ['localhost']
+
+import django  # noqa: E402
+
+django.setup()
+
+from asgiref.sync import sync_to_async  # noqa: E402
+from channels.testing import HttpCommunicator  # noqa: E402
+from django.core.asgi import get_asgi_application  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.urls import clear_url_caches, path  # noqa: E402
+
+from tickers.cache import publish_snapshot, publish_version  # noqa: E402
+from tickers.persistence import TickerWriter  # noqa: E402
+from tickers.views import (  # noqa: E402
+    TickerPriceHistoryView, TickerPriceListView, ticker_history_view,
+    ticker_list_view,
+)
+
+VIEWS = {
+    'sync': (TickerPriceListView.as_view(), TickerPriceHistoryView.as_view()),
+    'async': (ticker_list_view, ticker_history_view),
+}
+SCENARIOS = {
+    'список': 'tickers/',
+    'список 304': 'tickers/',
+    'история': 'tickers/history/?symbol=SYM0000USDT&limit=100',
+    'история 304': 'tickers/history/?symbol=SYM0000USDT&limit=100',
+}
+
+
+def install_urls():
+    """Маршруты обоих вариантов: /sync/... и /async/..."""
+    urls = types.ModuleType('rest_benchmark_urls')
+    urls.urlpatterns = []
+    for name, (list_view, history_view) in VIEWS.items():
+        urls.urlpatterns += [
+            path(f'{name}/tickers/', list_view),
+            path(f'{name}/tickers/history/', history_view),
+        ]
+    sys.modules[urls.__name__] = urls
+    settings.ROOT_URLCONF = urls.__name__
+    clear_url_caches()
+
+
+def fill(rows, symbols):
+    """История rows цен по symbols символам и опубликованная версия"""
+    call_command('migrate', verbosity=0)
+    started = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    writer = TickerWriter()
+    batch = []
+    for index in range(rows):
+        batch.append((
+            f'SYM{index % symbols:04d}USDT',
+            f'{100 + index % 1000}.25',
+            started + timedelta(seconds=index // symbols),
+        ))
+        if len(batch) == 10000:
+            writer.write(batch)
+            batch = []
+    if batch:
+        writer.write(batch)
+    publish_version()
+    publish_snapshot()
+
+
+async def request(application, url, headers):
+    """Один GET; возвращает статус и заголовки ответа"""
+    communicator = HttpCommunicator(application, 'GET', url, headers=headers)
+    response = await communicator.get_response(timeout=60)
+    return response['status'], dict(response['headers'])
+
+
+async def run(application, url, headers, concurrency, duration):
+    """concurrency клиентов повторяют запрос duration секунд"""
+    latencies = []
+    deadline = time.monotonic() + duration
+
+    async def client():
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            status, _ = await request(application, url, headers)
+            latencies.append(time.perf_counter() - started)
+            assert status in (200, 304), status
+
+    started = time.monotonic()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies, time.monotonic() - started
+
+
+def percentiles(values):
+    if len(values) < 2:
+        return [values[0] * 1000 if values else 0.0] * 2
+    cuts = statistics.quantiles(values, n=100)
+    return [cuts[49] * 1000, cuts[98] * 1000]
+
+
+async def main(options):
+    install_urls()
+    if options.without_middleware:
+        settings.MIDDLEWARE = []
+    await sync_to_async(fill)(options.rows, options.symbols)
+    application = get_asgi_application()
+    host = (b'host', b'localhost')
+
+    print(
+        f'{"Сценарий":<12} {"views":<6} {"клиенты":>8} '
+        f'{"запр/с":>9} {"p50, мс":>9} {"p99, мс":>9}'
+    )
+    for scenario, route in SCENARIOS.items():
+        for concurrency in options.concurrency:
+            for name in VIEWS:
+                url = f'/{name}/{route}'
+                headers = [host]
+                if scenario.endswith('304'):
+                    _, response = await request(application, url, [host])
+                    headers.append((b'if-none-match', response[b'ETag']))
+                latencies, elapsed = await run(
+                    application, url, headers, concurrency, options.duration
+                )
+                p50, p99 = percentiles(latencies)
+                print(
+                    f'{scenario:<12} {name:<6} {concurrency:>8} '
+                    f'{len(latencies) / elapsed:>9,.0f} '
+                    f'{p50:>9.1f} {p99:>9.1f}'
+                )
+    os.remove(DATABASE)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--symbols', type=int, default=100)
+    parser.add_argument(
+        '--concurrency', type=int, nargs='+', default=[1, 10, 100],
+        help='Числа одновременных клиентов'
+    )
+    parser.add_argument(
+        '--duration', type=float, default=3,
+        help='Длительность одного замера в секундах'
+    )
+    parser.add_argument(
+        '--without-middleware', action='store_true',
+        help='Замер без MIDDLEWARE проекта'
+    )
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,139 @@
+"""
+Локальный симулятор потока Binance.
+
+WebSocket-сервер отправляет кадры комбинированного потока в формате
+Binance (@ticker и !miniTicker@arr) с заданной частотой. Если клиент
+подписался параметром ?streams=, кадры идут по его символам, иначе —
+по --symbols сгенерированным символам. Время события в кадре — текущее,
+поэтому по нему можно измерять задержку до клиентов /ws/tickers/.
+
+Запуск из корня проекта:
+    python benchmarks/simulator.py --port 9443 --symbols 500 --rate 2000
+    python manage.py binance_ws_listener --ws-url ws://127.0.0.1:9443/stream
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from urllib.parse import parse_qs, urlparse
+
+from websockets.asyncio.server import serve
+
+ALL_MARKET_STREAMS = ('!ticker@arr', '!miniTicker@arr')
+
+
+def generated_symbols(count):
+    return [f'SYM{index}USDT' for index in range(count)]
+
+
+def subscribed_symbols(path, default):
+    """Символы из ?streams=btcusdt@ticker/...; None — поток всего рынка"""
+    query = parse_qs(urlparse(path).query)
+    streams = [
+        stream
+        for value in query.get('streams', [])
+        for stream in value.split('/')
+        if stream
+    ]
+    if not streams or any(s in ALL_MARKET_STREAMS for s in streams):
+        return None, default
+    return streams, [stream.split('@')[0].upper() for stream in streams]
+
+
+def ticker(symbol, price, event_time):
+    return {
+        'e': '24hrTicker',
+        'E': event_time,
+        's': symbol,
+        'c': f'{price:.8f}',
+        'o': '100.00000000',
+        'h': '110.00000000',
+        'l': '90.00000000',
+        'v': '1000.00000000',
+        'q': '100000.00000000',
+    }
+
+
+class Simulator:
+    """
+    Генератор кадров: rate тиков в секунду по кругу по символам.
+    Для потока всего рынка раз в секунду отправляется массив тикеров
+    всех символов.
+    """
+
+    def __init__(self, symbols=500, rate=1000):
+        self.symbols = generated_symbols(symbols)
+        self.rate = rate
+        self.sent = 0
+
+    async def handler(self, connection):
+        streams, symbols = subscribed_symbols(
+            connection.request.path, self.symbols
+        )
+        prices = {symbol: 100.0 for symbol in symbols}
+        if streams is None:
+            await self.send_arrays(connection, prices)
+        else:
+            await self.send_tickers(connection, prices)
+
+    async def send_tickers(self, connection, prices):
+        symbols = list(prices)
+        interval = 1 / self.rate
+        started = time.monotonic()
+        index = 0
+        while True:
+            symbol = symbols[index % len(symbols)]
+            prices[symbol] *= 1 + random.uniform(-0.001, 0.001)
+            await connection.send(json.dumps({
+                'stream': f'{symbol.lower()}@ticker',
+                'data': ticker(
+                    symbol, prices[symbol], int(time.time() * 1000)
+                ),
+            }))
+            self.sent += 1
+            index += 1
+            # Выдерживаем среднюю частоту, не засыпая на каждом кадре
+            delay = started + index * interval - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+    async def send_arrays(self, connection, prices):
+        while True:
+            event_time = int(time.time() * 1000)
+            await connection.send(json.dumps({
+                'stream': '!miniTicker@arr',
+                'data': [
+                    ticker(symbol, price, event_time)
+                    for symbol, price in prices.items()
+                ],
+            }))
+            self.sent += 1
+            await asyncio.sleep(1)
+
+
+async def start(host='127.0.0.1', port=0, symbols=500, rate=1000):
+    """Запускает симулятор; возвращает (simulator, server, адрес потока)"""
+    simulator = Simulator(symbols, rate)
+    server = await serve(simulator.handler, host, port)
+    port = server.sockets[0].getsockname()[1]
+    return simulator, server, f'ws://{host}:{port}/stream'
+
+
+async def main(options):
+    _, server, url = await start(
+        options.host, options.port, options.symbols, options.rate
+    )
+    print(f'Симулятор потока: {url}')
+    await server.serve_forever()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9443)
+    parser.add_argument('--symbols', type=int, default=500)
+    parser.add_argument(
+        '--rate', type=int, default=1000, help='Тиков в секунду'
+    )
+    asyncio.run(main(parser.parse_args()))
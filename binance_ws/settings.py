@@ -119,3 +119,34 @@ CHANNEL_LAYERS = {
         },
     },
 }
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': f"redis://{os.environ.get('REDIS_HOST', 'redis')}:6379/1",
+    },
+}
+
+# Время жизни снимка последних цен в Redis и в памяти процесса, в секундах
+TICKERS_CACHE_TTL = 300
+TICKERS_CACHE_LOCAL_TTL = 1
+
+# /api/tickers/ и /api/tickers/history/ обслуживаются async-представлениями
+# без пула потоков sync_to_async; False возвращает синхронные views DRF
+TICKERS_ASYNC_VIEWS = True
+
+# Время жизни ответов /api/tickers/candles/ с закрытыми свечами, в секундах
+TICKERS_CANDLES_CACHE_TTL = 3600
+# Через сколько секунд после конца интервала свеча считается закрытой
+# для кэша: слушатель пишет цены с задержкой до --save-interval
+TICKERS_CANDLES_CLOSE_DELAY = 60
+
+# Максимальная скорость отправки обновлений клиенту WebSocket, кадров в
+# секунду (0 — без ограничения), допустимое время ожидания кадра в буфере
+# клиента, в секундах, и максимальное число подписок одного клиента
+TICKERS_WS_MAX_SEND_RATE = 1000
+TICKERS_WS_MAX_LAG = 30
+TICKERS_WS_MAX_SUBSCRIPTIONS = 200
+
+# Источник для заполнения пропусков в истории цен после переподключения
+TICKERS_BACKFILL_SOURCE = 'tickers.backfill.KlinesSource'
@@ -17,7 +17,11 @@ from django.urls import path
 from django.conf import settings
 from django.conf.urls.static import static
 from django.views.generic import RedirectView
-from tickers.views import TickerPriceListView, TickerPriceHistoryView
+from tickers.views import (
+    TickerCandlesView, TickerExportView, metrics_view, ticker_views,
+)
+
+list_view, history_view = ticker_views()
 
 urlpatterns = [
     path(
@@ -26,14 +30,25 @@ urlpatterns = [
     ),
     path(
         'api/tickers/',
-        TickerPriceListView.as_view(),
+        list_view,
         name='tickerprice-list'
     ),
     path(
         'api/tickers/history/',
-        TickerPriceHistoryView.as_view(),
+        history_view,
         name='tickerprice-history'
     ),
+    path(
+        'api/tickers/candles/',
+        TickerCandlesView.as_view(),
+        name='tickerprice-candles'
+    ),
+    path(
+        'api/tickers/export/',
+        TickerExportView.as_view(),
+        name='tickerprice-export'
+    ),
+    path('metrics/', metrics_view, name='metrics'),
 ]
 
 if settings.DEBUG:
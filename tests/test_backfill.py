@@ -0,0 +1,130 @@
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import islice
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from tickers.backfill import Backfiller, KlinesSource, find_gaps, get_source
+from tickers.models import TickerPrice
+from tickers.persistence import TickerWriter
+from tickers.pipeline import backoff_delays
+
+START = datetime(2025, 6, 1, tzinfo=timezone.utc)
+MINUTE_MS = 60 * 1000
+
+
+class KlinesHandler(BaseHTTPRequestHandler):
+    """Заглушка /api/v3/klines: минутные свечи с ценой закрытия = минуте"""
+    requests = []
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {key: value[0] for key, value in parse_qs(url.query).items()}
+        self.requests.append((url.path, query))
+        start, end = int(query['startTime']), int(query['endTime'])
+        open_time = -(-start // MINUTE_MS) * MINUTE_MS
+        klines = []
+        while open_time <= end and len(klines) < int(query['limit']):
+            minute = (open_time - int(START.timestamp() * 1000)) // MINUTE_MS
+            klines.append([
+                open_time, '1', '1', '1', f'{minute}.00', '0',
+                open_time + MINUTE_MS - 1,
+            ])
+            open_time += MINUTE_MS
+        body = json.dumps(klines).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def klines_server():
+    '''Локальный сервер REST API свечей'''
+    KlinesHandler.requests = []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), KlinesHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}'
+    server.shutdown()
+    server.server_close()
+
+
+class TestBackoff:
+    """Тесты для задержек переподключения"""
+    def test_delays_grow_up_to_cap(self):
+        '''Тест: задержки растут экспоненциально и не превышают cap'''
+        with patch('tickers.pipeline.random.uniform', lambda low, high: high):
+            delays = list(islice(backoff_delays(base=1, cap=10), 6))
+
+        assert delays == [1, 2, 4, 8, 10, 10]
+
+    def test_delays_have_jitter(self):
+        '''Тест: задержки случайны в пределах текущей границы'''
+        delays = list(islice(backoff_delays(base=1, cap=4), 50))
+
+        assert all(0 <= delay <= 4 for delay in delays)
+        assert len(set(delays)) > 1
+
+
+@pytest.mark.django_db
+class TestBackfill:
+    """Тесты для поиска и заполнения пропусков в истории цен"""
+    def test_klines_source_pages(self, klines_server):
+        '''Тест: источник обходит свечи страницами до конца пропуска'''
+        source = KlinesSource(base_url=klines_server)
+        with patch('tickers.backfill.KLINES_LIMIT', 2):
+            rows = source.fetch(
+                'BTCUSDT', START, START + timedelta(minutes=5)
+            )
+
+        assert [price for _, price, _ in rows] == [
+            '0.00', '1.00', '2.00', '3.00', '4.00'
+        ]
+        assert rows[0][2] == START + timedelta(minutes=1, milliseconds=-1)
+        assert KlinesHandler.requests[0][0] == '/api/v3/klines'
+        assert KlinesHandler.requests[0][1]['symbol'] == 'BTCUSDT'
+        assert len(KlinesHandler.requests) == 3
+
+    def test_find_gaps(self):
+        '''Тест поиска символов, последняя цена которых устарела'''
+        TickerWriter().write([
+            ('BTCUSDT', '50000.00', START),
+            ('ETHUSDT', '3000.00', START + timedelta(minutes=9)),
+        ])
+        until = START + timedelta(minutes=10)
+
+        assert find_gaps(None, until, min_gap=120) == {'BTCUSDT': START}
+        assert find_gaps(['ETHUSDT'], until, min_gap=30) == {
+            'ETHUSDT': START + timedelta(minutes=9)
+        }
+
+    def test_backfiller_fills_gap(self, klines_server, settings):
+        '''Тест заполнения пропуска из источника, заданного в настройках'''
+        settings.TICKERS_BACKFILL_SOURCE = 'tickers.backfill.KlinesSource'
+        TickerWriter().write([('BTCUSDT', '50000.00', START)])
+        backfiller = Backfiller(
+            get_source(klines_server), TickerWriter(), ['btcusdt'], 60
+        )
+
+        written = backfiller.fill(until=START + timedelta(minutes=3))
+
+        assert written == 3
+        prices = [
+            ticker.price
+            for ticker in TickerPrice.objects.select_related(
+                'symbol'
+            ).order_by('event_time')
+        ]
+        assert prices == [
+            Decimal('50000.00'), Decimal('0.00'),
+            Decimal('1.00'), Decimal('2.00'),
+        ]
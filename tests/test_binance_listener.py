@@ -1,13 +1,24 @@
+import asyncio
+import io
 import json
+import os
+import signal
 import pytest
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, Mock, patch
+from django.core.management import call_command
 from django.utils import timezone
 from asgiref.sync import sync_to_async
+from channels.layers import get_channel_layer
 from decimal import Decimal
-from django.db import transaction
+from django.db import connections, transaction
 
+from tickers.broadcast import LiveBroadcaster
+from tickers.capture import CaptureWriter, read_capture
+from tickers.groups import WILDCARD_GROUP
 from tickers.management.commands.binance_ws_listener import Command
 from tickers.models import TickerPrice
+from tickers.persistence import TickerWriter
+from tickers.pipeline import TickQueue
 
 
 @pytest.mark.django_db(transaction=True)
@@ -38,7 +49,7 @@ class TestBinanceListener:
     def get_ticker(self):
         '''Возвращает первый тикер из базы данных'''
         with transaction.atomic():
-            return TickerPrice.objects.first()
+            return TickerPrice.objects.select_related('symbol').first()
 
     @sync_to_async
     def get_tickers(self):
@@ -83,3 +94,173 @@ class TestBinanceListener:
         assert symbol is None
         assert price is None
         assert event_time is None
+
+    @pytest.mark.parametrize('backfill', [False, True])
+    def test_backfill_option(self, mock_websocket, backfill):
+        '''Тест: пропуски заполняются после подключения только с --backfill'''
+        class Stop(BaseException):
+            '''Останавливает чтение потока после подключения'''
+
+        websocket = mock_websocket.return_value.__aenter__.return_value
+        websocket.recv.side_effect = Stop
+        with patch.object(
+            Command, 'backfill', new_callable=AsyncMock
+        ) as fill, pytest.raises(Stop):
+            call_command(
+                'binance_ws_listener',
+                symbols=['btcusdt'],
+                backfill=backfill,
+                stdout=io.StringIO(),
+            )
+        assert fill.called is backfill
+
+    def test_copy_option(self, mock_websocket):
+        '''Тест: --copy включает загрузку истории через COPY'''
+        class Stop(BaseException):
+            '''Останавливает чтение потока после подключения'''
+
+        websocket = mock_websocket.return_value.__aenter__.return_value
+        websocket.recv.side_effect = Stop
+        with patch(
+            'tickers.management.commands.binance_ws_listener.TickerWriter',
+            wraps=TickerWriter,
+        ) as writer, pytest.raises(Stop):
+            call_command(
+                'binance_ws_listener',
+                symbols=['btcusdt'],
+                copy=True,
+                stdout=io.StringIO(),
+            )
+        assert writer.call_args.kwargs['use_copy'] is True
+
+    async def test_sigterm_saves_ticks_and_capture(
+        self, command, mock_websocket, tmp_path
+    ):
+        '''Тест: по SIGTERM тики сохраняются, а файл записи закрывается'''
+        path = str(tmp_path / 'ticks.capture')
+        message = json.dumps({
+            'data': {'s': 'BTCUSDT', 'c': '50000.00', 'E': 1748736000000}
+        })
+        messages = [message]
+
+        async def recv():
+            if messages:
+                return messages.pop()
+            os.kill(os.getpid(), signal.SIGTERM)
+            await asyncio.sleep(10)
+
+        websocket = mock_websocket.return_value.__aenter__.return_value
+        websocket.recv.side_effect = recv
+        listener = asyncio.create_task(
+            command.listen(['btcusdt'], save_interval=60, record=path)
+        )
+        with pytest.raises(asyncio.CancelledError):
+            await listener
+
+        assert [frame for _, frame in read_capture(path)] == [message]
+        assert await self.get_ticker_count() == 1
+        assert signal.getsignal(signal.SIGTERM) == signal.SIG_DFL
+
+    async def test_backfill_closes_connections(self, command):
+        '''Тест закрытия соединений с БД потока заполнения пропусков'''
+        opened = []
+
+        class Filler:
+            def fill(self):
+                # Соединение потока пула sync_to_async, а не теста
+                connection = connections['default']
+                connection.close = Mock(wraps=connection.close)
+                opened.append(connection)
+                return 0
+
+        await command.backfill(Filler())
+        opened[0].close.assert_called_once()
+
+    async def test_flush_loop_flushes_on_timer(self, command):
+        '''Тест сброса цен по таймеру без новых сообщений'''
+        queue = TickQueue(maxsize=10)
+        await queue.put(('BTCUSDT', '50000.00', 1748736000000))
+        flusher = asyncio.create_task(
+            command.flush_loop(queue, TickerWriter(), 0.05, {})
+        )
+        try:
+            for _ in range(50):
+                await asyncio.sleep(0.02)
+                if await self.get_ticker_count():
+                    break
+        finally:
+            flusher.cancel()
+
+        ticker = await self.get_ticker()
+        assert ticker.symbol.name == 'BTCUSDT'
+        assert ticker.price == Decimal('50000.00')
+
+    async def test_live_broadcast_is_throttled_per_symbol(self):
+        '''Тест рассылки тиков до сброса в БД с объединением по символу'''
+        channel_layer = get_channel_layer()
+        channel = await channel_layer.new_channel()
+        await channel_layer.group_add(WILDCARD_GROUP, channel)
+        broadcaster = LiveBroadcaster(channel_layer, interval=0.2)
+        task = asyncio.create_task(broadcaster.run())
+        try:
+            now = 1748736000000
+            broadcaster.offer('BTCUSDT', '50000.00', now)
+            first = await asyncio.wait_for(channel_layer.receive(channel), 1)
+            broadcaster.offer('BTCUSDT', '50001.00', now)
+            broadcaster.offer('BTCUSDT', '50002.00', now)
+            second = await asyncio.wait_for(channel_layer.receive(channel), 1)
+        finally:
+            task.cancel()
+            await channel_layer.group_discard(WILDCARD_GROUP, channel)
+
+        assert json.loads(first['frames']['BTCUSDT'])['price'] == '50000.00'
+        assert json.loads(second['frames']['BTCUSDT'])['price'] == '50002.00'
+        assert await self.get_ticker_count() == 0
+
+    async def test_listen_shards_symbols(self, command):
+        '''Тест: символы делятся между соединениями с общей очередью'''
+        symbols = ['btcusdt', 'ethusdt', 'bnbusdt', 'xrpusdt', 'solusdt']
+        with patch.object(Command, 'read_stream', AsyncMock()) as read:
+            await command.listen(symbols, shards=2)
+
+        urls = [call.args[0] for call in read.call_args_list]
+        assert len(urls) == 2
+        streams = [
+            stream
+            for url in urls
+            for stream in url.split('streams=')[1].split('/')
+        ]
+        assert sorted(streams) == sorted(f'{s}@ticker' for s in symbols)
+        queues = {id(call.args[1]) for call in read.call_args_list}
+        assert len(queues) == 1
+
+    async def test_listen_all_market(self, command):
+        '''Тест: режим всего рынка открывает одно соединение'''
+        with patch.object(Command, 'read_stream', AsyncMock()) as read:
+            await command.listen(['btcusdt'], all_market='miniTicker')
+
+        (args,) = [call.args for call in read.call_args_list]
+        url, allowed = args[0], args[3]
+        assert url.endswith('?streams=!miniTicker@arr')
+        assert allowed == {'BTCUSDT'}
+
+    async def test_read_stream_records_frames(
+        self, command, mock_websocket, tmp_path
+    ):
+        '''Тест записи сырых кадров потока при --record'''
+        message = json.dumps({
+            'data': {'s': 'BTCUSDT', 'c': '50000.00', 'E': 1748736000000}
+        })
+        websocket = mock_websocket.return_value.__aenter__.return_value
+        websocket.recv.side_effect = [message, asyncio.CancelledError]
+        queue = TickQueue(maxsize=10)
+        path = str(tmp_path / 'ticks.capture')
+
+        with CaptureWriter(path) as recorder:
+            with pytest.raises(asyncio.CancelledError):
+                await command.read_stream(
+                    'ws://stream', queue, recorder=recorder
+                )
+
+        assert [frame for _, frame in read_capture(path)] == [message]
+        assert queue.depth == 1
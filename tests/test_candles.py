@@ -0,0 +1,135 @@
+import io
+from datetime import timezone as dt_timezone
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.utils import timezone
+
+from tickers.management.commands.binance_ws_listener import (
+    Command as ListenerCommand,
+)
+from tickers.models import Symbol, TickerCandle, TickerPrice
+from tickers.persistence import TickerWriter
+
+
+@pytest.mark.django_db
+class TestTickerCandles:
+    """Тесты для свечей TickerCandle, обновляемых при сбросе"""
+    def setup_method(self):
+        '''Начало тестового диапазона'''
+        self.start = timezone.datetime(2025, 6, 1, tzinfo=dt_timezone.utc)
+
+    def at(self, seconds):
+        '''Время через seconds секунд после начала диапазона'''
+        return self.start + timezone.timedelta(seconds=seconds)
+
+    def candles(self, interval):
+        '''Свечи BTCUSDT интервала: (open, high, low, close, count)'''
+        return list(
+            TickerCandle.objects.filter(
+                symbol='BTCUSDT', interval=interval
+            ).order_by('open_time').values_list(
+                'open', 'high', 'low', 'close', 'count'
+            )
+        )
+
+    def test_flushes_update_open_candle(self):
+        '''Тест обновления текущей свечи несколькими сбросами'''
+        writer = TickerWriter()
+        writer.write([('BTCUSDT', '100.00', self.at(0))])
+        writer.write([('BTCUSDT', '105.00', self.at(20))])
+        writer.write([('BTCUSDT', '95.00', self.at(40))])
+        writer.write([('BTCUSDT', '101.00', self.at(60))])
+
+        assert self.candles('1m') == [
+            (100, 105, 95, 95, 3),
+            (101, 101, 101, 101, 1),
+        ]
+        assert self.candles('1h') == [
+            (100, 105, 95, 101, 4),
+        ]
+
+    def test_late_price_keeps_open_and_close(self):
+        '''Тест: запоздавшая цена становится open, но не close'''
+        writer = TickerWriter()
+        writer.write([('BTCUSDT', '100.00', self.at(30))])
+        writer.write([('BTCUSDT', '90.00', self.at(10))])
+
+        assert self.candles('1m') == [
+            (90, 100, 90, 100, 2),
+        ]
+
+    def test_closed_candles(self):
+        '''Тест закрытия свечей, интервал которых закончился'''
+        TickerWriter().write([('BTCUSDT', '100.00', self.at(0))])
+
+        assert not TickerCandle.objects.filter(closed=False).exists()
+
+        now = timezone.now()
+        TickerWriter().write([('BTCUSDT', '100.00', now)])
+        open_candles = set(
+            TickerCandle.objects.filter(closed=False).values_list(
+                'interval', flat=True
+            )
+        )
+        assert open_candles == {'1m', '1h', '1d'}
+
+    def test_rebuild_matches_incremental(self):
+        '''Тест: пересчет по истории совпадает с обновлением при сбросе'''
+        writer = TickerWriter()
+        for index in range(10):
+            writer.write([
+                ('BTCUSDT', f'{100 + index % 4}.00', self.at(25 * index)),
+            ])
+        incremental = {
+            interval: self.candles(interval) for interval in ('1m', '1h')
+        }
+
+        TickerCandle.objects.all().delete()
+        call_command('rebuild_candles', stdout=io.StringIO())
+
+        for interval, candles in incremental.items():
+            assert self.candles(interval) == candles
+        assert TickerCandle.objects.filter(closed=False).count() == 0
+
+    def test_rebuild_range_repairs_gap(self):
+        '''Тест восстановления свечей после пропуска в истории'''
+        TickerWriter().write([('BTCUSDT', '100.00', self.at(0))])
+        # Цена, записанная в обход слушателя, без обновления свечей
+        TickerPrice.objects.create(
+            symbol=Symbol.objects.get(name='BTCUSDT'),
+            price_units=11000000000,
+            event_time=self.at(120),
+        )
+
+        call_command(
+            'rebuild_candles',
+            symbols=['btcusdt'],
+            intervals=['1m'],
+            start='2025-06-01T00:02:00Z',
+            end='2025-06-01T00:03:00Z',
+            stdout=io.StringIO(),
+        )
+
+        assert self.candles('1m') == [
+            (100, 100, 100, 100, 1),
+            (110, 110, 110, 110, 1),
+        ]
+
+    def test_rebuild_invalid_time(self):
+        '''Тест ошибки команды при неверном времени диапазона'''
+        with pytest.raises(CommandError, match='--start'):
+            call_command(
+                'rebuild_candles', start='2025-13-01', stdout=io.StringIO()
+            )
+
+    def test_listener_warns_without_candles(self):
+        '''Тест предупреждения слушателя об истории без свечей'''
+        TickerWriter().write([('BTCUSDT', '100.00', self.at(0))])
+        stdout = io.StringIO()
+        ListenerCommand(stdout=stdout).check_candles()
+        assert stdout.getvalue() == ''
+
+        TickerCandle.objects.all().delete()
+        ListenerCommand(stdout=stdout).check_candles()
+        assert 'rebuild_candles' in stdout.getvalue()
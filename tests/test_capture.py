@@ -0,0 +1,144 @@
+import gzip
+import json
+import random
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from channels.layers import get_channel_layer
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from tickers.capture import HEADER, CaptureWriter, read_capture
+from tickers.models import TickerLatest, TickerPrice
+
+EVENT_TIME = 1748736000000
+SECOND_NS = 10 ** 9
+
+
+def frame(symbol, price, event_time):
+    return json.dumps({
+        'stream': f'{symbol.lower()}@ticker',
+        'data': {'s': symbol, 'c': price, 'E': event_time},
+    })
+
+
+class TestCapture:
+    """Тесты для записи сырых кадров потока"""
+    def test_append_and_read(self, tmp_path):
+        '''Тест: дозапись в файл сохраняет все кадры по порядку'''
+        path = str(tmp_path / 'ticks.capture')
+        with CaptureWriter(path) as writer:
+            writer.write('first', received_at=1)
+        with CaptureWriter(path) as writer:
+            writer.write('второй', received_at=2)
+
+        assert list(read_capture(path)) == [(1, 'first'), (2, 'второй')]
+
+    def test_truncated_tail_is_skipped(self, tmp_path):
+        '''Тест: недописанная запись в конце файла пропускается'''
+        path = tmp_path / 'ticks.capture'
+        with CaptureWriter(str(path)) as writer:
+            writer.write('first', received_at=1)
+            writer.write('second' * 100, received_at=2)
+        data = path.read_bytes()
+        path.write_bytes(data[:-10])
+
+        assert list(read_capture(str(path)))[:1] == [(1, 'first')]
+
+    def test_append_after_unclean_stop(self, tmp_path):
+        '''Тест: дозапись после аварийной остановки не теряет кадры'''
+        path = tmp_path / 'ticks.capture'
+        # Целый блок и блок, оборванный остановкой процесса
+        lost = random.Random(0).randbytes(2000).hex().encode()
+        path.write_bytes(
+            gzip.compress(HEADER.pack(1, 5) + b'first')
+            + gzip.compress(HEADER.pack(2, len(lost)) + lost)[:-100]
+        )
+        with CaptureWriter(str(path)) as writer:
+            writer.write('second', received_at=3)
+            writer.write('third', received_at=4)
+
+        assert list(read_capture(str(path))) == [
+            (1, 'first'), (3, 'second'), (4, 'third'),
+        ]
+
+    def test_flush_completes_block(self, tmp_path):
+        '''Тест: сброс завершает блок, и его кадры читаются до закрытия'''
+        path = str(tmp_path / 'ticks.capture')
+        writer = CaptureWriter(path, flush_interval=0)
+        writer.write('first', received_at=1)
+
+        assert list(read_capture(path)) == [(1, 'first')]
+        writer.close()
+
+
+@pytest.mark.django_db(transaction=True)
+class TestReplayTicks:
+    """Тесты для команды воспроизведения записи потока"""
+    @pytest.fixture
+    def capture(self, tmp_path):
+        '''Запись: два символа, три секунды по времени получения'''
+        path = str(tmp_path / 'ticks.capture')
+        with CaptureWriter(path) as writer:
+            for second, price in enumerate(('100.00', '101.00', '102.00')):
+                received_at = (1000 + second) * SECOND_NS
+                writer.write(
+                    frame('BTCUSDT', price, EVENT_TIME + second * 1000),
+                    received_at=received_at,
+                )
+                writer.write(
+                    frame('ETHUSDT', '3000.00', EVENT_TIME + second * 1000),
+                    received_at=received_at + 1,
+                )
+        return path
+
+    def test_replay_as_fast_as_possible(self, capture):
+        '''Тест: история не зависит от скорости воспроизведения'''
+        call_command(
+            'replay_ticks', capture, '--speed', '0', '--save-interval', '2',
+            '--symbols', 'btcusdt',
+        )
+
+        prices = TickerPrice.objects.select_related('symbol').order_by(
+            'event_time'
+        )
+        # Сбросы на 2-й секунде записи и в конце воспроизведения
+        assert [(price.symbol.name, str(price.price)) for price in prices] == [
+            ('BTCUSDT', '101.00000000'), ('BTCUSDT', '102.00000000'),
+        ]
+        assert TickerLatest.objects.get().price == 102
+
+    @pytest.mark.parametrize('options', [
+        [], ['--broadcast-interval', '0'],
+    ])
+    def test_broadcast(self, capture, options):
+        '''Тест: по умолчанию воспроизведенные цены рассылаются клиентам'''
+        with patch.object(
+            get_channel_layer(), 'group_send', new_callable=AsyncMock
+        ) as group_send:
+            call_command('replay_ticks', capture, '--speed', '0', *options)
+        assert group_send.await_count > 0
+
+    def test_no_broadcast(self, capture):
+        '''Тест: с --no-broadcast история пишется без рассылки'''
+        with patch.object(
+            get_channel_layer(), 'group_send', new_callable=AsyncMock
+        ) as group_send:
+            call_command(
+                'replay_ticks', capture, '--speed', '0', '--no-broadcast'
+            )
+        group_send.assert_not_awaited()
+        assert TickerPrice.objects.count() == 2
+
+    def test_no_broadcast_with_interval(self, capture):
+        '''Тест ошибки при --no-broadcast вместе с --broadcast-interval'''
+        with pytest.raises(CommandError):
+            call_command(
+                'replay_ticks', capture, '--no-broadcast',
+                '--broadcast-interval', '1',
+            )
+
+    def test_missing_capture(self):
+        '''Тест ошибки при отсутствии файла записи'''
+        with pytest.raises(CommandError):
+            call_command('replay_ticks', 'missing.capture')
@@ -1,3 +1,5 @@
+import asyncio
+
 import pytest
 from channels.testing import WebsocketCommunicator
 from django.utils import timezone
@@ -82,3 +84,249 @@ class TestTickerConsumer:
 
         await communicator1.disconnect()
         await communicator2.disconnect()
+
+    async def publish(self, symbol, price):
+        '''Публикует обновление символа так же, как слушатель'''
+        from channels.layers import get_channel_layer
+        from tickers.groups import WILDCARD_GROUP, symbol_group
+        channel_layer = get_channel_layer()
+        message = {
+            'type': 'send_ticker',
+            'data': {
+                'symbol': symbol,
+                'price': price,
+                'event_time': timezone.now().isoformat(),
+            }
+        }
+        await channel_layer.group_send(symbol_group(symbol), message)
+        await channel_layer.group_send(WILDCARD_GROUP, message)
+
+    async def test_subscribe_to_symbol(self):
+        '''Тест подписки на отдельный символ'''
+        communicator = WebsocketCommunicator(application, '/ws/tickers/')
+        await communicator.connect()
+        await communicator.send_json_to(
+            {'action': 'subscribe', 'symbols': ['btcusdt']}
+        )
+        assert await communicator.receive_json_from() == {
+            'type': 'subscriptions', 'symbols': ['BTCUSDT']
+        }
+
+        await self.publish('ETHUSDT', '3000.00')
+        await self.publish('BTCUSDT', '50000.00')
+
+        response = await communicator.receive_json_from()
+        assert response['symbol'] == 'BTCUSDT'
+        assert await communicator.receive_nothing()
+        await communicator.disconnect()
+
+    async def test_subscribe_by_query_string(self):
+        '''Тест подписки на символы через параметр symbols'''
+        communicator = WebsocketCommunicator(
+            application, '/ws/tickers/?symbols=ETHUSDT,BNBUSDT'
+        )
+        connected, _ = await communicator.connect()
+        assert connected
+
+        await self.publish('BTCUSDT', '50000.00')
+        await self.publish('ETHUSDT', '3000.00')
+
+        response = await communicator.receive_json_from()
+        assert response['symbol'] == 'ETHUSDT'
+        assert await communicator.receive_nothing()
+        await communicator.disconnect()
+
+    async def test_wildcard_receives_every_symbol_once(self):
+        '''Тест: подписка на все символы получает каждое обновление раз'''
+        communicator = WebsocketCommunicator(application, '/ws/tickers/')
+        await communicator.connect()
+        await communicator.send_json_to(
+            {'action': 'subscribe', 'symbols': ['BTCUSDT']}
+        )
+        await communicator.receive_json_from()
+        await communicator.send_json_to(
+            {'action': 'subscribe', 'symbols': ['*']}
+        )
+        assert (await communicator.receive_json_from())['symbols'] == ['*']
+
+        await self.publish('BTCUSDT', '50000.00')
+        await self.publish('ETHUSDT', '3000.00')
+
+        symbols = [
+            (await communicator.receive_json_from())['symbol'],
+            (await communicator.receive_json_from())['symbol'],
+        ]
+        assert symbols == ['BTCUSDT', 'ETHUSDT']
+        assert await communicator.receive_nothing()
+        await communicator.disconnect()
+
+    async def test_unsubscribe(self):
+        '''Тест отписки от символа'''
+        communicator = WebsocketCommunicator(
+            application, '/ws/tickers/?symbols=BTCUSDT'
+        )
+        await communicator.connect()
+        await communicator.send_json_to(
+            {'action': 'unsubscribe', 'symbols': ['BTCUSDT']}
+        )
+        assert (await communicator.receive_json_from())['symbols'] == []
+
+        await self.publish('BTCUSDT', '50000.00')
+        assert await communicator.receive_nothing()
+        await communicator.disconnect()
+
+    async def test_invalid_messages(self):
+        '''Тест ошибок протокола подписки'''
+        communicator = WebsocketCommunicator(application, '/ws/tickers/')
+        await communicator.connect()
+        for message in (
+            'not json',
+            '[]',
+            '{"action": "listen", "symbols": ["BTCUSDT"]}',
+            '{"action": "subscribe", "symbols": "BTCUSDT"}',
+            '{"action": "subscribe", "symbols": ["BTC/USDT"]}',
+        ):
+            await communicator.send_to(text_data=message)
+            response = await communicator.receive_json_from()
+            assert response['type'] == 'error'
+        await communicator.disconnect()
+
+    async def test_send_frames(self):
+        '''Тест рассылки заранее сериализованных кадров за один сброс'''
+        from channels.layers import get_channel_layer
+        from tickers.broadcast import publish_prices
+        wildcard = WebsocketCommunicator(application, '/ws/tickers/')
+        btc = WebsocketCommunicator(
+            application, '/ws/tickers/?symbols=BTCUSDT'
+        )
+        await wildcard.connect()
+        await btc.connect()
+
+        now = timezone.now()
+        frames = await publish_prices(get_channel_layer(), {
+            'BTCUSDT': ('50000.00', now),
+            'ETHUSDT': ('3000.00', now),
+        })
+
+        assert await wildcard.receive_from() == frames['BTCUSDT']
+        assert await wildcard.receive_from() == frames['ETHUSDT']
+        response = await btc.receive_json_from()
+        assert response == {
+            'symbol': 'BTCUSDT',
+            'price': '50000.00',
+            'event_time': now.isoformat(),
+        }
+        assert await btc.receive_nothing()
+        await wildcard.disconnect()
+        await btc.disconnect()
+
+    async def test_slow_client_gets_latest_price(self, settings):
+        '''Тест объединения обновлений символа для медленного клиента'''
+        settings.TICKERS_WS_MAX_SEND_RATE = 1
+        communicator = WebsocketCommunicator(application, '/ws/tickers/')
+        await communicator.connect()
+
+        for price in ('50000.00', '50001.00', '50002.00'):
+            await self.publish('BTCUSDT', price)
+        await self.publish('ETHUSDT', '3000.00')
+
+        prices = {}
+        received = 0
+        while not await communicator.receive_nothing(timeout=1.5):
+            response = await communicator.receive_json_from()
+            prices[response['symbol']] = response['price']
+            received += 1
+        assert received < 4
+        assert prices == {'BTCUSDT': '50002.00', 'ETHUSDT': '3000.00'}
+        await communicator.disconnect()
+
+    async def test_lagging_client_is_disconnected(self, settings):
+        '''Тест отключения клиента, отстающего дольше TICKERS_WS_MAX_LAG'''
+        settings.TICKERS_WS_MAX_SEND_RATE = 1
+        settings.TICKERS_WS_MAX_LAG = 0.01
+        communicator = WebsocketCommunicator(application, '/ws/tickers/')
+        await communicator.connect()
+
+        await self.publish('BTCUSDT', '50000.00')
+        await communicator.receive_json_from()
+        await self.publish('ETHUSDT', '3000.00')
+        await asyncio.sleep(0.05)
+        await self.publish('BNBUSDT', '600.00')
+
+        output = await communicator.receive_output()
+        assert output == {'type': 'websocket.close', 'code': 4008}
+        await communicator.disconnect()
+
+    async def test_busy_client_is_not_disconnected(self, settings):
+        '''Тест: буфер не пустеет, но кадры уходят вовремя'''
+        settings.TICKERS_WS_MAX_SEND_RATE = 20
+        settings.TICKERS_WS_MAX_LAG = 0.5
+        communicator = WebsocketCommunicator(application, '/ws/tickers/')
+        await communicator.connect()
+
+        # 60 кадров в секунду при отправке 20: каждый символ ждет
+        # не дольше 3 / 20 секунды
+        for _ in range(30):
+            for symbol in ('BTCUSDT', 'ETHUSDT', 'BNBUSDT'):
+                await self.publish(symbol, '1.00')
+            await asyncio.sleep(0.05)
+
+        received = 0
+        while not await communicator.receive_nothing(timeout=0.3):
+            output = await communicator.receive_output()
+            assert output['type'] == 'websocket.send'
+            received += 1
+        assert received > 20
+        await communicator.disconnect()
+
+    async def test_subscription_limit(self, settings):
+        '''Тест ограничения числа подписок TICKERS_WS_MAX_SUBSCRIPTIONS'''
+        settings.TICKERS_WS_MAX_SUBSCRIPTIONS = 2
+        communicator = WebsocketCommunicator(application, '/ws/tickers/')
+        await communicator.connect()
+
+        await communicator.send_json_to({
+            'action': 'subscribe',
+            'symbols': ['BTCUSDT', 'ETHUSDT', 'BNBUSDT'],
+        })
+        response = await communicator.receive_json_from()
+        assert response == {
+            'type': 'error', 'message': 'Не больше 2 подписок'
+        }
+        await communicator.disconnect()
+
+
+class CountingLayer:
+    """Слой каналов, который считает group_send и одновременные вызовы"""
+    def __init__(self):
+        self.groups = []
+        self.active = self.peak = 0
+
+    async def group_send(self, group, message):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0)
+        self.groups.append(group)
+        self.active -= 1
+
+
+@pytest.mark.asyncio
+class TestPublishPrices:
+    """Тесты для рассылки кадров одного сброса"""
+    async def test_group_sends_are_concurrent(self):
+        '''Тест: сообщения групп отправляются пачками, а не по одному'''
+        from tickers.broadcast import GROUP_SEND_CONCURRENCY, publish_prices
+        from tickers.groups import WILDCARD_GROUP, symbol_group
+        layer = CountingLayer()
+        now = timezone.now()
+        symbols = [f'SYM{index}USDT' for index in range(250)]
+
+        await publish_prices(
+            layer, {symbol: ('1.00', now) for symbol in symbols}
+        )
+
+        # Группа всех символов и по группе на символ
+        assert sorted(layer.groups) == sorted(
+            [WILDCARD_GROUP] + [symbol_group(symbol) for symbol in symbols]
+        )
+        assert layer.peak == GROUP_SEND_CONCURRENCY
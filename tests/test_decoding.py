@@ -0,0 +1,83 @@
+import json
+
+import pytest
+
+from tickers.decoding import (
+    decode_frame, decode_ticks, event_datetime, materialize, select_backend
+)
+
+EVENT_TIME = 1748736000000
+
+
+class TestDecodeTicks:
+    """Тесты для быстрого разбора кадров Binance"""
+    def test_single_ticker(self):
+        '''Тест разбора кадра одного символа без построения datetime'''
+        message = json.dumps({
+            'stream': 'btcusdt@ticker',
+            'data': {'s': 'BTCUSDT', 'c': '50000.00', 'E': EVENT_TIME},
+        })
+
+        assert decode_ticks(message) == [('BTCUSDT', '50000.00', EVENT_TIME)]
+
+    def test_all_market_array(self):
+        '''Тест разбора кадра всего рынка с фильтром по символам'''
+        message = json.dumps({
+            'stream': '!miniTicker@arr',
+            'data': [
+                {'s': 'BTCUSDT', 'c': '50000.00', 'E': EVENT_TIME},
+                {'s': 'DOGEUSDT', 'c': '0.10', 'E': EVENT_TIME},
+                {'s': 'ETHUSDT', 'c': '3000.00', 'E': EVENT_TIME},
+                {'s': 'XRPUSDT'},
+            ],
+        })
+
+        ticks = decode_ticks(
+            message, allowed={'BTCUSDT', 'ETHUSDT', 'XRPUSDT'}
+        )
+
+        assert [(symbol, price) for symbol, price, _ in ticks] == [
+            ('BTCUSDT', '50000.00'), ('ETHUSDT', '3000.00')
+        ]
+        assert len(decode_ticks(message)) == 3
+
+    @pytest.mark.parametrize('message', [
+        'not json', '[]', '{"invalid": "format"}', '{"data": [1, null]}',
+    ])
+    def test_invalid_messages(self, message):
+        '''Тест: неверные кадры не дают тиков и не бросают исключений'''
+        assert decode_ticks(message) == []
+
+    @pytest.mark.parametrize('message, failed', [
+        ('not json', True),
+        ('[]', True),
+        ('{"data": [1, null]}', True),
+        ('{"data": {"s": "BTCUSDT", "c": "1.00"}}', True),
+        # Ответ на подписку и символы вне фильтра — не ошибки
+        ('{"result": null, "id": 1}', False),
+        ('{"data": {"s": "DOGEUSDT", "c": "0.10", "E": 1}}', False),
+    ])
+    def test_decode_failures(self, message, failed):
+        '''Тест: ошибкой разбора считается только неверный кадр'''
+        assert decode_frame(message, allowed={'BTCUSDT'}) == ([], failed)
+
+    def test_backends_agree(self):
+        '''Тест: все установленные JSON-библиотеки дают одинаковый результат'''
+        message = json.dumps({
+            'data': {'s': 'BTCUSDT', 'c': '50000.00', 'E': EVENT_TIME},
+        })
+        for name in ('json', 'orjson', 'msgspec'):
+            try:
+                _, loads = select_backend(name)
+            except ValueError:
+                continue
+            assert decode_ticks(message, loads=loads) == decode_ticks(message)
+
+    def test_materialize(self):
+        '''Тест построения datetime только для сбрасываемых цен'''
+        prices = materialize({'BTCUSDT': ('50000.00', EVENT_TIME)})
+
+        price, event_time = prices['BTCUSDT']
+        assert price == '50000.00'
+        assert event_time == event_datetime(EVENT_TIME)
+        assert event_time.isoformat() == '2025-06-01T00:00:00+00:00'
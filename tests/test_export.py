@@ -0,0 +1,103 @@
+import csv
+import gzip
+import io
+from datetime import timezone as dt_timezone
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from tickers.export import export_chunks, export_queryset
+from tickers.persistence import TickerWriter
+
+
+@pytest.mark.django_db
+@pytest.mark.filterwarnings('ignore:StreamingHttpResponse must consume')
+class TestTickerExport:
+    """Тесты для выгрузки истории цен в колоночных форматах"""
+    def setup_method(self):
+        '''Настройка клиента API и тестовой истории цен'''
+        self.client = APIClient()
+        self.url = reverse('tickerprice-export')
+        self.start = timezone.datetime(2025, 6, 1, tzinfo=dt_timezone.utc)
+        for second in range(5):
+            TickerWriter().write([
+                ('BTCUSDT', f'{50000 + second}.00', self.at(second)),
+                ('ETHUSDT', f'{3000 + second}.00', self.at(second)),
+            ])
+
+    def at(self, seconds):
+        '''Время через seconds секунд после начала истории'''
+        return self.start + timezone.timedelta(seconds=seconds)
+
+    def read_csv(self, content):
+        '''Строки распакованного CSV без заголовка'''
+        rows = list(csv.reader(io.StringIO(gzip.decompress(content).decode())))
+        assert rows[0] == ['symbol', 'event_time', 'price']
+        return rows[1:]
+
+    def test_csv_export(self):
+        '''Тест выгрузки CSV: фильтр символов и полуоткрытый диапазон'''
+        response = self.client.get(
+            f'{self.url}?symbols=btcusdt&start=2025-06-01T00:00:01'
+            f'&end=2025-06-01T00:00:04'
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'] == 'application/gzip'
+        assert 'tickers.csv.gz' in response['Content-Disposition']
+        rows = self.read_csv(b''.join(response))
+        assert [row[2] for row in rows] == [
+            '50001.00000000', '50002.00000000', '50003.00000000'
+        ]
+        assert rows[0][1] == self.at(1).isoformat()
+
+    def test_chunks_keep_order(self):
+        '''Тест выгрузки мелкими пачками без пропусков и повторов'''
+        content = b''.join(
+            export_chunks(export_queryset(), 'csv', chunk_size=3)
+        )
+        rows = self.read_csv(content)
+        assert len(rows) == 10
+        assert [row[1] for row in rows] == sorted(row[1] for row in rows)
+
+    def test_invalid_params(self):
+        '''Тест неизвестного формата и неверного времени'''
+        assert self.client.get(
+            f'{self.url}?type=xlsx'
+        ).status_code == status.HTTP_400_BAD_REQUEST
+        assert self.client.get(
+            f'{self.url}?start=yesterday'
+        ).status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_arrow_export(self):
+        '''Тест выгрузки потока Arrow IPC'''
+        pyarrow = pytest.importorskip('pyarrow')
+        import pyarrow.ipc
+
+        response = self.client.get(f'{self.url}?symbols=ETHUSDT&type=arrow')
+        assert response.status_code == status.HTTP_200_OK
+        table = pyarrow.ipc.open_stream(b''.join(response)).read_all()
+        assert table.column_names == ['symbol', 'event_time', 'price']
+        assert table.column('price').to_pylist() == [
+            Decimal(f'{3000 + second}.00') for second in range(5)
+        ]
+        assert table.column('event_time').to_pylist()[0] == self.at(0)
+
+    def test_parquet_command(self, tmp_path):
+        '''Тест команды export_history с выгрузкой в Parquet'''
+        pyarrow = pytest.importorskip('pyarrow')
+        import pyarrow.parquet
+
+        output = tmp_path / 'history.parquet'
+        call_command(
+            'export_history', '--symbols', 'btcusdt', '--format', 'parquet',
+            '--output', str(output), '--chunk-size', '2',
+            stdout=io.StringIO(),
+        )
+        parquet = pyarrow.parquet.ParquetFile(output)
+        assert parquet.metadata.num_row_groups == 3
+        assert parquet.read().column('symbol').to_pylist() == ['BTCUSDT'] * 5
@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+from channels.testing import WebsocketCommunicator
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from binance_ws.asgi import application
+from tickers import metrics
+from tickers.metrics import Counter, Gauge, Histogram, Registry
+
+
+class TestMetrics:
+    """Тесты для метрик в формате Prometheus"""
+    def test_render(self):
+        '''Тест текстового формата счетчика и гистограммы'''
+        registry = Registry()
+        frames = Counter('frames_total', 'Кадры', registry)
+        latency = Histogram(
+            'latency_seconds', 'Задержка', registry, buckets=(0.1, 1)
+        )
+        frames.inc()
+        frames.inc(2)
+        for value in (0.05, 0.1, 0.5, 5):
+            latency.observe(value)
+
+        lines = registry.render().splitlines()
+
+        assert '# TYPE frames_total counter' in lines
+        assert 'frames_total 3' in lines
+        assert 'latency_seconds_bucket{le="0.1"} 2' in lines
+        assert 'latency_seconds_bucket{le="1"} 3' in lines
+        assert 'latency_seconds_bucket{le="+Inf"} 4' in lines
+        assert 'latency_seconds_count 4' in lines
+
+    def test_gauge_function(self):
+        '''Тест: значение gauge с функцией читается при запросе метрик'''
+        registry = Registry()
+        depth = Gauge('queue_depth', 'Очередь', registry)
+        queue = [1, 2]
+        depth.set_function(lambda: len(queue))
+
+        assert 'queue_depth 2' in registry.render().splitlines()
+        queue.append(3)
+        assert 'queue_depth 3' in registry.render().splitlines()
+
+    async def test_listener_metrics_server(self):
+        '''Тест HTTP-сервера метрик слушателя'''
+        server = await metrics.start_metrics_server(
+            metrics.listener, 0, host='127.0.0.1'
+        )
+        port = server.sockets[0].getsockname()[1]
+        try:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(b'GET /metrics HTTP/1.1\r\nHost: localhost\r\n\r\n')
+            response = (await reader.read()).decode()
+            writer.close()
+        finally:
+            server.close()
+            await server.wait_closed()
+
+        assert response.startswith('HTTP/1.1 200 OK')
+        assert 'binance_frames_received_total' in response
+        assert 'binance_flush_duration_seconds_bucket' in response
+
+
+@pytest.mark.django_db
+class TestWebMetrics:
+    """Тесты для метрик веб-процесса"""
+    async def test_ws_connections(self):
+        '''Тест счетчика активных подключений TickerConsumer'''
+        before = metrics.WS_CONNECTIONS.value
+        communicator = WebsocketCommunicator(application, '/ws/tickers/')
+        await communicator.connect()
+        assert metrics.WS_CONNECTIONS.value == before + 1
+
+        await communicator.disconnect()
+        assert metrics.WS_CONNECTIONS.value == before
+
+    def test_metrics_view(self):
+        '''Тест эндпоинта /metrics/'''
+        response = APIClient().get(reverse('metrics'))
+
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('text/plain')
+        body = response.content.decode()
+        assert 'tickers_ws_connections' in body
+        assert 'tickers_ws_send_seconds_bucket' in body
@@ -1,32 +1,38 @@
 import pytest
+from decimal import Decimal
 from django.utils import timezone
 from datetime import timezone as dt_timezone
-from tickers.models import TickerPrice
+from tickers.models import Symbol, TickerPrice, units_to_price
 
 
 @pytest.mark.django_db
 class TestTickerPrice:
     """Тесты для модели TickerPrice"""
+    def setup_method(self):
+        '''Символы для тестовых цен'''
+        self.btc = Symbol.objects.create(name='BTCUSDT')
+        self.eth = Symbol.objects.create(name='ETHUSDT')
+
     def test_create_ticker(self):
         '''Тест создания новой цены тикера'''
         ticker = TickerPrice.objects.create(
-            symbol='BTCUSDT',
-            price='50000.00',
+            symbol=self.btc,
+            price_units=self.btc.to_units('50000.00'),
             event_time=timezone.now()
         )
-        assert ticker.symbol == 'BTCUSDT'
-        assert ticker.price == '50000.00'
-        assert ticker.received_at is not None
+        assert ticker.symbol.name == 'BTCUSDT'
+        assert ticker.price_units == 5000000000000
+        assert ticker.price == Decimal('50000.00')
 
     def test_ticker_str_representation(self):
         '''Тест строкового представления тикера'''
         now = timezone.now()
         ticker = TickerPrice.objects.create(
-            symbol='ETHUSDT',
-            price='3000.00',
+            symbol=self.eth,
+            price_units=self.eth.to_units('3000.00'),
             event_time=now
         )
-        expected_str = f'ETHUSDT: 3000.00 @ {now}'
+        expected_str = f'ETHUSDT: 3000.00000000 @ {now}'
         assert str(ticker) == expected_str
 
     def test_ticker_ordering(self):
@@ -36,13 +42,13 @@ class TestTickerPrice:
 
         # Создание тикеров с явным указанием временной зоны
         TickerPrice.objects.create(
-            symbol='BTCUSDT',
-            price='50000.00',
+            symbol=self.btc,
+            price_units=self.btc.to_units('50000.00'),
             event_time=now.replace(tzinfo=dt_timezone.utc)
         )
         TickerPrice.objects.create(
-            symbol='BTCUSDT',
-            price='49000.00',
+            symbol=self.btc,
+            price_units=self.btc.to_units('49000.00'),
             event_time=old_time.replace(tzinfo=dt_timezone.utc)
         )
 
@@ -53,3 +59,23 @@ class TestTickerPrice:
         assert (
             tickers[1].event_time == old_time.replace(tzinfo=dt_timezone.utc)
         )
+
+
+@pytest.mark.django_db
+class TestSymbol:
+    """Тесты для справочника символов и цен в целых единицах"""
+    def test_price_scale(self):
+        '''Тест перевода цены в единицы шага и обратно'''
+        symbol = Symbol.objects.create(name='BTCUSDT', price_scale=2)
+        assert symbol.to_units('50000.01000000') == 5000001
+        # Знаки мельче шага цены округляются
+        assert symbol.to_units('0.015') == 2
+        assert str(units_to_price(5000001, 2)) == '50000.01000000'
+
+    def test_default_scale_keeps_precision(self):
+        '''Тест: масштаб по умолчанию хранит 8 знаков, как DecimalField'''
+        symbol = Symbol.objects.create(name='SHIBUSDT')
+        assert symbol.to_units('0.00001234') == 1234
+        assert units_to_price(1234, symbol.price_scale) == Decimal(
+            '0.00001234'
+        )
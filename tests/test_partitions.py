@@ -0,0 +1,106 @@
+from datetime import datetime, timezone
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connection
+
+from tickers.partitions import (
+    PERIOD_DAY, PERIOD_MONTH, convert_to_partitioned, history_table,
+    next_period, parse_bounds, partition_name, period_start,
+)
+from tickers.persistence import TickerWriter
+
+postgresql_only = pytest.mark.skipif(
+    connection.vendor != 'postgresql', reason='Секционирование — PostgreSQL'
+)
+
+
+class TestPartitionHelpers:
+    """Тесты для расчета границ и имен секций истории цен"""
+    def test_period_start(self):
+        '''Тест начала месяца и дня для момента времени'''
+        moment = datetime(2025, 6, 12, 15, 30, tzinfo=timezone.utc)
+        assert period_start(moment, PERIOD_MONTH) == datetime(
+            2025, 6, 1, tzinfo=timezone.utc
+        )
+        assert period_start(moment, PERIOD_DAY) == datetime(
+            2025, 6, 12, tzinfo=timezone.utc
+        )
+
+    def test_next_period(self):
+        '''Тест перехода к следующему периоду, в том числе через год'''
+        december = datetime(2025, 12, 1, tzinfo=timezone.utc)
+        assert next_period(december, PERIOD_MONTH) == datetime(
+            2026, 1, 1, tzinfo=timezone.utc
+        )
+        assert next_period(december, PERIOD_DAY) == datetime(
+            2025, 12, 2, tzinfo=timezone.utc
+        )
+
+    def test_partition_name(self):
+        '''Тест имен месячных и дневных секций'''
+        start = datetime(2025, 6, 1, tzinfo=timezone.utc)
+        assert partition_name('prices', start, PERIOD_MONTH) == (
+            'prices_p202506'
+        )
+        assert partition_name('prices', start, PERIOD_DAY) == (
+            'prices_p20250601'
+        )
+
+    def test_parse_bounds(self):
+        '''Тест разбора границ секции из pg_get_expr'''
+        start, end = parse_bounds(
+            "FOR VALUES FROM ('2025-06-01 00:00:00+00') "
+            "TO ('2025-07-01 00:00:00+00')"
+        )
+        assert start == datetime(2025, 6, 1, tzinfo=timezone.utc)
+        assert end == datetime(2025, 7, 1, tzinfo=timezone.utc)
+        assert parse_bounds('DEFAULT') is None
+
+
+@postgresql_only
+@pytest.mark.django_db
+class TestConvertToPartitioned:
+    """Тесты для преобразования истории в секционированную таблицу"""
+    def test_constraints_are_kept(self):
+        '''Тест: ограничения сохраняют имена, а уникальность работает'''
+        moment = datetime(2025, 6, 12, tzinfo=timezone.utc)
+        TickerWriter().write([('BTCUSDT', '50000.00', moment)])
+        table = history_table()
+        with connection.cursor() as cursor:
+            # Отложенные проверки внешних ключей не дают удалить таблицу
+            # в той же транзакции, где в нее писали
+            cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+            convert_to_partitioned(cursor, table, PERIOD_MONTH, moment)
+            cursor.execute(
+                'SELECT conname, contype FROM pg_constraint '
+                'WHERE conrelid = %s::regclass ORDER BY conname',
+                [table],
+            )
+            constraints = dict(cursor.fetchall())
+            cursor.execute(
+                'SELECT indexname FROM pg_indexes '
+                "WHERE tablename = %s AND indexdef LIKE 'CREATE UNIQUE%%'",
+                [table],
+            )
+            unique_indexes = {name for name, in cursor.fetchall()}
+        assert constraints['tickers_price_symbol_time_uniq'] == 'u'
+        assert constraints[f'{table}_pkey'] == 'p'
+        assert 'f' in constraints.values()
+        # Индекс уникального ограничения не создан второй раз
+        assert unique_indexes == {
+            f'{table}_pkey', 'tickers_price_symbol_time_uniq'
+        }
+        assert TickerWriter().write([('BTCUSDT', '50000.00', moment)]) == 0
+
+
+@pytest.mark.django_db
+class TestTickerPartitionsCommand:
+    """Тесты для команды ticker_partitions"""
+    @pytest.mark.skipif(
+        connection.vendor == 'postgresql', reason='Проверка отказа на SQLite'
+    )
+    def test_requires_postgresql(self):
+        '''Тест: на SQLite команда секционирования недоступна'''
+        with pytest.raises(CommandError):
+            call_command('ticker_partitions', '--ahead', '1')
@@ -0,0 +1,230 @@
+import io
+from unittest.mock import patch
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from tickers.cache import VERSION_KEY, publish_version
+from tickers.models import Symbol, TickerCandle, TickerLatest, TickerPrice
+from tickers.persistence import TickerWriter
+
+
+@pytest.mark.django_db
+class TestTickerWriter:
+    """Тесты для пакетной записи цен тикеров"""
+    def make_rows(self, count):
+        '''Возвращает count строк (symbol, price, event_time)'''
+        now = timezone.now()
+        return [
+            (f'SYM{index}USDT', f'{index}.00', now)
+            for index in range(count)
+        ]
+
+    def test_write_rows(self):
+        '''Тест записи строк и подсчета записанных строк'''
+        written = TickerWriter().write(self.make_rows(3))
+        assert written == 3
+        assert TickerPrice.objects.count() == 3
+        assert Symbol.objects.count() == 3
+        assert not TickerLatest.objects.filter(
+            received_at__isnull=True
+        ).exists()
+
+    def test_symbols_cached_after_commit(
+        self, django_capture_on_commit_callbacks
+    ):
+        '''Тест: сохраненные символы не запрашиваются из БД повторно'''
+        writer = TickerWriter()
+        with django_capture_on_commit_callbacks(execute=True):
+            writer.write(self.make_rows(3))
+        with CaptureQueriesContext(connection) as queries:
+            writer.write(self.make_rows(3))
+        assert not any(
+            Symbol._meta.db_table in query['sql']
+            for query in queries.captured_queries
+        )
+        assert Symbol.objects.count() == 3
+
+    def test_write_empty(self):
+        '''Тест пустого сброса без обращения к БД'''
+        with CaptureQueriesContext(connection) as queries:
+            assert TickerWriter().write([]) == 0
+        assert len(queries) == 0
+
+    def test_constant_query_count(self):
+        '''Тест: число запросов не зависит от количества символов'''
+        writer = TickerWriter(batch_size=1000)
+        with CaptureQueriesContext(connection) as few:
+            writer.write(self.make_rows(5))
+        with CaptureQueriesContext(connection) as many:
+            writer.write(self.make_rows(30))
+        assert len(few) == len(many)
+        assert TickerPrice.objects.count() == 35
+
+    def test_batch_size(self):
+        '''Тест разбиения записи на пачки batch_size'''
+        writer = TickerWriter(batch_size=10)
+        with CaptureQueriesContext(connection) as single:
+            writer.write(self.make_rows(10))
+        with CaptureQueriesContext(connection) as triple:
+            writer.write(self.make_rows(30))
+        # Дополнительные пачки: по две для истории и последних цен,
+        # шесть для свечей трех интервалов
+        assert len(triple) == len(single) + 2 + 2 + 6
+
+    def test_upsert_latest(self):
+        '''Тест обновления последних цен в той же записи'''
+        now = timezone.now()
+        writer = TickerWriter()
+        writer.write([('BTCUSDT', '50000.00', now)])
+        writer.write([
+            ('BTCUSDT', '51000.00', now + timezone.timedelta(seconds=1)),
+            ('ETHUSDT', '3000.00', now),
+        ])
+
+        assert TickerLatest.objects.count() == 2
+        latest = TickerLatest.objects.get(symbol='BTCUSDT')
+        assert str(latest.price) == '51000.00000000'
+        assert latest.history_id == TickerPrice.objects.get(
+            symbol__name='BTCUSDT', price_units=5100000000000
+        ).id
+
+    def test_upsert_latest_ignores_older_prices(self):
+        '''Тест: более старая цена не перезаписывает последнюю'''
+        now = timezone.now()
+        writer = TickerWriter()
+        writer.write([('BTCUSDT', '51000.00', now)])
+        writer.write([
+            ('BTCUSDT', '50000.00', now - timezone.timedelta(minutes=1)),
+        ])
+
+        latest = TickerLatest.objects.get(symbol='BTCUSDT')
+        assert str(latest.price) == '51000.00000000'
+        assert TickerPrice.objects.count() == 2
+
+    def test_duplicates_are_skipped(self):
+        '''Тест: повторная запись тех же тиков не создает строк и свечей'''
+        now = timezone.now()
+        writer = TickerWriter()
+        assert writer.write([('BTCUSDT', '50000.00', now)]) == 1
+        assert writer.write([
+            ('BTCUSDT', '50000.00', now),
+            ('BTCUSDT', '50000.00', now),
+            ('BTCUSDT', '50001.00', now + timezone.timedelta(seconds=1)),
+        ]) == 1
+
+        assert TickerPrice.objects.count() == 2
+        latest = TickerLatest.objects.get(symbol='BTCUSDT')
+        assert latest.history_id == TickerPrice.objects.get(
+            price_units=5000100000000
+        ).id
+        candle = TickerCandle.objects.get(interval='1d')
+        assert candle.count == 2
+
+
+@pytest.mark.skipif(
+    connection.vendor != 'postgresql', reason='COPY — только PostgreSQL'
+)
+@pytest.mark.django_db
+class TestCopyWriter:
+    """Тесты для записи истории через COPY"""
+    def test_copy(self):
+        '''Тест: COPY пачками пишет историю и пропускает повторы'''
+        now = timezone.now()
+        rows = [
+            ('BTCUSDT', f'{50000 + index}.00',
+             now + timezone.timedelta(seconds=index))
+            for index in range(5)
+        ]
+        writer = TickerWriter(batch_size=2, use_copy=True)
+        with patch.object(TickerWriter, '_insert', side_effect=AssertionError):
+            assert writer.write(rows) == 5
+            assert writer.write(rows + [
+                ('BTCUSDT', '1.00', now + timezone.timedelta(seconds=5)),
+            ]) == 1
+
+        assert TickerPrice.objects.count() == 6
+        latest = TickerLatest.objects.get(symbol='BTCUSDT')
+        assert latest.history_id == TickerPrice.objects.get(
+            price_units=100000000
+        ).id
+        assert TickerCandle.objects.get(interval='1d').count == 6
+
+
+@pytest.mark.django_db(transaction=True)
+class TestDedupeHistory:
+    """Тесты для команды dedupe_history"""
+    def test_collapses_duplicates(self):
+        '''Тест: из повторов остается строка с наибольшим id'''
+        constraint = TickerPrice._meta.constraints[0]
+        # SQLite пересоздает таблицу по Meta модели, поэтому ограничение
+        # убирается и из Meta на время удаления
+        with patch.object(TickerPrice._meta, 'constraints', []):
+            with connection.schema_editor() as editor:
+                editor.remove_constraint(TickerPrice, constraint)
+        try:
+            now = timezone.now()
+            btc = Symbol.objects.create(name='BTCUSDT')
+            TickerPrice.objects.bulk_create([
+                TickerPrice(symbol=btc, price_units=index, event_time=now)
+                for index in range(5)
+            ] + [
+                TickerPrice(
+                    symbol=btc,
+                    price_units=10,
+                    event_time=now + timezone.timedelta(seconds=1),
+                ),
+            ])
+
+            call_command(
+                'dedupe_history', '--chunk-size', '2', stdout=io.StringIO()
+            )
+
+            assert sorted(
+                TickerPrice.objects.values_list('price_units', flat=True)
+            ) == [4, 10]
+        finally:
+            # Ограничение создается заново и проверяет отсутствие повторов
+            with connection.schema_editor() as editor:
+                editor.add_constraint(TickerPrice, constraint)
+
+
+class TestPublishVersion:
+    """Тесты для версии данных, общей для процессов слушателя"""
+    def setup_method(self):
+        '''Очистка кэша перед каждым тестом'''
+        cache.clear()
+
+    def test_interleaved_writers(self):
+        '''Тест: сброс между чтением и увеличением версии не теряется'''
+        get = cache.get
+        versions = []
+        interleaved = []
+
+        def interleaved_get(key, *args, **kwargs):
+            # Второй процесс публикует версию внутри чтения первого
+            previous = get(key, *args, **kwargs)
+            if not interleaved:
+                interleaved.append(True)
+                versions.append(publish_version())
+            return previous
+
+        # Сбросы в одну микросекунду
+        with patch('tickers.cache.time.time_ns', return_value=10 ** 15):
+            first = publish_version()
+            with patch.object(cache, 'get', interleaved_get):
+                versions.append(publish_version())
+        assert sorted(versions) == [first + 1, first + 2]
+        assert cache.get(VERSION_KEY) == first + 2
+
+    def test_lagging_clock_does_not_decrease(self):
+        '''Тест: процесс с отстающими часами все равно увеличивает версию'''
+        first = publish_version()
+        with patch('tickers.cache.time.time_ns', return_value=0):
+            second = publish_version()
+        assert second == first + 1
+        assert cache.get(VERSION_KEY) == second
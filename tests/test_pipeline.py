@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+from tickers.pipeline import (
+    OVERFLOW_BLOCK, OVERFLOW_DROP_NEWEST, OVERFLOW_DROP_OLDEST,
+    STREAMS_PER_SHARD, TickQueue, split_shards
+)
+
+
+class TestTickQueue:
+    """Тесты для очереди тиков между чтением WebSocket и сбросом в БД"""
+    async def test_drain_keeps_latest_tick(self):
+        '''Тест: при выгрузке остается последний тик каждого символа'''
+        queue = TickQueue(maxsize=10)
+        await queue.put(('BTCUSDT', '1.00', 1))
+        await queue.put(('ETHUSDT', '2.00', 1))
+        await queue.put(('BTCUSDT', '3.00', 2))
+
+        pending = queue.drain_into({})
+
+        assert pending == {'BTCUSDT': ('3.00', 2), 'ETHUSDT': ('2.00', 1)}
+        assert queue.depth == 0
+        assert queue.peak == 3
+
+    async def test_drop_oldest(self):
+        '''Тест отбрасывания самого старого тика при переполнении'''
+        queue = TickQueue(maxsize=2, overflow=OVERFLOW_DROP_OLDEST)
+        for index in range(3):
+            await queue.put((f'SYM{index}', '1.00', index))
+
+        assert queue.dropped == 1
+        assert set(queue.drain_into({})) == {'SYM1', 'SYM2'}
+
+    async def test_drop_newest(self):
+        '''Тест отбрасывания нового тика при переполнении'''
+        queue = TickQueue(maxsize=2, overflow=OVERFLOW_DROP_NEWEST)
+        for index in range(3):
+            await queue.put((f'SYM{index}', '1.00', index))
+
+        assert queue.dropped == 1
+        assert set(queue.drain_into({})) == {'SYM0', 'SYM1'}
+
+    async def test_block(self):
+        '''Тест ожидания свободного места при переполнении'''
+        queue = TickQueue(maxsize=1, overflow=OVERFLOW_BLOCK)
+        await queue.put(('SYM0', '1.00', 0))
+        put = asyncio.create_task(queue.put(('SYM1', '1.00', 1)))
+        await asyncio.sleep(0)
+        assert not put.done()
+
+        await queue.get()
+        await asyncio.wait_for(put, 1)
+        assert queue.dropped == 0
+        assert queue.depth == 1
+
+    def test_unknown_overflow(self):
+        '''Тест неизвестной политики переполнения'''
+        with pytest.raises(ValueError):
+            TickQueue(overflow='unknown')
+
+
+class TestSplitShards:
+    """Тесты для распределения символов по соединениям"""
+    def test_split_into_shards(self):
+        '''Тест: каждый символ попадает ровно в одну группу'''
+        symbols = [f'sym{index}' for index in range(7)]
+
+        shards = split_shards(symbols, 3)
+
+        assert [len(shard) for shard in shards] == [3, 2, 2]
+        assert sorted(sum(shards, [])) == sorted(symbols)
+
+    def test_automatic_shard_count(self):
+        '''Тест выбора количества групп по STREAMS_PER_SHARD'''
+        symbols = [f'sym{index}' for index in range(STREAMS_PER_SHARD + 1)]
+
+        assert len(split_shards(symbols)) == 2
+        assert len(split_shards(symbols[:1], 5)) == 1
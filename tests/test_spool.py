@@ -0,0 +1,147 @@
+import asyncio
+import pytest
+from decimal import Decimal
+from functools import partial
+from unittest.mock import patch
+
+from django.db import OperationalError
+
+from tickers.management.commands.binance_ws_listener import Command
+from tickers.models import TickerLatest, TickerPrice
+from tickers.persistence import TickerWriter
+from tickers.spool import RECORD, TickSpool
+
+EVENT_TIME = 1748736000000
+
+
+@pytest.mark.django_db
+class TestTickSpool:
+    """Тесты для локального спула цен на время недоступности БД"""
+    @pytest.fixture
+    def spool(self, tmp_path):
+        '''Возвращает пустой спул во временном каталоге'''
+        return TickSpool(str(tmp_path / 'ticks.spool'))
+
+    def test_append_and_read(self, spool):
+        '''Тест записи и чтения спула записями фиксированного размера'''
+        spool.append([
+            ('BTCUSDT', '50000.12345678', EVENT_TIME),
+            ('ETHUSDT', '3000.00', EVENT_TIME + 1),
+        ])
+
+        assert spool.size == 2 * RECORD.size
+        assert list(spool.read(chunk=1)) == [
+            [('BTCUSDT', Decimal('50000.12345678'), EVENT_TIME)],
+            [('ETHUSDT', Decimal('3000.00000000'), EVENT_TIME + 1)],
+        ]
+
+    def test_size_is_bounded(self, tmp_path):
+        '''Тест: строки сверх max_bytes отбрасываются'''
+        spool = TickSpool(
+            str(tmp_path / 'ticks.spool'), max_bytes=3 * RECORD.size
+        )
+
+        written = spool.append([
+            ('BTCUSDT', '1.00', EVENT_TIME + index) for index in range(5)
+        ])
+
+        assert written == 3
+        assert len(spool) == 3
+        assert spool.dropped == 2
+
+    def test_replay_chunk(self, spool):
+        '''Тест загрузки спула по частям с очисткой после последней'''
+        spool.append([
+            ('BTCUSDT', '50000.00', EVENT_TIME + index) for index in range(3)
+        ])
+
+        assert spool.replay_chunk(TickerWriter(), chunk=2) == 2
+        assert len(spool) == 3
+        assert spool.replay_chunk(TickerWriter(), chunk=2) == 1
+        assert spool.size == 0
+        assert TickerPrice.objects.count() == 3
+
+    def test_replay_is_idempotent(self, spool):
+        '''Тест: повторная загрузка спула не создает дубликатов'''
+        rows = [
+            ('BTCUSDT', '50000.00', EVENT_TIME + index) for index in range(3)
+        ]
+        spool.append(rows)
+        assert spool.replay(TickerWriter()) == 3
+        assert spool.size == 0
+
+        # Загрузка прервалась до очистки файла: строки уже есть в БД
+        spool.append(rows + [('BTCUSDT', '50001.00', EVENT_TIME + 3)])
+        assert spool.replay(TickerWriter()) == 1
+        assert TickerPrice.objects.count() == 4
+        assert TickerLatest.objects.get().price == Decimal('50001.00')
+
+
+@pytest.mark.django_db(transaction=True)
+class TestListenerSpool:
+    """Тесты записи сбросов в спул при недоступной БД"""
+    async def test_save_all_spools_and_replays(self, tmp_path):
+        '''Тест: сброс при недоступной БД попадает в спул и загружается'''
+        command = Command()
+        spool = TickSpool(str(tmp_path / 'ticks.spool'))
+        writer = TickerWriter()
+        prices = {'BTCUSDT': ('50000.00', EVENT_TIME)}
+
+        with patch.object(
+            TickerWriter, 'write', side_effect=OperationalError('down')
+        ):
+            await command.save_all(prices, writer, spool=spool)
+        assert len(spool) == 1
+
+        await command.save_all(
+            {'ETHUSDT': ('3000.00', EVENT_TIME + 1)}, writer, spool=spool
+        )
+        # Сброс не ждет загрузки спула, а только запускает ее
+        assert len(spool) == 1
+        assert command.spool_ready.is_set()
+
+        assert await command.replay_spool(spool, writer) == 1
+        assert spool.size == 0
+        assert await TickerPrice.objects.acount() == 2
+
+    async def test_replay_error_keeps_position(self, tmp_path):
+        '''Тест: ошибка БД прерывает загрузку спула, но не теряет строки'''
+        command = Command()
+        spool = TickSpool(str(tmp_path / 'ticks.spool'))
+        spool.append([
+            ('BTCUSDT', '50000.00', EVENT_TIME + index) for index in range(3)
+        ])
+        writer = TickerWriter()
+        write = TickerWriter.write
+
+        def fail_second(self, rows):
+            if spool.offset:
+                raise OperationalError('down')
+            return write(self, rows)
+
+        replay_chunk = partial(spool.replay_chunk, chunk=2)
+        with patch.object(TickerWriter, 'write', fail_second), \
+                patch.object(spool, 'replay_chunk', replay_chunk):
+            assert await command.replay_spool(spool, writer) == 2
+        assert len(spool) == 3
+
+        assert await command.replay_spool(spool, writer) == 1
+        assert spool.size == 0
+        assert await TickerPrice.objects.acount() == 3
+
+    async def test_spool_loop_replays_after_write(self, tmp_path):
+        '''Тест: фоновая загрузка спула начинается по сигналу сброса'''
+        command = Command()
+        spool = TickSpool(str(tmp_path / 'ticks.spool'))
+        spool.append([('BTCUSDT', '50000.00', EVENT_TIME)])
+        task = asyncio.create_task(command.spool_loop(spool, TickerWriter()))
+
+        command.spool_ready.set()
+        for _ in range(100):
+            if not spool.size:
+                break
+            await asyncio.sleep(0.01)
+        task.cancel()
+
+        assert spool.size == 0
+        assert await TickerPrice.objects.acount() == 1
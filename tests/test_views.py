@@ -1,4 +1,10 @@
+import json
 import pytest
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.db import connection
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 from datetime import timezone as dt_timezone
@@ -6,7 +12,17 @@ from rest_framework import status
 from rest_framework.test import APIClient
 from decimal import Decimal
 
-from tickers.models import TickerPrice
+from tickers.cache import (
+    VERSION_KEY, invalidate_snapshot, publish_snapshot, publish_version,
+)
+from tickers.candles import bucket_start, rebuild_candles
+from tickers.models import Symbol, TickerPrice
+from tickers.persistence import TickerWriter
+from tickers.times import parse_time
+from tickers.views import (
+    TickerPriceHistoryView, TickerPriceListView, ticker_history_view,
+    ticker_list_view, ticker_views,
+)
 
 
 @pytest.mark.django_db
@@ -17,64 +33,95 @@ class TestTickerPriceListView:
         self.client = APIClient()
         self.url = reverse('tickerprice-list')
         self.now = timezone.now()
-        # Очистка базы данных перед каждым тестом
+        # Очистка базы данных и кэша перед каждым тестом
         TickerPrice.objects.all().delete()
+        invalidate_snapshot()
 
     def test_list_tickers(self):
         '''Тест получения списка всех тикеров'''
-        TickerPrice.objects.create(
-            symbol='BTCUSDT',
-            price='50000.00',
-            event_time=self.now
-        )
-        TickerPrice.objects.create(
-            symbol='ETHUSDT',
-            price='3000.00',
-            event_time=self.now
-        )
+        TickerWriter().write([
+            ('BTCUSDT', '50000.00', self.now),
+            ('ETHUSDT', '3000.00', self.now),
+        ])
 
         response = self.client.get(self.url)
         assert response.status_code == status.HTTP_200_OK
-        assert len(response.data) == 2
+        assert len(response.json()) == 2
 
     def test_filter_by_symbol(self):
         '''Тест фильтрации тикеров по символу'''
-        TickerPrice.objects.create(
-            symbol='BTCUSDT',
-            price='50000.00',
-            event_time=self.now
-        )
-        TickerPrice.objects.create(
-            symbol='BTCUSDT',
-            price='51000.00',
-            event_time=self.now + timezone.timedelta(seconds=10)
-        )
-        TickerPrice.objects.create(
-            symbol='ETHUSDT',
-            price='3000.00',
-            event_time=self.now
-        )
+        TickerWriter().write([
+            ('BTCUSDT', '50000.00', self.now),
+            ('ETHUSDT', '3000.00', self.now),
+        ])
+        TickerWriter().write([
+            (
+                'BTCUSDT',
+                '51000.00',
+                self.now + timezone.timedelta(seconds=10)
+            ),
+        ])
 
         response = self.client.get(f"{self.url}?symbol=BTCUSDT")
         assert response.status_code == status.HTTP_200_OK
-        assert len(response.data) == 1
-        assert response.data[0]['symbol'] == 'BTCUSDT'
-        assert response.data[0]['price'] == '51000.00000000'
+        assert len(response.json()) == 1
+        assert response.json()[0]['symbol'] == 'BTCUSDT'
+        assert response.json()[0]['price'] == '51000.00000000'
+
+    def test_same_event_time_for_different_symbols(self):
+        '''Тест: общее время события не смешивает цены символов'''
+        TickerWriter().write([
+            ('BTCUSDT', '50000.00', self.now),
+            ('ETHUSDT', '3000.00', self.now),
+        ])
+
+        response = self.client.get(f"{self.url}?symbol=btcusdt")
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.json()) == 1
+        assert response.json()[0]['price'] == '50000.00000000'
+        assert response.json()[0]['id'] == TickerPrice.objects.get(
+            symbol__name='BTCUSDT'
+        ).id
+
+    def test_cache_hit_skips_database(self):
+        '''Тест: повторный запрос отдается из кэша без запросов к БД'''
+        TickerWriter().write([('BTCUSDT', '50000.00', self.now)])
+        first = self.client.get(self.url)
+
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.get(self.url)
+            by_symbol = self.client.get(f"{self.url}?symbol=BTCUSDT")
+        assert len(queries) == 0
+        assert second.content == first.content
+        assert by_symbol.json()[0]['symbol'] == 'BTCUSDT'
+
+    def test_publish_overwrites_snapshot(self):
+        '''Тест: публикация снимка после сброса обновляет ответ'''
+        TickerWriter().write([('BTCUSDT', '50000.00', self.now)])
+        self.client.get(self.url)
+        TickerWriter().write([
+            ('BTCUSDT', '51000.00', self.now + timezone.timedelta(seconds=1)),
+        ])
+        publish_snapshot()
+
+        response = self.client.get(f"{self.url}?symbol=BTCUSDT")
+        assert response.json()[0]['price'] == '51000.00000000'
+
+    def test_unknown_symbol(self):
+        '''Тест запроса неизвестного символа'''
+        response = self.client.get(f"{self.url}?symbol=UNKNOWN")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == []
 
     def test_filter_by_time_range(self):
         '''Тест фильтрации тикеров по диапазону времени'''
         # Создание тестовых данных с явной временной зоной
         now = timezone.now()
-        TickerPrice.objects.create(
-            symbol='BTCUSDT',
-            price=Decimal('50000.00'),
-            event_time=now.replace(tzinfo=dt_timezone.utc)
-        )
-        TickerPrice.objects.create(
-            symbol='ETHUSDT',
-            price=Decimal('3000.00'),
-            event_time=now.replace(tzinfo=dt_timezone.utc)
-        )
+        event_time = now.replace(tzinfo=dt_timezone.utc)
+        TickerWriter().write([
+            ('BTCUSDT', Decimal('50000.00'), event_time),
+            ('ETHUSDT', Decimal('3000.00'), event_time),
+        ])
 
         # Тест фильтрации по диапазону времени
         start_time = now.replace(tzinfo=dt_timezone.utc)
@@ -88,3 +135,388 @@ class TestTickerPriceListView:
         assert response.status_code == 200
         data = response.json()
         assert len(data) == 2  # Оба тикера должны быть включены
+
+
+@pytest.mark.django_db
+class TestTickerPriceHistoryView:
+    """Тесты для представления истории цен тикеров"""
+    def setup_method(self):
+        '''Настройка клиента API перед каждым тестом'''
+        self.client = APIClient()
+        self.url = reverse('tickerprice-history')
+        self.now = timezone.now()
+
+    def create_history(self, count, symbol='BTCUSDT'):
+        '''Создает count цен символа с шагом в секунду'''
+        TickerWriter().write([
+            (
+                symbol,
+                f'{50000 + index}.00',
+                self.now + timezone.timedelta(seconds=index)
+            )
+            for index in range(count)
+        ])
+
+    def test_history_default_page(self):
+        '''Тест истории без пагинации: одна страница без курсора'''
+        self.create_history(3)
+
+        response = self.client.get(self.url)
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert len(data) == 3
+        assert data[0]['price'] == 50002.0
+        assert 'X-Next-Cursor' not in response
+
+    def test_history_keyset_pages(self):
+        '''Тест обхода истории по курсорам без пропусков и повторов'''
+        self.create_history(5)
+        # Две цены с одинаковым временем события
+        TickerWriter().write([('ETHUSDT', '3000.00', self.now)])
+
+        ids = []
+        url = f'{self.url}?limit=2'
+        while url:
+            response = self.client.get(url)
+            assert response.status_code == status.HTTP_200_OK
+            assert len(response.json()) <= 2
+            ids.extend(row['id'] for row in response.json())
+            cursor = response.get('X-Next-Cursor')
+            url = f'{self.url}?limit=2&cursor={cursor}' if cursor else None
+
+        expected = list(
+            TickerPrice.objects.order_by('-event_time', '-id').values_list(
+                'id', flat=True
+            )
+        )
+        assert ids == expected
+
+    def test_history_link_header(self):
+        '''Тест заголовка Link со ссылкой на следующую страницу'''
+        self.create_history(3)
+
+        response = self.client.get(f'{self.url}?symbol=btcusdt&limit=2')
+        assert len(response.json()) == 2
+        assert 'rel="next"' in response['Link']
+        assert 'symbol=btcusdt' in response['Link']
+        assert response['X-Next-Cursor'] in response['Link']
+
+    def test_history_invalid_params(self):
+        '''Тест неверных параметров limit и cursor'''
+        assert self.client.get(
+            f'{self.url}?limit=abc'
+        ).status_code == status.HTTP_400_BAD_REQUEST
+        assert self.client.get(
+            f'{self.url}?limit=0'
+        ).status_code == status.HTTP_400_BAD_REQUEST
+        assert self.client.get(
+            f'{self.url}?cursor=broken'
+        ).status_code == status.HTTP_400_BAD_REQUEST
+
+    @pytest.mark.filterwarnings('ignore:StreamingHttpResponse must consume')
+    def test_history_stream(self):
+        '''Тест потоковой выдачи истории в формате NDJSON'''
+        self.create_history(3)
+        self.create_history(2, symbol='ETHUSDT')
+
+        response = self.client.get(f'{self.url}?symbol=BTCUSDT&stream=1')
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'] == 'application/x-ndjson'
+        lines = b''.join(response).decode().splitlines()
+        rows = [json.loads(line) for line in lines]
+        assert [row['price'] for row in rows] == [50002.0, 50001.0, 50000.0]
+
+
+@pytest.mark.django_db
+class TestConditionalGet:
+    """Тесты для ETag и ответов 304 по версии данных слушателя"""
+    def setup_method(self):
+        '''Настройка клиента API и очистка кэша'''
+        self.client = APIClient()
+        self.now = timezone.now()
+        cache.clear()
+        invalidate_snapshot()
+
+    def write(self, capture, price, seconds=0):
+        '''Сброс цены BTCUSDT с фиксацией транзакции'''
+        with capture(execute=True):
+            TickerWriter().write([(
+                'BTCUSDT',
+                price,
+                self.now + timezone.timedelta(seconds=seconds),
+            )])
+        invalidate_snapshot()
+
+    @pytest.mark.parametrize(
+        'url', ['tickerprice-list', 'tickerprice-history']
+    )
+    def test_not_modified_without_database(
+        self, url, django_capture_on_commit_callbacks,
+        django_assert_num_queries,
+    ):
+        '''Тест: повторный запрос с If-None-Match получает 304 без БД'''
+        self.write(django_capture_on_commit_callbacks, '50000.00')
+        first = self.client.get(reverse(url))
+        assert first.status_code == status.HTTP_200_OK
+        assert first['ETag'].startswith('W/"')
+        assert 'Last-Modified' in first
+
+        with django_assert_num_queries(0):
+            second = self.client.get(
+                reverse(url), HTTP_IF_NONE_MATCH=first['ETag']
+            )
+        assert second.status_code == status.HTTP_304_NOT_MODIFIED
+        assert second['ETag'] == first['ETag']
+
+    @pytest.mark.parametrize(
+        'url', ['tickerprice-list', 'tickerprice-history']
+    )
+    def test_flush_changes_etag(self, url, django_capture_on_commit_callbacks):
+        '''Тест: после сброса старый ETag больше не совпадает'''
+        self.write(django_capture_on_commit_callbacks, '50000.00')
+        first = self.client.get(reverse(url))
+        self.write(django_capture_on_commit_callbacks, '50001.00', 1)
+
+        second = self.client.get(
+            reverse(url), HTTP_IF_NONE_MATCH=first['ETag']
+        )
+        assert second.status_code == status.HTTP_200_OK
+        assert second['ETag'] != first['ETag']
+        assert second.json()[0]['price'] in (50001.0, '50001.00000000')
+
+    def test_repeated_ticks_keep_version(
+        self, django_capture_on_commit_callbacks
+    ):
+        '''Тест: сброс без новых строк не меняет версию данных'''
+        self.write(django_capture_on_commit_callbacks, '50000.00')
+        version = cache.get(VERSION_KEY)
+        self.write(django_capture_on_commit_callbacks, '50000.00')
+        assert cache.get(VERSION_KEY) == version
+
+
+@pytest.mark.django_db
+class TestAsyncViews:
+    """Тесты async-представлений списка и истории цен"""
+    def setup_method(self):
+        '''Фабрика запросов и история из двух символов'''
+        self.factory = RequestFactory()
+        self.now = timezone.now()
+        invalidate_snapshot()
+        TickerWriter().write([
+            (symbol, f'{1000 + index}.00', self.now + timezone.timedelta(
+                seconds=index
+            ))
+            for index in range(3)
+            for symbol in ('BTCUSDT', 'ETHUSDT')
+        ])
+
+    def responses(self, sync_view, async_view, query=''):
+        '''Ответы синхронного и async-представления на один запрос'''
+        request = self.factory.get(f'/api/tickers/{query}')
+        sync_response = sync_view(request)
+        # Снимок DRF отдает готовым HttpResponse, историю — Response
+        if hasattr(sync_response, 'render'):
+            sync_response.render()
+        return sync_response, async_to_sync(async_view)(request)
+
+    @pytest.mark.parametrize('query', ['', '?symbol=ethusdt', '?symbol=X'])
+    def test_list_matches_sync_view(self, query):
+        '''Тест: async-список отдает тот же ответ, что и view DRF'''
+        sync_response, async_response = self.responses(
+            TickerPriceListView.as_view(), ticker_list_view, query
+        )
+        assert async_response.status_code == status.HTTP_200_OK
+        assert async_response.content == sync_response.content
+        assert async_response['Content-Type'] == 'application/json'
+
+    @pytest.mark.parametrize('query', [
+        '', '?symbol=btcusdt', '?limit=2', '?limit=abc', '?cursor=broken',
+    ])
+    def test_history_matches_sync_view(self, query):
+        '''Тест: async-история отдает те же строки, курсор и ошибки'''
+        sync_response, async_response = self.responses(
+            TickerPriceHistoryView.as_view(), ticker_history_view, query
+        )
+        assert async_response.status_code == sync_response.status_code
+        assert async_response.content == sync_response.content
+        assert async_response.get('X-Next-Cursor') == sync_response.get(
+            'X-Next-Cursor'
+        )
+
+    def test_history_page_via_async_orm(self):
+        '''Тест: страница читается одним запросом в async-представлении'''
+        request = self.factory.get('/api/tickers/history/?limit=4')
+        with CaptureQueriesContext(connection) as queries:
+            response = async_to_sync(ticker_history_view)(request)
+        assert len(json.loads(response.content)) == 4
+        assert len(queries) == 1
+
+    def test_post_not_allowed(self):
+        '''Тест: async-представления принимают только GET и HEAD'''
+        request = self.factory.post('/api/tickers/')
+        response = async_to_sync(ticker_list_view)(request)
+        assert response.status_code == status.HTTP_405_METHOD_NOT_ALLOWED
+
+    def test_setting_selects_views(self):
+        '''Тест: TICKERS_ASYNC_VIEWS выбирает async или синхронные views'''
+        assert ticker_views() == (ticker_list_view, ticker_history_view)
+        with override_settings(TICKERS_ASYNC_VIEWS=False):
+            list_view, history_view = ticker_views()
+        assert list_view.view_class is TickerPriceListView
+        assert history_view.view_class is TickerPriceHistoryView
+
+
+@pytest.mark.django_db
+class TestTickerCandlesView:
+    """Тесты для представления свечей OHLC"""
+    def setup_method(self):
+        '''Настройка клиента API и тестовой истории цен'''
+        self.client = APIClient()
+        self.url = reverse('tickerprice-candles')
+        cache.clear()
+        self.start = timezone.datetime(2025, 6, 1, tzinfo=dt_timezone.utc)
+        # Семь цен с шагом 20 секунд: 3 + 3 + 1 в минутных свечах
+        TickerWriter().write([
+            (
+                'BTCUSDT',
+                f'{100 + index}.00',
+                self.start + timezone.timedelta(seconds=20 * index)
+            )
+            for index in range(7)
+        ])
+        TickerWriter().write([('ETHUSDT', '3000.00', self.start)])
+
+    def test_candles(self):
+        '''Тест подсчета свечей open/high/low/close/count'''
+        response = self.client.get(
+            f'{self.url}?symbol=btcusdt&interval=1m'
+            '&start=2025-06-01T00:00:00Z&end=2025-06-01T00:05:00Z'
+        )
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert [candle['count'] for candle in data] == [3, 3, 1]
+        first = data[0]
+        assert first['open_time'] == '2025-06-01T00:00:00Z'
+        assert first['close_time'] == '2025-06-01T00:01:00Z'
+        assert (first['open'], first['high']) == (100.0, 102.0)
+        assert (first['low'], first['close']) == (100.0, 102.0)
+        assert data[2]['open'] == data[2]['close'] == 106.0
+
+    def test_candles_larger_interval(self):
+        '''Тест объединения всех цен в одну пятиминутную свечу'''
+        response = self.client.get(
+            f'{self.url}?symbol=BTCUSDT&interval=5m'
+            '&start=2025-06-01T00:00:00Z&end=2025-06-01T00:05:00Z'
+        )
+        data = response.json()
+        assert len(data) == 1
+        assert data[0]['count'] == 7
+        assert (data[0]['open'], data[0]['close']) == (100.0, 106.0)
+
+    def test_closed_candles_are_cacheable(self):
+        '''Тест кэширования ответа с закрытыми свечами'''
+        url = (
+            f'{self.url}?symbol=BTCUSDT&interval=1h'
+            '&start=2025-06-01T00:00:00Z&end=2025-06-01T01:00:00Z'
+        )
+        response = self.client.get(url)
+        assert 'max-age' in response['Cache-Control']
+
+        with CaptureQueriesContext(connection) as queries:
+            cached = self.client.get(url)
+        assert len(queries) == 0
+        assert cached.json() == response.json()
+
+    def test_late_price_invalidates_cache(
+        self, django_capture_on_commit_callbacks
+    ):
+        '''Тест: цена в закрытом интервале сбрасывает кэш свечей'''
+        for interval in ('1h', '5m'):
+            url = (
+                f'{self.url}?symbol=BTCUSDT&interval={interval}'
+                '&start=2025-06-01T00:00:00Z&end=2025-06-01T01:00:00Z'
+            )
+            assert self.client.get(url).json()[0]['count'] == 7
+        with django_capture_on_commit_callbacks(execute=True):
+            TickerWriter().write([(
+                'BTCUSDT', '90.00', self.start + timezone.timedelta(seconds=1)
+            )])
+        for interval in ('1h', '5m'):
+            url = (
+                f'{self.url}?symbol=BTCUSDT&interval={interval}'
+                '&start=2025-06-01T00:00:00Z&end=2025-06-01T01:00:00Z'
+            )
+            candle = self.client.get(url).json()[0]
+            assert (candle['count'], candle['low']) == (8, 90.0)
+
+    def test_rebuild_invalidates_cache(self):
+        '''Тест: пересчет свечей сбрасывает их кэш'''
+        url = (
+            f'{self.url}?symbol=BTCUSDT&interval=1m'
+            '&start=2025-06-01T00:00:00Z&end=2025-06-01T00:05:00Z'
+        )
+        assert len(self.client.get(url).json()) == 3
+        # Цена, записанная в обход слушателя, без обновления свечей
+        TickerPrice.objects.create(
+            symbol=Symbol.objects.get(name='BTCUSDT'),
+            price_units=11000000000,
+            event_time=self.start + timezone.timedelta(minutes=4),
+        )
+        assert len(self.client.get(url).json()) == 3
+
+        rebuild_candles(
+            'BTCUSDT', '1m', self.start,
+            self.start + timezone.timedelta(minutes=5),
+        )
+        assert len(self.client.get(url).json()) == 4
+
+    def test_open_candle_is_not_cached(self):
+        '''Тест: ответ с открытой свечой не кэшируется'''
+        response = self.client.get(f'{self.url}?symbol=BTCUSDT')
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Cache-Control'] == 'no-cache'
+
+    def test_recent_candles_are_revalidated(self):
+        '''Тест: недавно закрытые свечи проверяются по версии данных'''
+        end = bucket_start(timezone.now(), '1m')
+        url = (
+            f'{self.url}?symbol=BTCUSDT&interval=1m'
+            f'&end={end.isoformat().replace("+00:00", "Z")}'
+        )
+        publish_version()
+        response = self.client.get(url)
+        assert response['Cache-Control'] == 'no-cache'
+        assert response.has_header('ETag')
+
+        cached = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        assert cached.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_candles_invalid_params(self):
+        '''Тест неверных параметров запроса свечей'''
+        for query in (
+            'interval=1m',
+            'symbol=BTCUSDT&interval=2m',
+            'symbol=BTCUSDT&start=2025-06-02T00:00:00Z'
+            '&end=2025-06-01T00:00:00Z',
+            'symbol=BTCUSDT&start=2020-01-01T00:00:00Z'
+            '&end=2025-06-01T00:00:00Z',
+        ):
+            response = self.client.get(f'{self.url}?{query}')
+            assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+class TestParseTime:
+    """Тесты для разбора времени параметров запросов и команд"""
+    def test_parse_time(self):
+        '''Тест: время без зоны считается UTC, зона сохраняется'''
+        assert parse_time('2025-06-01T00:00:00') == timezone.datetime(
+            2025, 6, 1, tzinfo=dt_timezone.utc
+        )
+        moment = parse_time('2025-06-01T03:00:00+03:00')
+        assert moment == timezone.datetime(2025, 6, 1, tzinfo=dt_timezone.utc)
+        assert moment.utcoffset() == timezone.timedelta(hours=3)
+
+    def test_invalid_time(self):
+        '''Тест: пустое и неверное время дают None'''
+        for value in (None, '', 'вчера', '2025-13-01T00:00:00'):
+            assert parse_time(value) is None
@@ -0,0 +1,130 @@
+"""
+Поиск пропусков в истории цен и их заполнение из внешнего источника.
+
+После (пере)подключения слушатель сравнивает время последней
+сохраненной цены каждого символа с текущим временем. Пропуски длиннее
+min_gap заполняются источником (по умолчанию REST API свечей Binance),
+а полученные цены записываются пачками через TickerWriter.
+Источник задается настройкой TICKERS_BACKFILL_SOURCE.
+"""
+import json
+import logging
+from datetime import timedelta
+from urllib.parse import urlencode
+from urllib.request import urlopen
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .candles import INTERVALS
+from .decoding import event_datetime
+from .models import TickerLatest
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BACKFILL_URL = 'https://api.binance.com'
+DEFAULT_MIN_GAP = 120  # seconds
+KLINES_LIMIT = 1000
+
+
+class KlinesSource:
+    """
+    Источник пропущенных цен: минутные свечи REST API Binance.
+    Каждая свеча дает одну цену — цену закрытия на момент закрытия
+    свечи. base_url можно заменить на локальный сервер в тестах.
+    """
+
+    def __init__(
+        self, base_url=DEFAULT_BACKFILL_URL, interval='1m', timeout=10
+    ):
+        self.base_url = base_url.rstrip('/')
+        self.interval = interval
+        self.timeout = timeout
+
+    def fetch(self, symbol, start, end):
+        """
+        Возвращает строки (symbol, price, event_time) с event_time
+        в интервале (start, end), в порядке времени.
+        """
+        after_ms = int(start.timestamp() * 1000)
+        end_ms = int(end.timestamp() * 1000) - 1
+        # Свеча, открытая до start, закрывается уже внутри пропуска
+        start_ms = after_ms - INTERVALS[self.interval] * 1000 + 1
+        rows = []
+        while start_ms <= end_ms:
+            klines = self.request(symbol, start_ms, end_ms)
+            for kline in klines:
+                close_time = int(kline[6])
+                if after_ms < close_time <= end_ms:
+                    rows.append(
+                        (symbol, kline[4], event_datetime(close_time))
+                    )
+            if len(klines) < KLINES_LIMIT:
+                break
+            start_ms = int(klines[-1][0]) + 1
+        return rows
+
+    def request(self, symbol, start_ms, end_ms):
+        query = urlencode({
+            'symbol': symbol,
+            'interval': self.interval,
+            'startTime': start_ms,
+            'endTime': end_ms,
+            'limit': KLINES_LIMIT,
+        })
+        url = f'{self.base_url}/api/v3/klines?{query}'
+        with urlopen(url, timeout=self.timeout) as response:
+            return json.loads(response.read())
+
+
+def get_source(base_url=None):
+    """Источник из настройки TICKERS_BACKFILL_SOURCE"""
+    source_class = import_string(settings.TICKERS_BACKFILL_SOURCE)
+    if base_url:
+        return source_class(base_url=base_url)
+    return source_class()
+
+
+def find_gaps(symbols, until, min_gap=DEFAULT_MIN_GAP):
+    """
+    Возвращает пропуски {symbol: start}: символы, последняя сохраненная
+    цена которых старше until больше чем на min_gap секунд.
+    symbols=None — все символы, для которых уже есть цены.
+    """
+    latest = TickerLatest.objects.filter(
+        event_time__lt=until - timedelta(seconds=min_gap)
+    )
+    if symbols is not None:
+        latest = latest.filter(symbol__in=symbols)
+    return dict(latest.values_list('symbol', 'event_time'))
+
+
+class Backfiller:
+    """Заполняет пропуски группы символов после подключения к потоку"""
+
+    def __init__(self, source, writer, symbols=None, min_gap=DEFAULT_MIN_GAP):
+        self.source = source
+        self.writer = writer
+        self.symbols = (
+            None if symbols is None
+            else [symbol.upper() for symbol in symbols]
+        )
+        self.min_gap = min_gap
+
+    def fill(self, until=None):
+        """
+        Заполняет пропуски до until (по умолчанию — сейчас).
+        Возвращает количество записанных строк.
+        """
+        until = until or timezone.now()
+        written = 0
+        gaps = find_gaps(self.symbols, until, self.min_gap)
+        for symbol, start in gaps.items():
+            try:
+                rows = self.source.fetch(symbol, start, until)
+            except Exception:
+                logger.exception('Не удалось получить пропуск %s', symbol)
+                continue
+            written += self.writer.write(rows)
+        return written
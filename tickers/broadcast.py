@@ -0,0 +1,97 @@
+import asyncio
+import json
+import logging
+import time
+
+from . import metrics
+from .decoding import materialize
+from .groups import WILDCARD_GROUP, symbol_group
+
+logger = logging.getLogger(__name__)
+
+# Сколько group_send одного сброса выполняется одновременно
+GROUP_SEND_CONCURRENCY = 100
+
+
+def ticker_frame(symbol, price, event_time):
+    """JSON-текст обновления тикера в формате, который получает клиент"""
+    return json.dumps({
+        'symbol': symbol,
+        'price': price,
+        'event_time': event_time.isoformat(),
+    })
+
+
+async def publish_prices(channel_layer, prices):
+    """
+    Рассылает словарь symbol -> (price, event_time) подписчикам.
+    Каждое обновление кодируется в JSON один раз за сброс: группа всех
+    символов получает одно сообщение со всеми кадрами, группа символа —
+    только его кадр. Consumer отправляет кадры клиентам как есть.
+    Слой каналов не сообщает, в каких группах есть подписчики, поэтому
+    сообщения групп отправляются одновременно, пачками
+    по GROUP_SEND_CONCURRENCY: сброс ждет не сумму обращений к Redis,
+    а несколько их волн.
+    """
+    frames = {
+        symbol: ticker_frame(symbol, price, event_time)
+        for symbol, (price, event_time) in prices.items()
+    }
+    if not frames:
+        return frames
+    messages = [(WILDCARD_GROUP, frames)] + [
+        (symbol_group(symbol), {symbol: frame})
+        for symbol, frame in frames.items()
+    ]
+    for start in range(0, len(messages), GROUP_SEND_CONCURRENCY):
+        await asyncio.gather(*(
+            channel_layer.group_send(
+                group, {'type': 'send_frames', 'frames': group_frames}
+            )
+            for group, group_frames in messages[
+                start:start + GROUP_SEND_CONCURRENCY
+            ]
+        ))
+    now = time.time()
+    for _, event_time in prices.values():
+        metrics.BROADCAST_LATENCY.observe(now - event_time.timestamp())
+    return frames
+
+
+class LiveBroadcaster:
+    """
+    Рассылает тики подписчикам сразу после разбора, независимо от
+    сброса в БД. Между рассылками проходит не меньше interval секунд;
+    тики, пришедшие за это время, объединяются по символу, поэтому
+    каждый символ обновляется не чаще раза в interval.
+    При interval=0 рассылается каждый тик, пока слой каналов успевает.
+    """
+
+    def __init__(self, channel_layer, interval=0):
+        self.channel_layer = channel_layer
+        self.interval = interval
+        self.pending = {}  # symbol -> (price, event_time_ms)
+        self.wakeup = asyncio.Event()
+
+    def offer(self, symbol, price, event_time):
+        """
+        Запоминает последний тик символа для ближайшей рассылки;
+        event_time — время события в миллисекундах, как в кадре Binance.
+        """
+        self.pending[symbol] = (price, event_time)
+        self.wakeup.set()
+
+    async def run(self):
+        """Рассылает накопленные тики, пока задачу не отменят"""
+        while True:
+            await self.wakeup.wait()
+            self.wakeup.clear()
+            prices, self.pending = self.pending, {}
+            try:
+                await publish_prices(
+                    self.channel_layer, materialize(prices)
+                )
+            except Exception:
+                logger.exception('Не удалось разослать обновления цен')
+            if self.interval:
+                await asyncio.sleep(self.interval)
@@ -0,0 +1,198 @@
+import logging
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.renderers import JSONRenderer
+
+from .models import TickerLatest
+from .serializers import TickerLatestSerializer
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_KEY = 'tickers:latest'
+VERSION_KEY = 'tickers:version'
+CANDLES_KEY = 'tickers:candles'
+
+# Локальный уровень кэша процесса: (время истечения, снимок)
+_local = (0.0, None)
+# Версия данных в памяти процесса для async-представлений:
+# (время истечения, версия)
+_local_version = (0.0, None)
+
+
+def publish_version():
+    """
+    Увеличивает версию данных после записи в БД и возвращает ее.
+    Версия — время записи в микросекундах Unix. Она растет атомарным
+    cache.incr не меньше чем на 1, поэтому одновременные сбросы
+    нескольких процессов получают разные версии, а процесс с отстающими
+    часами не уменьшает ее; при одновременных сбросах версия может
+    немного опередить часы. Если ключ в Redis потерян, версия снова
+    берется из часов и остается больше прежних.
+    """
+    now = time.time_ns() // 1000
+    try:
+        while not cache.add(VERSION_KEY, now, None):
+            previous = cache.get(VERSION_KEY)
+            if previous is None:
+                # Ключ удален между add и get
+                continue
+            try:
+                return cache.incr(VERSION_KEY, max(now - previous, 1))
+            except ValueError:
+                continue
+    except Exception:
+        logger.exception('Не удалось сохранить версию данных в кэш')
+        return None
+    return now
+
+
+def get_version():
+    """Текущая версия данных; None, если она неизвестна"""
+    try:
+        return cache.get(VERSION_KEY)
+    except Exception:
+        logger.exception('Не удалось прочитать версию данных из кэша')
+        return None
+
+
+async def aget_version():
+    """
+    Асинхронный get_version. Как и снимок, версия хранится в памяти
+    процесса TICKERS_CACHE_LOCAL_TTL секунд и в это время читается
+    без перехода в поток кэша.
+    """
+    global _local_version
+    expires, version = _local_version
+    if version is not None and time.monotonic() < expires:
+        return version
+    try:
+        version = await cache.aget(VERSION_KEY)
+    except Exception:
+        logger.exception('Не удалось прочитать версию данных из кэша')
+        return None
+    _local_version = (
+        time.monotonic() + settings.TICKERS_CACHE_LOCAL_TTL, version
+    )
+    return version
+
+
+def build_snapshot():
+    """
+    Собирает снимок последних цен из TickerLatest.
+    Ответы сериализуются заранее: весь список и отдельно каждый символ.
+    Версия читается до чтения БД: если запись произойдет во время
+    сборки, снимок получит старую версию и клиенты запросят его снова.
+    """
+    version = get_version()
+    data = TickerLatestSerializer(
+        TickerLatest.objects.order_by('-event_time'), many=True
+    ).data
+    renderer = JSONRenderer()
+    return {
+        'version': version,
+        'all': renderer.render(data),
+        'symbols': {
+            item['symbol']: renderer.render([item]) for item in data
+        },
+    }
+
+
+def _store_local(snapshot):
+    global _local
+    _local = (time.monotonic() + settings.TICKERS_CACHE_LOCAL_TTL, snapshot)
+
+
+def publish_snapshot(overwrite=True):
+    """
+    Пересобирает снимок и сохраняет его в Redis и в памяти процесса.
+    При overwrite=False снимок в Redis не перезаписывается, чтобы
+    промах в веб-процессе не затер более свежий снимок слушателя.
+    """
+    snapshot = build_snapshot()
+    store = cache.set if overwrite else cache.add
+    try:
+        store(SNAPSHOT_KEY, snapshot, settings.TICKERS_CACHE_TTL)
+    except Exception:
+        logger.exception('Не удалось сохранить снимок цен в кэш')
+    _store_local(snapshot)
+    return snapshot
+
+
+def get_snapshot():
+    """
+    Возвращает снимок последних цен: из памяти процесса, затем из Redis,
+    а при промахе собирает его из БД и сохраняет в кэш.
+    """
+    expires, snapshot = _local
+    if snapshot is not None and time.monotonic() < expires:
+        return snapshot
+    try:
+        snapshot = cache.get(SNAPSHOT_KEY)
+    except Exception:
+        logger.exception('Не удалось прочитать снимок цен из кэша')
+        snapshot = None
+    if snapshot is None:
+        return publish_snapshot(overwrite=False)
+    _store_local(snapshot)
+    return snapshot
+
+
+async def aget_snapshot():
+    """
+    Асинхронный get_snapshot: снимок из памяти процесса отдается прямо
+    в цикле событий, в поток уходит только чтение Redis и сборка из БД.
+    """
+    expires, snapshot = _local
+    if snapshot is not None and time.monotonic() < expires:
+        return snapshot
+    return await sync_to_async(get_snapshot)()
+
+
+def invalidate_snapshot():
+    """Удаляет снимок из Redis, снимок и версию из памяти процесса"""
+    global _local, _local_version
+    _local = (0.0, None)
+    _local_version = (0.0, None)
+    cache.delete(SNAPSHOT_KEY)
+
+
+def candles_generation_key(symbol, interval):
+    return f'{CANDLES_KEY}:generation:{symbol}:{interval}'
+
+
+def candles_cache_key(symbol, interval, start, end):
+    """
+    Ключ кэша закрытых свечей symbol за [start, end). В ключ входит
+    поколение свечей символа и интервала: после invalidate_candles
+    прежние ответы больше не читаются и истекают по TTL.
+    """
+    generation = cache.get(candles_generation_key(symbol, interval), 0)
+    return (
+        f'{CANDLES_KEY}:{symbol}:{interval}:{generation}:'
+        f'{int(start.timestamp())}:{int(end.timestamp())}'
+    )
+
+
+def invalidate_candles(pairs):
+    """
+    Сбрасывает кэш закрытых свечей пар (symbol, interval), у которых
+    изменилась история: запоздавшие цены, дозагрузка, пересчет.
+    Новое поколение — время в наносекундах, одно на весь вызов,
+    поэтому пары записываются одним set_many.
+    """
+    if not pairs:
+        return
+    generation = time.time_ns()
+    try:
+        cache.set_many(
+            {
+                candles_generation_key(symbol, interval): generation
+                for symbol, interval in pairs
+            },
+            None,
+        )
+    except Exception:
+        logger.exception('Не удалось сбросить кэш свечей')
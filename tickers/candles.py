@@ -0,0 +1,202 @@
+from datetime import datetime, timedelta, timezone
+
+from django.db.models import (
+    BigIntegerField, Count, F, Func, Max, Min, RowRange, Window
+)
+from django.db import transaction
+from django.db.models.functions import FirstValue, LastValue, RowNumber
+from django.utils import timezone as django_timezone
+
+from .cache import invalidate_candles
+from .models import Symbol, TickerCandle, TickerPrice, units_to_price
+
+# Длительность интервалов свечей, в секундах
+INTERVALS = {
+    '1m': 60,
+    '5m': 5 * 60,
+    '1h': 60 * 60,
+    '1d': 24 * 60 * 60,
+}
+
+# Интервалы, для которых слушатель поддерживает готовые свечи TickerCandle
+ROLLUP_INTERVALS = ('1m', '1h', '1d')
+
+CANDLE_FIELDS = (
+    'open_time', 'open', 'high', 'low', 'close', 'count',
+    'first_event_time', 'last_event_time',
+)
+
+DEFAULT_CANDLES = 500
+MAX_CANDLES = 1500
+REBUILD_CHUNK = 1000
+
+
+class EpochBucket(Func):
+    """
+    Начало интервала, в который попадает время, в секундах Unix:
+    floor(epoch / seconds) * seconds.
+    """
+    output_field = BigIntegerField()
+
+    def __init__(self, expression, seconds, **extra):
+        super().__init__(expression, seconds=int(seconds), **extra)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        return super().as_sql(
+            compiler,
+            connection,
+            template=(
+                'CAST(FLOOR(EXTRACT(EPOCH FROM %(expressions)s) '
+                '/ %(seconds)s) * %(seconds)s AS BIGINT)'
+            ),
+            **extra_context,
+        )
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return super().as_sql(
+            compiler,
+            connection,
+            template=(
+                "(CAST(STRFTIME('%%%%s', %(expressions)s) AS INTEGER) "
+                "/ %(seconds)s) * %(seconds)s"
+            ),
+            **extra_context,
+        )
+
+
+def bucket_start(moment, interval):
+    """Начало интервала interval, в который попадает moment"""
+    seconds = INTERVALS[interval]
+    epoch = int(moment.timestamp()) // seconds * seconds
+    return datetime.fromtimestamp(epoch, tz=timezone.utc)
+
+
+def bucket_end(moment, interval):
+    """Ближайшая к moment граница интервала, не раньше moment"""
+    start = bucket_start(moment, interval)
+    if start == moment:
+        return start
+    return start + timedelta(seconds=INTERVALS[interval])
+
+
+def aggregate_candles(symbol, interval, start, end):
+    """
+    Считает свечи open/high/low/close/count по истории цен symbol
+    в диапазоне [start, end) на стороне БД.
+    Размер результата пропорционален количеству интервалов,
+    а не количеству строк истории.
+    """
+    scale = Symbol.objects.filter(name=symbol).values_list(
+        'price_scale', flat=True
+    ).first()
+    if scale is None:
+        return []
+    seconds = INTERVALS[interval]
+    bucket = [F('bucket')]
+    in_order = [F('event_time').asc(), F('id').asc()]
+    queryset = TickerPrice.objects.filter(
+        symbol__name=symbol, event_time__gte=start, event_time__lt=end
+    ).annotate(
+        bucket=EpochBucket('event_time', seconds),
+    ).annotate(
+        row_number=Window(
+            RowNumber(), partition_by=bucket, order_by=in_order
+        ),
+        open=Window(
+            FirstValue('price_units'), partition_by=bucket, order_by=in_order
+        ),
+        # Рамка на весь интервал, чтобы last_value видел последнюю строку
+        close=Window(
+            LastValue('price_units'),
+            partition_by=bucket,
+            order_by=in_order,
+            frame=RowRange(start=None, end=None),
+        ),
+        high=Window(Max('price_units'), partition_by=bucket),
+        low=Window(Min('price_units'), partition_by=bucket),
+        count=Window(Count('id'), partition_by=bucket),
+        first_event_time=Window(Min('event_time'), partition_by=bucket),
+        last_event_time=Window(Max('event_time'), partition_by=bucket),
+    ).filter(row_number=1).order_by('bucket').values(
+        'bucket', 'open', 'high', 'low', 'close', 'count',
+        'first_event_time', 'last_event_time',
+    )
+    candles = []
+    for row in queryset:
+        for field in ('open', 'high', 'low', 'close'):
+            row[field] = units_to_price(row[field], scale)
+        candles.append({
+            'open_time': datetime.fromtimestamp(
+                row.pop('bucket'), tz=timezone.utc
+            ),
+            **row,
+        })
+    return candles
+
+
+def build_candles(symbol, interval, start, end):
+    """
+    Возвращает свечи symbol в диапазоне [start, end) для ответа API.
+    Интервалы ROLLUP_INTERVALS читаются из готовых свечей TickerCandle,
+    остальные считаются по истории цен.
+    """
+    step = timedelta(seconds=INTERVALS[interval])
+    if interval in ROLLUP_INTERVALS:
+        rows = TickerCandle.objects.filter(
+            symbol=symbol,
+            interval=interval,
+            open_time__gte=start,
+            open_time__lt=end,
+        ).order_by('open_time').values(*CANDLE_FIELDS)
+    else:
+        rows = aggregate_candles(symbol, interval, start, end)
+    return [
+        {
+            'open_time': row['open_time'],
+            'close_time': row['open_time'] + step,
+            'open': row['open'],
+            'high': row['high'],
+            'low': row['low'],
+            'close': row['close'],
+            'count': row['count'],
+        }
+        for row in rows
+    ]
+
+
+def rebuild_candles(symbol, interval, start, end):
+    """
+    Пересчитывает свечи TickerCandle symbol в диапазоне [start, end)
+    по истории цен. Возвращает количество записанных свечей.
+    Диапазон обрабатывается частями по REBUILD_CHUNK интервалов,
+    каждая часть — в своей транзакции. Кэш закрытых свечей symbol
+    после пересчета сбрасывается.
+    """
+    step = timedelta(seconds=INTERVALS[interval])
+    start = bucket_start(start, interval)
+    end = bucket_end(end, interval)
+    closed_before = bucket_start(django_timezone.now(), interval)
+    written = 0
+    while start < end:
+        chunk_end = min(start + step * REBUILD_CHUNK, end)
+        candles = aggregate_candles(symbol, interval, start, chunk_end)
+        with transaction.atomic():
+            TickerCandle.objects.filter(
+                symbol=symbol,
+                interval=interval,
+                open_time__gte=start,
+                open_time__lt=chunk_end,
+            ).delete()
+            TickerCandle.objects.bulk_create([
+                TickerCandle(
+                    symbol=symbol,
+                    interval=interval,
+                    closed=candle['open_time'] < closed_before,
+                    **candle,
+                )
+                for candle in candles
+            ])
+        written += len(candles)
+        start = chunk_end
+    invalidate_candles({(symbol, interval)})
+    return written
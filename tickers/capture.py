@@ -0,0 +1,115 @@
+"""
+Запись сырых кадров потока в файл и чтение их для воспроизведения.
+
+Файл — последовательность gzip-блоков, внутри — записи: время
+получения в наносекундах, длина кадра и сам кадр в UTF-8. Запись
+завершает блок раз в FLUSH_INTERVAL секунд, поэтому после аварийной
+остановки недописанным остается только последний блок: при чтении
+он обрывается на последней целой записи, а при следующей дозаписи
+отрезается, чтобы новые кадры не оказались за поврежденным блоком.
+"""
+import gzip
+import logging
+import os
+import struct
+import time
+import zlib
+
+logger = logging.getLogger(__name__)
+
+HEADER = struct.Struct('<qI')
+
+# Как часто завершается gzip-блок, в секундах
+FLUSH_INTERVAL = 1
+# Размер чтения при проверке блоков файла
+SCAN_CHUNK = 1024 * 1024
+
+
+class CaptureWriter:
+    """Дописывает кадры с временем получения в сжатый файл"""
+
+    def __init__(self, path, flush_interval=FLUSH_INTERVAL):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.frames = 0
+        if os.path.exists(path):
+            self._truncate_incomplete()
+        self._raw = open(path, 'ab')
+        self._file = gzip.GzipFile(fileobj=self._raw, mode='ab')
+        self._flushed_at = time.monotonic()
+
+    def _truncate_incomplete(self):
+        """Отрезает недописанный gzip-блок в конце файла"""
+        size = complete_size(self.path)
+        if size < os.path.getsize(self.path):
+            logger.warning(
+                'Недописанный блок в конце %s отрезан с позиции %d',
+                self.path, size,
+            )
+            os.truncate(self.path, size)
+
+    def write(self, frame, received_at=None):
+        if isinstance(frame, str):
+            frame = frame.encode()
+        if received_at is None:
+            received_at = time.time_ns()
+        self._file.write(HEADER.pack(received_at, len(frame)) + frame)
+        self.frames += 1
+        now = time.monotonic()
+        if now - self._flushed_at >= self.flush_interval:
+            self._file.close()
+            self._raw.flush()
+            self._file = gzip.GzipFile(fileobj=self._raw, mode='ab')
+            self._flushed_at = now
+
+    def close(self):
+        self._file.close()
+        self._raw.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def complete_size(path):
+    """
+    Размер начала файла path, состоящего из целых gzip-блоков.
+    Блоки распаковываются без сохранения результата.
+    """
+    complete = 0
+    decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+    with open(path, 'rb') as capture:
+        offset = 0
+        while chunk := capture.read(SCAN_CHUNK):
+            while chunk:
+                try:
+                    decompressor.decompress(chunk)
+                except zlib.error:
+                    return complete
+                if not decompressor.eof:
+                    offset += len(chunk)
+                    break
+                offset += len(chunk) - len(decompressor.unused_data)
+                complete = offset
+                chunk = decompressor.unused_data
+                decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+    return complete
+
+
+def read_capture(path):
+    """Итерирует (received_at_ns, frame) из файла записи"""
+    with gzip.open(path, 'rb') as capture:
+        while True:
+            try:
+                header = capture.read(HEADER.size)
+                if len(header) < HEADER.size:
+                    return
+                received_at, length = HEADER.unpack(header)
+                frame = capture.read(length)
+            except (EOFError, zlib.error, gzip.BadGzipFile):
+                return
+            if len(frame) < length:
+                return
+            yield received_at, frame.decode()
@@ -1,25 +1,219 @@
+import asyncio
 import json
+import time
+from urllib.parse import parse_qs
+
 from channels.generic.websocket import AsyncWebsocketConsumer
+from django.conf import settings
+
+from . import metrics
+from .groups import WILDCARD, normalize_symbol, symbol_group
+
+# Код закрытия соединения с клиентом, который не успевает за обновлениями
+SLOW_CONSUMER_CLOSE_CODE = 4008
 
 
 class TickerConsumer(AsyncWebsocketConsumer):
     """
     WebSocket Consumer для обновлений тикеров.
-    Подключается к группе 'tickers' и отправляет обновления тикеров
-    всем подключенным клиентам.
+    Клиент подписывается на отдельные символы (группы 'tickers.<SYMBOL>')
+    сообщениями subscribe/unsubscribe или параметром ?symbols=.
+    Без явной подписки клиент получает все символы из группы 'tickers'.
+
+    Протокол:
+        {"action": "subscribe", "symbols": ["BTCUSDT", "ETHUSDT"]}
+        {"action": "unsubscribe", "symbols": ["ETHUSDT"]}
+    Символ "*" означает подписку на все символы; она заменяет подписки
+    на отдельные символы и наоборот. В ответ отправляется
+    {"type": "subscriptions", "symbols": [...]} или
+    {"type": "error", "message": "..."}.
+
+    Обновления отправляются через буфер с объединением по символу
+    и ограничением скорости (TICKERS_WS_MAX_SEND_RATE); клиент,
+    у которого кадр ждет отправки дольше TICKERS_WS_MAX_LAG секунд,
+    отключается. Подписок не больше TICKERS_WS_MAX_SUBSCRIPTIONS.
     """
     async def connect(self):
         """Подключение к WebSocket"""
-        await self.channel_layer.group_add("tickers", self.channel_name)
+        self.subscriptions = set()
+        self.loop = asyncio.get_running_loop()
+        # Исходящий буфер: symbol -> последний неотправленный кадр
+        self.pending = {}
+        # symbol -> время, с которого символ ждет отправки
+        self.pending_since = {}
+        self.wakeup = asyncio.Event()
+        self.max_send_rate = settings.TICKERS_WS_MAX_SEND_RATE
+        self.max_lag = settings.TICKERS_WS_MAX_LAG
+        self.max_subscriptions = settings.TICKERS_WS_MAX_SUBSCRIPTIONS
+        self.tokens = self.max_send_rate
+        self.refilled_at = self.loop.time()
+        self.sender = None
+        query = parse_qs(self.scope.get('query_string', b'').decode())
+        symbols = [
+            symbol
+            for value in query.get('symbols', [])
+            for symbol in value.split(',')
+            if symbol
+        ]
+        normalized = [normalize_symbol(symbol) for symbol in symbols]
+        if None in normalized or len(normalized) > self.max_subscriptions:
+            await self.close()
+            return
+        # Без явной подписки клиент получает все символы
+        await self.subscribe(normalized or [WILDCARD])
         await self.accept()
+        metrics.WS_CONNECTIONS.inc()
+        self.sender = asyncio.create_task(self.send_pending())
 
     async def disconnect(self, close_code):
         """Отключение от WebSocket"""
-        await self.channel_layer.group_discard("tickers", self.channel_name)
+        if getattr(self, 'sender', None):
+            self.sender.cancel()
+            metrics.WS_CONNECTIONS.dec()
+        await self.unsubscribe(list(getattr(self, 'subscriptions', ())))
 
     async def receive(self, text_data=None, bytes_data=None):
-        pass
+        """Обработка сообщений subscribe/unsubscribe"""
+        try:
+            message = json.loads(text_data or '')
+        except ValueError:
+            await self.send_error('Сообщение должно быть JSON')
+            return
+        if not isinstance(message, dict):
+            await self.send_error('Сообщение должно быть JSON-объектом')
+            return
+        action = message.get('action')
+        symbols = message.get('symbols')
+        if action not in ('subscribe', 'unsubscribe'):
+            await self.send_error(
+                'action должен быть subscribe или unsubscribe'
+            )
+            return
+        if not isinstance(symbols, list):
+            await self.send_error('symbols должен быть списком')
+            return
+        normalized = [normalize_symbol(symbol) for symbol in symbols]
+        if None in normalized:
+            await self.send_error('Недопустимый символ')
+            return
+
+        if action == 'subscribe':
+            await self.subscribe(normalized)
+        else:
+            await self.unsubscribe(normalized)
+        await self.send(text_data=json.dumps({
+            'type': 'subscriptions',
+            'symbols': sorted(self.subscriptions),
+        }))
+
+    async def subscribe(self, symbols):
+        """
+        Добавляет клиента в группы символов. Подписка на все символы
+        и на отдельные символы взаимоисключающие, чтобы клиент
+        не получал одно обновление дважды.
+        """
+        if WILDCARD in symbols:
+            target = {WILDCARD}
+        else:
+            target = (self.subscriptions - {WILDCARD}) | set(symbols)
+        if len(target) > self.max_subscriptions:
+            await self.send_error(
+                f'Не больше {self.max_subscriptions} подписок'
+            )
+            return
+        await self.unsubscribe(list(self.subscriptions - target))
+        for symbol in target - self.subscriptions:
+            await self.channel_layer.group_add(
+                symbol_group(symbol), self.channel_name
+            )
+            self.subscriptions.add(symbol)
+
+    async def unsubscribe(self, symbols):
+        """Удаляет клиента из групп символов"""
+        for symbol in symbols:
+            if symbol in self.subscriptions:
+                await self.channel_layer.group_discard(
+                    symbol_group(symbol), self.channel_name
+                )
+                self.subscriptions.discard(symbol)
+
+    async def send_error(self, message):
+        """Отправка ошибки протокола клиенту"""
+        await self.send(text_data=json.dumps({
+            'type': 'error',
+            'message': message,
+        }))
 
     async def send_ticker(self, event):
         """Отправка данных тикера в WebSocket"""
-        await self.send(text_data=json.dumps(event['data']))
+        data = event['data']
+        await self.enqueue({data.get('symbol'): json.dumps(data)})
+
+    async def send_frames(self, event):
+        """
+        Отправка заранее сериализованных обновлений тикеров.
+        Кадры закодированы слушателем один раз и не кодируются повторно.
+        """
+        await self.enqueue(event['frames'])
+
+    async def enqueue(self, frames):
+        """
+        Кладет кадры symbol -> frame в исходящий буфер клиента.
+        Буфер хранит только последний кадр каждого символа, поэтому
+        медленный клиент получает свежие цены, а не накопленную очередь.
+        Если самый старый неотправленный кадр ждет дольше max_lag секунд,
+        соединение закрывается. Буфер клиента, подписанного на больше
+        символов, чем успевает уйти за сброс, может не пустеть никогда,
+        но такой клиент не отключается, пока кадры уходят вовремя.
+        """
+        now = self.loop.time()
+        if self.pending and self.max_lag:
+            # Символы уходят в порядке постановки в буфер, поэтому
+            # первый из них ждет дольше всех
+            oldest = self.pending_since[next(iter(self.pending))]
+            if now - oldest > self.max_lag:
+                self.pending.clear()
+                self.pending_since.clear()
+                await self.close(code=SLOW_CONSUMER_CLOSE_CODE)
+                return
+        self.pending_since.update(
+            dict.fromkeys(frames.keys() - self.pending.keys(), now)
+        )
+        self.pending.update(frames)
+        self.wakeup.set()
+
+    async def send_pending(self):
+        """Отправляет буфер клиенту не быстрее max_send_rate кадров/с"""
+        while True:
+            await self.wakeup.wait()
+            self.wakeup.clear()
+            while self.pending:
+                await self.throttle()
+                if not self.pending:
+                    break
+                # Самый давно ожидающий символ уходит первым; кадр берется
+                # после ожидания, чтобы отправить самую свежую цену
+                symbol = next(iter(self.pending))
+                frame = self.pending.pop(symbol)
+                self.pending_since.pop(symbol, None)
+                started = time.perf_counter()
+                await self.send(text_data=frame)
+                metrics.WS_SEND_SECONDS.observe(
+                    time.perf_counter() - started
+                )
+
+    async def throttle(self):
+        """Token bucket: не больше max_send_rate кадров в секунду"""
+        if not self.max_send_rate:
+            return
+        now = self.loop.time()
+        self.tokens = min(
+            self.max_send_rate,
+            self.tokens + (now - self.refilled_at) * self.max_send_rate,
+        )
+        self.refilled_at = now
+        if self.tokens < 1:
+            await asyncio.sleep((1 - self.tokens) / self.max_send_rate)
+            self.tokens = 1
+            self.refilled_at = self.loop.time()
+        self.tokens -= 1
@@ -0,0 +1,102 @@
+"""
+Быстрый разбор кадров Binance в тики для слушателя.
+
+JSON разбирается самой быстрой доступной библиотекой: orjson, msgspec
+или стандартным json. Разбор синхронный и не создает объектов сверх
+нужного: время события остается целым числом миллисекунд, цена —
+строкой. datetime строится только для цен, которые дошли до сброса
+(materialize), а Decimal — при записи в БД.
+"""
+import json
+from datetime import datetime, timezone
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+def select_backend(name=None):
+    """
+    Возвращает (имя, функция разбора) для JSON-библиотеки name
+    или для самой быстрой из установленных.
+    """
+    backends = {'json': json.loads}
+    if msgspec is not None:
+        backends['msgspec'] = msgspec.json.decode
+    if orjson is not None:
+        backends['orjson'] = orjson.loads
+    if name is None:
+        name = next(
+            backend for backend in ('orjson', 'msgspec', 'json')
+            if backend in backends
+        )
+    if name not in backends:
+        raise ValueError(f'JSON-библиотека {name} не установлена')
+    return name, backends[name]
+
+
+BACKEND, loads = select_backend()
+
+
+def decode_ticks(message, allowed=None, loads=loads):
+    """
+    Извлекает список (symbol, price, event_time_ms) из кадра потока.
+    Поток всего рынка присылает массив тикеров в одном кадре; символы
+    не из allowed пропускаются до разбора цены и времени.
+    """
+    return decode_frame(message, allowed, loads)[0]
+
+
+def decode_frame(message, allowed=None, loads=loads):
+    """
+    decode_ticks, который дополнительно сообщает об ошибке разбора:
+    возвращает (тики, failed). Кадр без данных (ответ на подписку)
+    и тикеры символов не из allowed ошибкой не считаются; ошибка —
+    неверный JSON или тикер без символа, цены или времени события.
+    """
+    try:
+        data = loads(message).get('data')
+    except Exception:
+        return [], True
+    if data is None:
+        return [], False
+    items = data if isinstance(data, list) else [data]
+    ticks = []
+    failed = False
+    for item in items:
+        try:
+            symbol = item.get('s')
+            if allowed is not None and symbol not in allowed:
+                continue
+            price = item.get('c')
+            event_time = item.get('E')
+        except AttributeError:
+            failed = True
+            continue
+        if symbol and price and isinstance(event_time, int) and event_time:
+            ticks.append((symbol, price, event_time))
+        else:
+            failed = True
+    return ticks, failed
+
+
+def event_datetime(event_time_ms):
+    """Время события Binance в миллисекундах -> datetime в UTC"""
+    return datetime.fromtimestamp(event_time_ms / 1000, tz=timezone.utc)
+
+
+def materialize(prices):
+    """
+    Превращает symbol -> (price, event_time_ms) в
+    symbol -> (price, datetime) для записи в БД и рассылки.
+    """
+    return {
+        symbol: (price, event_datetime(event_time))
+        for symbol, (price, event_time) in prices.items()
+    }
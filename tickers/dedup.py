@@ -0,0 +1,36 @@
+"""
+Удаление повторов (symbol, event_time) из истории цен.
+
+Таблица обходится диапазонами id, и каждый диапазон чистится
+отдельным коротким DELETE, поэтому строки блокируются ненадолго,
+а слушатель продолжает писать во время чистки. Из повторов остается
+строка с наибольшим id: на нее ссылается TickerLatest.history_id.
+"""
+from django.db import transaction
+from django.db.models import Exists, Max, Min, OuterRef
+
+DEDUP_CHUNK = 50000
+
+
+def delete_duplicates(model, chunk=DEDUP_CHUNK):
+    """
+    Удаляет повторы в истории model (TickerPrice или ее историческая
+    модель в миграции) диапазонами по chunk значений id.
+    Генератор: после каждого диапазона отдает (конец диапазона,
+    удалено строк в нем).
+    """
+    bounds = model.objects.aggregate(first=Min('id'), last=Max('id'))
+    if bounds['first'] is None:
+        return
+    newer = model.objects.filter(
+        symbol=OuterRef('symbol'),
+        event_time=OuterRef('event_time'),
+        id__gt=OuterRef('id'),
+    )
+    for start in range(bounds['first'], bounds['last'] + 1, chunk):
+        end = start + chunk
+        with transaction.atomic():
+            deleted, _ = model.objects.filter(
+                id__gte=start, id__lt=end
+            ).filter(Exists(newer)).delete()
+        yield end, deleted
@@ -0,0 +1,190 @@
+"""
+Выгрузка истории цен в колоночных форматах.
+
+История читается из БД пачками по EXPORT_CHUNK_SIZE строк (на
+PostgreSQL — серверным курсором), и каждая пачка сразу кодируется
+в выходной формат, поэтому память не зависит от размера выгрузки.
+Arrow IPC и Parquet доступны, если установлен pyarrow; CSV со сжатием
+gzip доступен всегда.
+"""
+import csv
+import io
+import zlib
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+from .models import TickerPrice, price_row, price_values
+
+FORMAT_CSV = 'csv'
+FORMAT_ARROW = 'arrow'
+FORMAT_PARQUET = 'parquet'
+
+EXPORT_FIELDS = ('symbol', 'event_time', 'price')
+EXPORT_CHUNK_SIZE = 10000
+
+CONTENT_TYPES = {
+    FORMAT_CSV: 'application/gzip',
+    FORMAT_ARROW: 'application/vnd.apache.arrow.stream',
+    FORMAT_PARQUET: 'application/vnd.apache.parquet',
+}
+EXTENSIONS = {
+    FORMAT_CSV: 'csv.gz',
+    FORMAT_ARROW: 'arrows',
+    FORMAT_PARQUET: 'parquet',
+}
+
+
+def available_formats():
+    """Форматы выгрузки, доступные с установленными библиотеками"""
+    if pyarrow is None:
+        return (FORMAT_CSV,)
+    return (FORMAT_CSV, FORMAT_ARROW, FORMAT_PARQUET)
+
+
+def export_queryset(symbols=None, start=None, end=None):
+    """
+    Строки истории для price_row в порядке времени.
+    values(), а не values_list(): итератор values_list() выполняет
+    запрос сразу и не работает через aiterator().
+    """
+    queryset = TickerPrice.objects.all()
+    if symbols:
+        queryset = queryset.filter(symbol__name__in=symbols)
+    if start:
+        queryset = queryset.filter(event_time__gte=start)
+    if end:
+        queryset = queryset.filter(event_time__lt=end)
+    queryset = queryset.order_by('event_time', 'id')
+    return price_values(queryset, EXPORT_FIELDS)
+
+
+class CsvEncoder:
+    """CSV, сжатый gzip потоком: каждая пачка сжимается сразу"""
+
+    def __init__(self):
+        self._compressor = zlib.compressobj(wbits=31)
+
+    def begin(self):
+        return self._compress([EXPORT_FIELDS])
+
+    def encode(self, rows):
+        return self._compress(
+            (row['symbol'], row['event_time'].isoformat(), row['price'])
+            for row in rows
+        )
+
+    def _compress(self, rows):
+        text = io.StringIO()
+        csv.writer(text, lineterminator='\n').writerows(rows)
+        return self._compressor.compress(text.getvalue().encode())
+
+    def end(self):
+        return self._compressor.flush()
+
+
+class _Sink(io.RawIOBase):
+    """Файл для pyarrow, из которого записанные байты забираются частями"""
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._buffer += data
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def pop(self):
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+class ArrowEncoder:
+    """Arrow IPC stream: пачка строк становится record batch"""
+
+    def __init__(self):
+        self.schema = pyarrow.schema([
+            ('symbol', pyarrow.string()),
+            ('event_time', pyarrow.timestamp('us', tz='UTC')),
+            ('price', pyarrow.decimal128(20, 8)),
+        ])
+        self._sink = _Sink()
+        self._writer = None
+
+    def open(self, sink):
+        return pyarrow.ipc.new_stream(sink, self.schema)
+
+    def begin(self):
+        self._writer = self.open(self._sink)
+        return self._sink.pop()
+
+    def encode(self, rows):
+        self._writer.write_table(pyarrow.table(
+            [[row[field] for row in rows] for field in EXPORT_FIELDS],
+            schema=self.schema,
+        ))
+        return self._sink.pop()
+
+    def end(self):
+        self._writer.close()
+        return self._sink.pop()
+
+
+class ParquetEncoder(ArrowEncoder):
+    """Parquet: пачка строк становится группой строк файла"""
+
+    def open(self, sink):
+        return pyarrow.parquet.ParquetWriter(
+            sink, self.schema, compression='zstd'
+        )
+
+
+ENCODERS = {
+    FORMAT_CSV: CsvEncoder,
+    FORMAT_ARROW: ArrowEncoder,
+    FORMAT_PARQUET: ParquetEncoder,
+}
+
+
+def export_chunks(queryset, export_format, chunk_size=EXPORT_CHUNK_SIZE):
+    """Кодирует выборку в export_format и отдает байты пачками"""
+    encoder = ENCODERS[export_format]()
+    yield encoder.begin()
+    rows = []
+    for row in queryset.iterator(chunk_size=chunk_size):
+        rows.append(price_row(row, EXPORT_FIELDS))
+        if len(rows) >= chunk_size:
+            yield encoder.encode(rows)
+            rows = []
+    if rows:
+        yield encoder.encode(rows)
+    yield encoder.end()
+
+
+async def aexport_chunks(
+    queryset, export_format, chunk_size=EXPORT_CHUNK_SIZE
+):
+    """Асинхронный вариант export_chunks для потоковых ответов ASGI"""
+    encoder = ENCODERS[export_format]()
+    yield encoder.begin()
+    rows = []
+    async for row in queryset.aiterator(chunk_size=chunk_size):
+        rows.append(price_row(row, EXPORT_FIELDS))
+        if len(rows) >= chunk_size:
+            yield encoder.encode(rows)
+            rows = []
+    if rows:
+        yield encoder.encode(rows)
+    yield encoder.end()
@@ -0,0 +1,27 @@
+import re
+
+# Группа подписки на все символы (прежнее поведение TickerConsumer)
+WILDCARD = '*'
+WILDCARD_GROUP = 'tickers'
+
+SYMBOL_RE = re.compile(r'^[A-Z0-9]{1,20}$')
+
+
+def symbol_group(symbol):
+    """Группа channel layer для обновлений одного символа"""
+    if symbol == WILDCARD:
+        return WILDCARD_GROUP
+    return f'{WILDCARD_GROUP}.{symbol}'
+
+
+def normalize_symbol(symbol):
+    """
+    Приводит символ к верхнему регистру.
+    Возвращает None, если символ недопустим.
+    """
+    if not isinstance(symbol, str):
+        return None
+    symbol = symbol.strip().upper()
+    if symbol == WILDCARD or SYMBOL_RE.match(symbol):
+        return symbol
+    return None
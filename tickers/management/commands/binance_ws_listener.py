@@ -1,16 +1,53 @@
 import asyncio
-import json
+import multiprocessing
+import signal
+import time
 from datetime import datetime, timezone
 
 import websockets
 from asgiref.sync import sync_to_async
 from channels.layers import get_channel_layer
-from django.core.management.base import BaseCommand
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, close_old_connections, connections
 
-from tickers.models import TickerPrice
+from tickers import metrics
+from tickers.backfill import DEFAULT_MIN_GAP, Backfiller, get_source
+from tickers.cache import publish_snapshot
+from tickers.decoding import (
+    decode_frame, decode_ticks, event_datetime, materialize,
+)
+from tickers.broadcast import LiveBroadcaster, publish_prices
+from tickers.capture import CaptureWriter
+from tickers.models import TickerCandle, TickerPrice
+from tickers.persistence import DEFAULT_BATCH_SIZE, TickerWriter
+from tickers.pipeline import (
+    DEFAULT_QUEUE_SIZE, OVERFLOW_DROP_OLDEST, OVERFLOW_POLICIES, TickQueue,
+    backoff_delays, split_shards,
+)
+from tickers.spool import DEFAULT_SPOOL_MAX_BYTES, TickSpool
 
 BINANCE_WS_URL = 'wss://stream.binance.com:9443/stream'
 DEFAULT_SYMBOLS = ['btcusdt', 'ethusdt']
+DEFAULT_SAVE_INTERVAL = 60  # seconds
+
+# Потоки всего рынка: один кадр в секунду с массивом тикеров
+ALL_MARKET_STREAMS = {
+    'ticker': '!ticker@arr',
+    'miniTicker': '!miniTicker@arr',
+}
+
+
+def run_worker(options):
+    """Точка входа процесса-воркера: слушатель для своей группы символов"""
+    import django
+    django.setup()
+    call_command('binance_ws_listener', **options)
+
+
+def interrupt(signum, frame):
+    """Обработчик SIGTERM процесса с воркерами: как Ctrl+C"""
+    raise KeyboardInterrupt
 
 
 class Command(BaseCommand):
@@ -20,59 +57,395 @@ class Command(BaseCommand):
 
     help = 'Слушает Binance WebSocket и сохраняет цены в БД'
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Сигнал фоновой загрузке спула: БД снова принимает запись
+        self.spool_ready = asyncio.Event()
+
     def add_arguments(self, parser):
         parser.add_argument(
             '--symbols',
             nargs='+',
-            default=DEFAULT_SYMBOLS,
-            help='Список символов для подписки (например, btcusdt ethusdt)'
+            default=None,
+            help=(
+                'Список символов для подписки (например, btcusdt ethusdt); '
+                'в режиме --all-market — список разрешенных символов'
+            )
+        )
+        parser.add_argument(
+            '--all-market',
+            nargs='?',
+            const='miniTicker',
+            choices=tuple(ALL_MARKET_STREAMS),
+            default=None,
+            help=(
+                'Читать поток всего рынка (!miniTicker@arr или '
+                '!ticker@arr) вместо подписки на отдельные символы'
+            )
+        )
+        parser.add_argument(
+            '--ws-url',
+            default=BINANCE_WS_URL,
+            help=(
+                'Адрес комбинированного потока; например, локальный '
+                'симулятор ws://127.0.0.1:9443/stream'
+            )
+        )
+        parser.add_argument(
+            '--shards',
+            type=int,
+            default=None,
+            help=(
+                'Количество соединений WebSocket в процессе; по умолчанию '
+                'выбирается по количеству символов'
+            )
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Количество процессов, между которыми делятся символы'
+        )
+        parser.add_argument(
+            '--save-interval',
+            type=float,
+            default=DEFAULT_SAVE_INTERVAL,
+            help='Интервал сохранения цен в БД, в секундах'
+        )
+        parser.add_argument(
+            '--broadcast-interval',
+            type=float,
+            default=None,
+            help=(
+                'Рассылать тики в WebSocket сразу, не чаще раза в указанное '
+                'число секунд на символ (0 — каждый тик). По умолчанию '
+                'рассылка выполняется при сохранении в БД'
+            )
+        )
+        parser.add_argument(
+            '--spool',
+            default=None,
+            help=(
+                'Файл локального спула для цен, которые не удалось '
+                'сохранить в БД; загружается после восстановления БД'
+            )
+        )
+        parser.add_argument(
+            '--spool-max-mb',
+            type=int,
+            default=DEFAULT_SPOOL_MAX_BYTES // (1024 * 1024),
+            help='Максимальный размер спула, в МБ'
+        )
+        parser.add_argument(
+            '--backfill',
+            action='store_true',
+            help=(
+                'После подключения заполнять пропуски в истории цен '
+                'из источника TICKERS_BACKFILL_SOURCE'
+            )
+        )
+        parser.add_argument(
+            '--backfill-url',
+            default=None,
+            help='Базовый URL REST API для заполнения пропусков'
+        )
+        parser.add_argument(
+            '--backfill-min-gap',
+            type=float,
+            default=DEFAULT_MIN_GAP,
+            help='Минимальная длительность пропуска, в секундах'
+        )
+        parser.add_argument(
+            '--metrics-port',
+            type=int,
+            default=None,
+            help='Порт HTTP для метрик в формате Prometheus'
+        )
+        parser.add_argument(
+            '--record',
+            default=None,
+            help=(
+                'Файл, в который дописываются все сырые кадры потока '
+                'со временем получения (для replay_ticks)'
+            )
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Максимальный размер пачки при записи в БД'
+        )
+        parser.add_argument(
+            '--copy',
+            action='store_true',
+            help=(
+                'Загружать историю цен через COPY (только PostgreSQL, '
+                'на других БД игнорируется)'
+            )
+        )
+        parser.add_argument(
+            '--queue-size',
+            type=int,
+            default=DEFAULT_QUEUE_SIZE,
+            help='Максимальное количество тиков в очереди до сброса в БД'
+        )
+        parser.add_argument(
+            '--overflow',
+            choices=OVERFLOW_POLICIES,
+            default=OVERFLOW_DROP_OLDEST,
+            help='Поведение при переполнении очереди тиков'
         )
 
     def handle(self, *args, **options):
         symbols = options['symbols']
-        asyncio.run(self.listen(symbols))
+        all_market = options['all_market']
+        if all_market and options['workers'] > 1:
+            raise CommandError('--workers несовместим с --all-market')
+        if symbols is None and not all_market:
+            symbols = DEFAULT_SYMBOLS
+        self.check_candles()
+        if options['workers'] > 1:
+            self.run_workers(symbols, options)
+            return
+        try:
+            asyncio.run(
+                self.listen(
+                    symbols,
+                    shards=options['shards'],
+                    all_market=all_market,
+                    save_interval=options['save_interval'],
+                    broadcast_interval=options['broadcast_interval'],
+                    batch_size=options['batch_size'],
+                    queue_size=options['queue_size'],
+                    overflow=options['overflow'],
+                    spool=TickSpool(
+                        options['spool'],
+                        max_bytes=options['spool_max_mb'] * 1024 * 1024,
+                    ) if options['spool'] else None,
+                    backfill_source=get_source(
+                        options['backfill_url']
+                    ) if options['backfill'] else None,
+                    backfill_min_gap=options['backfill_min_gap'],
+                    metrics_port=options['metrics_port'],
+                    ws_url=options['ws_url'],
+                    record=options['record'],
+                    copy=options['copy'],
+                )
+            )
+        except asyncio.CancelledError:
+            # listen отменен по SIGTERM и уже сохранил тики
+            self.stdout.write(self.style.WARNING('Слушатель остановлен'))
 
-    async def listen(self, symbols):
-        """Слушает поток WebSocket, обновляет БД каждую минуту"""
+    def check_candles(self):
+        """
+        Предупреждает, если история цен есть, а свечей TickerCandle нет:
+        слушатель строит свечи только по новым ценам, а история,
+        записанная до появления свечей, пересчитывается командой
+        rebuild_candles.
+        """
+        if TickerCandle.objects.exists() or not TickerPrice.objects.exists():
+            return
+        self.stdout.write(self.style.WARNING(
+            'Свечи по сохраненной истории не построены: выполните '
+            'python manage.py rebuild_candles'
+        ))
+
+    def run_workers(self, symbols, options):
+        """
+        Делит символы между процессами. Каждый процесс ведет свои
+        соединения, очередь и сброс в общую БД и слой каналов.
+        """
+        worker_options = {
+            name: options[name]
+            for name in (
+                'shards', 'save_interval', 'broadcast_interval',
+                'batch_size', 'queue_size', 'overflow', 'spool_max_mb',
+                'backfill', 'backfill_url', 'backfill_min_gap', 'ws_url',
+                'copy',
+            )
+        }
+        metrics_port = options['metrics_port']
+        # Соединения с БД не должны наследоваться дочерними процессами
+        connections.close_all()
+        spool = options['spool']
+        processes = [
+            multiprocessing.Process(
+                target=run_worker,
+                args=({
+                    **worker_options,
+                    'symbols': group,
+                    # У каждого процесса свой файл спула
+                    'spool': spool and f'{spool}.{index}',
+                    # Каждый процесс отдает метрики на своем порту
+                    'metrics_port': metrics_port and metrics_port + index,
+                    'record': options['record'] and (
+                        f"{options['record']}.{index}"
+                    ),
+                },),
+                name=f'binance-listener-{index}',
+            )
+            for index, group in enumerate(
+                split_shards(symbols, options['workers'])
+            )
+        ]
+        for process in processes:
+            process.start()
+        # SIGTERM (docker stop) останавливает процессы так же, как Ctrl+C:
+        # каждый получает SIGTERM, сохраняет тики и закрывает файлы
+        signal.signal(signal.SIGTERM, interrupt)
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                process.join()
+
+    def stream_url(self, symbols, ws_url=BINANCE_WS_URL):
+        """URL комбинированного потока @ticker для списка символов"""
         streams = [f"{symbol.lower()}@ticker" for symbol in symbols]
-        stream_url = (
-            f"wss://stream.binance.com:9443/stream?streams={'/'.join(streams)}"
-        )
-        last_prices = {}  # symbol -> (price, event_time)
-        last_save = datetime.now(timezone.utc)
-        save_interval = 60  # seconds
-
-        async def save_all():
-            for symbol, (price, event_time) in last_prices.items():
-                # Создание новой записи цены тикера без удаления старых записей
-                await sync_to_async(TickerPrice.objects.create)(
-                    symbol=symbol,
-                    price=price,
-                    event_time=event_time
-                )
-                # Отправка обновления в WebSocket
-                channel_layer = get_channel_layer()
-                await channel_layer.group_send(
-                    'tickers',
-                    {
-                        'type': 'send_ticker',
-                        'data': {
-                            'symbol': symbol,
-                            'price': price,
-                            'event_time': event_time.isoformat(),
-                        }
-                    }
-                )
-                self.stdout.write(
-                    self.style.SUCCESS(
-                        f'Обновлено {symbol}: {float(price):.1f} @ '
-                        f'{event_time.strftime("%Y-%m-%d %H:%M:%S UTC")}'
-                    )
+        return f"{ws_url}?streams={'/'.join(streams)}"
+
+    async def listen(
+        self,
+        symbols,
+        shards=None,
+        all_market=None,
+        save_interval=DEFAULT_SAVE_INTERVAL,
+        broadcast_interval=None,
+        batch_size=DEFAULT_BATCH_SIZE,
+        queue_size=DEFAULT_QUEUE_SIZE,
+        overflow=OVERFLOW_DROP_OLDEST,
+        spool=None,
+        backfill_source=None,
+        backfill_min_gap=DEFAULT_MIN_GAP,
+        metrics_port=None,
+        ws_url=BINANCE_WS_URL,
+        record=None,
+        copy=False,
+    ):
+        """
+        Слушает поток WebSocket и сохраняет цены раз в save_interval.
+        Символы делятся между shards соединениями, каждое со своим
+        переподключением; все соединения пишут в одну ограниченную
+        очередь тиков, которую разбирает отдельная корутина сброса в БД.
+        В режиме all_market читается один поток всего рынка, а symbols
+        служит списком разрешенных символов (None — все символы).
+        Сбросы, которые не удалось записать в БД, попадают в spool.
+        Если задан backfill_source, после каждого подключения шарда
+        пропуски в истории его символов заполняются из источника.
+        metrics_port — порт HTTP для метрик в формате Prometheus.
+        ws_url — адрес комбинированного потока (Binance или симулятор).
+        record — файл, в который дописываются все сырые кадры.
+        copy — загружать историю через COPY на PostgreSQL.
+        Если задан broadcast_interval, тики рассылаются в WebSocket
+        сразу после разбора, а сброс в БД только сохраняет цены.
+        SIGTERM отменяет listen: перед выходом сохраняются полученные
+        тики и закрывается файл записи.
+        """
+        allowed = None
+        if all_market:
+            groups = [symbols or None]
+            stream_urls = [
+                f'{ws_url}?streams={ALL_MARKET_STREAMS[all_market]}'
+            ]
+            if symbols:
+                allowed = {symbol.upper() for symbol in symbols}
+        else:
+            groups = split_shards(symbols, shards)
+            stream_urls = [
+                self.stream_url(shard, ws_url) for shard in groups
+            ]
+        backfillers = [
+            Backfiller(
+                backfill_source,
+                TickerWriter(batch_size=batch_size, use_copy=copy),
+                group,
+                backfill_min_gap,
+            ) if backfill_source else None
+            for group in groups
+        ]
+        queue = TickQueue(maxsize=queue_size, overflow=overflow)
+        # Глубина очереди читается в момент запроса метрик, а не после
+        # сброса, когда очередь только что опустела
+        metrics.QUEUE_DEPTH.set_function(lambda: queue.depth)
+        writer = TickerWriter(batch_size=batch_size, use_copy=copy)
+        pending = {}  # symbol -> (price, event_time_ms)
+        if metrics_port:
+            await metrics.start_metrics_server(metrics.listener, metrics_port)
+        broadcaster = None
+        tasks = []
+        if broadcast_interval is not None:
+            broadcaster = LiveBroadcaster(
+                get_channel_layer(), broadcast_interval
+            )
+            tasks.append(asyncio.create_task(broadcaster.run()))
+        broadcast = broadcaster is None
+        if spool is not None:
+            tasks.append(asyncio.create_task(self.spool_loop(spool, writer)))
+        tasks.append(asyncio.create_task(
+            self.flush_loop(
+                queue, writer, save_interval, pending,
+                broadcast=broadcast, spool=spool,
+            )
+        ))
+        recorder = CaptureWriter(record) if record else None
+        loop = asyncio.get_running_loop()
+        sigterm = self.cancel_on_sigterm(loop, asyncio.current_task())
+        try:
+            await asyncio.gather(*(
+                self.read_stream(
+                    stream_url, queue, broadcaster, allowed, backfiller,
+                    recorder,
                 )
+                for stream_url, backfiller in zip(stream_urls, backfillers)
+            ))
+        finally:
+            if sigterm:
+                loop.remove_signal_handler(signal.SIGTERM)
+            if recorder:
+                recorder.close()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            # Сохранение тиков, полученных после последнего сброса
+            await self.save_all(
+                queue.drain_into(pending), writer,
+                broadcast=broadcast, spool=spool,
+            )
+
+    @staticmethod
+    def cancel_on_sigterm(loop, task):
+        """
+        Отменяет task по SIGTERM, чтобы ее блоки finally сохранили тики.
+        Возвращает False, если обработчик установить нельзя (Windows
+        или цикл событий не в главном потоке).
+        """
+        try:
+            loop.add_signal_handler(signal.SIGTERM, task.cancel)
+        except (NotImplementedError, RuntimeError, ValueError):
+            return False
+        return True
 
+    async def read_stream(
+        self, stream_url, queue, broadcaster=None, allowed=None,
+        backfiller=None, recorder=None,
+    ):
+        """
+        Читает WebSocket и складывает тики в очередь.
+        Если передан broadcaster, тики сразу передаются ему для рассылки.
+        allowed — множество разрешенных символов для потоков всего рынка.
+        После подключения backfiller в фоне заполняет пропуски истории.
+        recorder сохраняет каждый полученный кадр.
+        Переподключение выполняется с экспоненциальной задержкой.
+        """
+        delays = backoff_delays()
+        backfill = None
         while True:
             try:
                 async with websockets.connect(stream_url) as websocket:
+                    delays = backoff_delays()
                     formatted_time = datetime.now(timezone.utc).strftime(
                         "%Y-%m-%d %H:%M:%S UTC"
                     )
@@ -81,18 +454,27 @@ class Command(BaseCommand):
                             f'Подключено к {stream_url} в {formatted_time}'
                         )
                     )
+                    if backfiller and (
+                        backfill is None or backfill.done()
+                    ):
+                        backfill = asyncio.create_task(
+                            self.backfill(backfiller)
+                        )
                     while True:
                         message = await websocket.recv()
-                        symbol, price, event_time = await self.extract_ticker(
-                            message
-                        )
-                        if symbol and price and event_time:
-                            last_prices[symbol] = (price, event_time)
-                        now = datetime.now(timezone.utc)
-                        if (now - last_save).total_seconds() >= save_interval:
-                            await save_all()
-                            last_save = now
+                        if recorder is not None:
+                            recorder.write(message)
+                        ticks, failed = decode_frame(message, allowed)
+                        metrics.FRAMES_RECEIVED.value += 1
+                        metrics.TICKS_PARSED.value += len(ticks)
+                        if failed:
+                            metrics.PARSE_FAILURES.value += 1
+                        for tick in ticks:
+                            if broadcaster is not None:
+                                broadcaster.offer(*tick)
+                            await queue.put(tick)
             except websockets.exceptions.ConnectionClosed:
+                metrics.RECONNECTS.inc()
                 formatted_time = datetime.now(timezone.utc).strftime(
                     "%Y-%m-%d %H:%M:%S UTC"
                 )
@@ -102,8 +484,9 @@ class Command(BaseCommand):
                         'Переподключение...'
                     )
                 )
-                await asyncio.sleep(5)
+                await asyncio.sleep(next(delays))
             except Exception as e:
+                metrics.RECONNECTS.inc()
                 formatted_time = datetime.now(timezone.utc).strftime(
                     "%Y-%m-%d %H:%M:%S UTC"
                 )
@@ -112,26 +495,174 @@ class Command(BaseCommand):
                         f'Ошибка в {formatted_time}: {str(e)}'
                     )
                 )
-                await asyncio.sleep(5)
+                await asyncio.sleep(next(delays))
+
+    async def backfill(self, backfiller):
+        """Заполняет пропуски в истории цен, не блокируя чтение потока"""
+        try:
+            # Запросы к REST API не должны задерживать сбросы в БД,
+            # которые выполняются в основном потоке sync_to_async
+            written = await sync_to_async(
+                self.fill_gaps, thread_sensitive=False
+            )(backfiller)
+        except Exception as e:
+            self.stdout.write(
+                self.style.ERROR(f'Ошибка заполнения пропусков: {str(e)}')
+            )
+            return
+        if written:
+            self.stdout.write(
+                self.style.SUCCESS(f'Заполнено пропущенных цен: {written}')
+            )
+
+    @staticmethod
+    def fill_gaps(backfiller):
+        """
+        Выполняет backfiller.fill в потоке пула sync_to_async и закрывает
+        соединения с БД этого потока: сам поток их не закрывает, и каждое
+        заполнение оставляло бы открытое соединение.
+        """
+        try:
+            return backfiller.fill()
+        finally:
+            connections.close_all()
+
+    async def flush_loop(
+        self, queue, writer, save_interval, pending, broadcast=True,
+        spool=None,
+    ):
+        """
+        Забирает тики из очереди и по таймеру сбрасывает последние цены
+        в БД, независимо от того, приходят ли новые сообщения.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + save_interval
+        while True:
+            timeout = deadline - loop.time()
+            if timeout > 0:
+                try:
+                    symbol, price, event_time = await asyncio.wait_for(
+                        queue.get(), timeout
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                else:
+                    pending[symbol] = (price, event_time)
+                    queue.drain_into(pending)
+                    continue
+            prices = dict(pending)
+            pending.clear()
+            try:
+                await self.save_all(
+                    prices, writer, broadcast=broadcast, spool=spool
+                )
+            except Exception as e:
+                self.stdout.write(
+                    self.style.ERROR(f'Ошибка сохранения: {str(e)}')
+                )
+            self.stdout.write(
+                f'Очередь: {queue.depth}/{queue.maxsize}, '
+                f'пик: {queue.peak}, отброшено: {queue.dropped}'
+            )
+            metrics.QUEUE_DROPPED.inc(queue.dropped)
+            queue.reset_stats()
+            deadline = max(deadline + save_interval, loop.time())
+
+    async def save_all(self, prices, writer, broadcast=True, spool=None):
+        """
+        Сохраняет словарь symbol -> (price, event_time_ms) в БД одной
+        транзакцией и, если broadcast, рассылает обновления в WebSocket.
+        Если БД недоступна и задан spool, цены дописываются в спул,
+        а следующая успешная запись запускает его загрузку в фоне
+        (spool_loop).
+        """
+        if not prices:
+            return
+        raw, prices = prices, materialize(prices)
+        started = time.monotonic()
+        try:
+            written = await sync_to_async(writer.write)([
+                (symbol, price, event_time)
+                for symbol, (price, event_time) in prices.items()
+            ])
+        except DatabaseError as e:
+            # Разорванное соединение закрывается, следующий сброс
+            # откроет новое
+            await sync_to_async(close_old_connections)()
+            if spool is None:
+                raise
+            spooled = await sync_to_async(spool.append)(
+                (symbol, price, event_time)
+                for symbol, (price, event_time) in raw.items()
+            )
+            self.stdout.write(
+                self.style.WARNING(
+                    f'БД недоступна ({e}), в спул записано: {spooled}, '
+                    f'в спуле: {len(spool)}, отброшено: {spool.dropped}'
+                )
+            )
+        else:
+            elapsed = time.monotonic() - started
+            metrics.FLUSH_SECONDS.observe(elapsed)
+            metrics.FLUSH_ROWS.observe(written)
+            # Перезапись снимка последних цен для /api/tickers/
+            await sync_to_async(publish_snapshot)()
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f'Сохранено записей: {written} за '
+                    f'{elapsed * 1000:.1f} мс'
+                )
+            )
+            if spool is not None and spool.size:
+                self.spool_ready.set()
+        if not broadcast:
+            return
+        # Рассылка обновлений: каждый кадр кодируется один раз
+        await publish_prices(get_channel_layer(), prices)
+
+    async def spool_loop(self, spool, writer):
+        """
+        Фоновая загрузка спула: ждет успешной записи в БД (сигнал
+        spool_ready от save_all) и загружает спул через replay_spool.
+        """
+        while True:
+            await self.spool_ready.wait()
+            self.spool_ready.clear()
+            await self.replay_spool(spool, writer)
+
+    async def replay_spool(self, spool, writer):
+        """
+        Загружает спул в БД частями по REPLAY_CHUNK строк. Каждая часть
+        выполняется отдельным вызовом в потоке БД, поэтому сбросы
+        и рассылка не ждут загрузки всего спула. Ошибка БД прерывает
+        загрузку до следующей успешной записи; уже загруженные части
+        повторно не загружаются. Возвращает количество загруженных строк.
+        """
+        loaded = 0
+        try:
+            while spool.size:
+                loaded += await sync_to_async(spool.replay_chunk)(writer)
+        except DatabaseError as e:
+            await sync_to_async(close_old_connections)()
+            self.stdout.write(
+                self.style.WARNING(
+                    f'Загрузка спула прервана ({e}), загружено: {loaded}'
+                )
+            )
+            return loaded
+        self.stdout.write(
+            self.style.SUCCESS(f'Загружено из спула: {loaded}')
+        )
+        await sync_to_async(publish_snapshot)()
+        return loaded
 
     async def extract_ticker(self, message):
         """
         Извлекает symbol, price, event_time из сообщения.
         Возвращает (symbol, price, event_time)
         """
-        try:
-            data = json.loads(message)
-            if 'data' not in data:
-                return None, None, None
-            ticker_data = data['data']
-            symbol = ticker_data.get('s')
-            price = ticker_data.get('c')
-            event_time_ms = ticker_data.get('E')
-            if not symbol or not price or not event_time_ms:
-                return None, None, None
-            event_time = datetime.fromtimestamp(
-                int(event_time_ms) / 1000, tz=timezone.utc
-            )
-            return symbol, price, event_time
-        except Exception:
+        ticks = decode_ticks(message)
+        if not ticks:
             return None, None, None
+        symbol, price, event_time = ticks[0]
+        return symbol, price, event_datetime(event_time)
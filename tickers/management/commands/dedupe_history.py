@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tickers.cache import publish_version
+from tickers.dedup import DEDUP_CHUNK, delete_duplicates
+from tickers.models import TickerPrice
+
+
+class Command(BaseCommand):
+    """
+    Удаляет повторы (symbol, event_time) из истории цен частями,
+    не блокируя таблицу надолго
+    """
+
+    help = 'Удаляет повторы (symbol, event_time) из истории цен'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEDUP_CHUNK,
+            help='Диапазон id, очищаемый одной транзакцией'
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0,
+            help='Пауза между диапазонами в секундах, чтобы снизить нагрузку'
+        )
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size должен быть больше нуля')
+        total = 0
+        for end, deleted in delete_duplicates(
+            TickerPrice, options['chunk_size']
+        ):
+            total += deleted
+            if deleted and options['verbosity'] > 1:
+                self.stdout.write(f'id < {end}: удалено повторов {deleted}')
+            if options['pause']:
+                time.sleep(options['pause'])
+        if total:
+            publish_version()
+        self.stdout.write(self.style.SUCCESS(f'Удалено повторов: {total}'))
@@ -0,0 +1,70 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tickers.export import (
+    EXPORT_CHUNK_SIZE, EXTENSIONS, FORMAT_CSV, available_formats,
+    export_chunks, export_queryset,
+)
+from tickers.times import parse_time_option
+
+
+class Command(BaseCommand):
+    """
+    Выгружает историю цен в файл Arrow IPC, Parquet или CSV (gzip)
+    """
+
+    help = 'Выгружает историю цен в колоночном формате'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--symbols',
+            nargs='+',
+            help='Список символов (по умолчанию все символы)'
+        )
+        parser.add_argument(
+            '--start',
+            help='Начало диапазона (ISO 8601), по умолчанию начало истории'
+        )
+        parser.add_argument(
+            '--end',
+            help=(
+                'Конец диапазона (ISO 8601, не включается), по умолчанию '
+                'конец истории'
+            )
+        )
+        parser.add_argument(
+            '--format',
+            choices=available_formats(),
+            default=FORMAT_CSV,
+            help='Формат выгрузки; arrow и parquet требуют pyarrow'
+        )
+        parser.add_argument(
+            '--output',
+            help='Файл выгрузки, по умолчанию tickers.<расширение формата>'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=EXPORT_CHUNK_SIZE,
+            help='Количество строк, читаемых из БД за раз'
+        )
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size должен быть больше нуля')
+        export_format = options['format']
+        output = options['output'] or f'tickers.{EXTENSIONS[export_format]}'
+        queryset = export_queryset(
+            [symbol.upper() for symbol in options['symbols'] or []],
+            parse_time_option(options['start'], '--start'),
+            parse_time_option(options['end'], '--end'),
+        )
+        size = 0
+        with open(output, 'wb') as target:
+            for chunk in export_chunks(
+                queryset, export_format, options['chunk_size']
+            ):
+                target.write(chunk)
+                size += len(chunk)
+        self.stdout.write(
+            self.style.SUCCESS(f'История выгружена в {output}: {size} байт')
+        )
@@ -0,0 +1,68 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Max, Min
+
+from tickers.candles import ROLLUP_INTERVALS, rebuild_candles
+from tickers.models import TickerLatest, TickerPrice
+from tickers.times import parse_time_option
+
+
+class Command(BaseCommand):
+    """
+    Пересчитывает свечи TickerCandle по истории цен
+    """
+
+    help = 'Пересчитывает свечи TickerCandle по истории цен'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--symbols',
+            nargs='+',
+            help='Список символов (по умолчанию все известные символы)'
+        )
+        parser.add_argument(
+            '--intervals',
+            nargs='+',
+            choices=ROLLUP_INTERVALS,
+            default=list(ROLLUP_INTERVALS),
+            help='Интервалы свечей для пересчета'
+        )
+        parser.add_argument(
+            '--start',
+            help='Начало диапазона (ISO 8601), по умолчанию начало истории'
+        )
+        parser.add_argument(
+            '--end',
+            help='Конец диапазона (ISO 8601), по умолчанию конец истории'
+        )
+
+    def handle(self, *args, **options):
+        start = parse_time_option(options['start'], '--start')
+        end = parse_time_option(options['end'], '--end')
+        symbols = options['symbols'] or TickerLatest.objects.values_list(
+            'symbol', flat=True
+        )
+        for symbol in symbols:
+            symbol = symbol.upper()
+            bounds = TickerPrice.objects.filter(symbol__name=symbol).aggregate(
+                first=Min('event_time'), last=Max('event_time')
+            )
+            if bounds['first'] is None:
+                self.stdout.write(
+                    self.style.WARNING(f'Нет истории цен для {symbol}')
+                )
+                continue
+            symbol_start = start or bounds['first']
+            # Конец диапазона не включается: сдвиг на микросекунду
+            # оставляет последнюю цену внутри диапазона
+            symbol_end = end or bounds['last'] + timedelta(microseconds=1)
+            for interval in options['intervals']:
+                written = rebuild_candles(
+                    symbol, interval, symbol_start, symbol_end
+                )
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f'Пересчитано свечей {symbol} {interval}: {written}'
+                    )
+                )
@@ -0,0 +1,184 @@
+import asyncio
+import os
+
+from channels.layers import get_channel_layer
+from django.core.management.base import CommandError
+
+from tickers.broadcast import LiveBroadcaster
+from tickers.capture import read_capture
+from tickers.decoding import decode_ticks
+from tickers.management.commands.binance_ws_listener import (
+    DEFAULT_SAVE_INTERVAL, Command as ListenerCommand,
+)
+from tickers.persistence import DEFAULT_BATCH_SIZE, TickerWriter
+
+
+class Command(ListenerCommand):
+    """
+    Воспроизводит запись потока (binance_ws_listener --record) через
+    тот же разбор, сохранение и рассылку, что и слушатель
+    """
+
+    help = 'Воспроизводит запись потока Binance через конвейер слушателя'
+
+    def add_arguments(self, parser):
+        parser.add_argument('capture', help='Файл записи потока')
+        parser.add_argument(
+            '--speed',
+            type=float,
+            default=1,
+            help=(
+                'Скорость воспроизведения: 1 — реальное время, 10 — в 10 '
+                'раз быстрее, 0 — как можно быстрее'
+            )
+        )
+        parser.add_argument(
+            '--symbols',
+            nargs='+',
+            default=None,
+            help='Воспроизводить только эти символы'
+        )
+        parser.add_argument(
+            '--save-interval',
+            type=float,
+            default=DEFAULT_SAVE_INTERVAL,
+            help='Интервал сохранения цен в БД по времени записи, в секундах'
+        )
+        parser.add_argument(
+            '--broadcast-interval',
+            type=float,
+            default=None,
+            help=(
+                'Рассылать тики в WebSocket сразу, не чаще раза в указанное '
+                'число секунд на символ. По умолчанию рассылка выполняется '
+                'при сохранении в БД'
+            )
+        )
+        parser.add_argument(
+            '--no-broadcast',
+            action='store_true',
+            help=(
+                'Не рассылать тики в WebSocket, только сохранять в БД '
+                '(восстановление истории при подключенных клиентах)'
+            )
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Максимальный размер пачки при записи в БД'
+        )
+        parser.add_argument(
+            '--copy',
+            action='store_true',
+            help=(
+                'Загружать историю цен через COPY (только PostgreSQL, '
+                'на других БД игнорируется)'
+            )
+        )
+
+    def handle(self, *args, **options):
+        if not os.path.exists(options['capture']):
+            raise CommandError(f"Файл {options['capture']} не найден")
+        if options['speed'] < 0:
+            raise CommandError('--speed не может быть отрицательной')
+        if options['no_broadcast'] and (
+            options['broadcast_interval'] is not None
+        ):
+            raise CommandError(
+                '--broadcast-interval нельзя задать вместе с --no-broadcast'
+            )
+        asyncio.run(
+            self.replay(
+                options['capture'],
+                speed=options['speed'],
+                symbols=options['symbols'],
+                save_interval=options['save_interval'],
+                broadcast_interval=options['broadcast_interval'],
+                batch_size=options['batch_size'],
+                broadcast=not options['no_broadcast'],
+                copy=options['copy'],
+            )
+        )
+
+    async def replay(
+        self,
+        path,
+        speed=1,
+        symbols=None,
+        save_interval=DEFAULT_SAVE_INTERVAL,
+        broadcast_interval=None,
+        batch_size=DEFAULT_BATCH_SIZE,
+        broadcast=True,
+        copy=False,
+    ):
+        """
+        Воспроизводит кадры записи с паузами по времени получения,
+        деленными на speed (speed=0 — без пауз). Цены сохраняются раз
+        в save_interval по времени записи, поэтому история в БД не
+        зависит от скорости воспроизведения. При broadcast=False тики
+        только сохраняются, клиенты WebSocket их не получают.
+        copy — загружать историю через COPY на PostgreSQL.
+        Возвращает (количество кадров, количество тиков).
+        """
+        loop = asyncio.get_running_loop()
+        allowed = symbols and {symbol.upper() for symbol in symbols}
+        writer = TickerWriter(batch_size=batch_size, use_copy=copy)
+        broadcaster = None
+        task = None
+        if broadcast and broadcast_interval is not None:
+            broadcaster = LiveBroadcaster(
+                get_channel_layer(), broadcast_interval
+            )
+            task = asyncio.create_task(broadcaster.run())
+            # Рассылкой занимается broadcaster, а не сохранение
+            broadcast = False
+        step = int(save_interval * 1e9)
+        pending = {}  # symbol -> (price, event_time_ms)
+        frames = ticks = 0
+        first = next_flush = None
+        started = loop.time()
+        try:
+            for received_at, frame in read_capture(path):
+                if first is None:
+                    first = received_at
+                    next_flush = first + step
+                if speed:
+                    delay = (
+                        (received_at - first) / 1e9 / speed
+                        - (loop.time() - started)
+                    )
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                elif frames % 1000 == 0:
+                    # Даем поработать рассылке и другим задачам
+                    await asyncio.sleep(0)
+                if received_at >= next_flush:
+                    await self.save_all(pending, writer, broadcast=broadcast)
+                    pending = {}
+                    next_flush = first + (
+                        (received_at - first) // step + 1
+                    ) * step
+                frames += 1
+                for symbol, price, event_time in decode_ticks(
+                    frame, allowed
+                ):
+                    pending[symbol] = (price, event_time)
+                    if broadcaster is not None:
+                        broadcaster.offer(symbol, price, event_time)
+                    ticks += 1
+            await self.save_all(pending, writer, broadcast=broadcast)
+        finally:
+            if task is not None:
+                # Последние тики успевают уйти до остановки рассылки
+                await asyncio.sleep(broadcast_interval)
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+        elapsed = loop.time() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Воспроизведено кадров: {frames}, тиков: {ticks} за '
+                f'{elapsed:.1f} с ({frames / max(elapsed, 1e-9):.0f} кадров/с)'
+            )
+        )
+        return frames, ticks
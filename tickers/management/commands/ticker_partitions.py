@@ -0,0 +1,97 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from tickers.partitions import (
+    PERIOD_MONTH, PERIODS, PartitioningError, convert_to_partitioned,
+    ensure_partitions, expire_partitions, history_table, next_period,
+    period_start,
+)
+
+DEFAULT_AHEAD = 2
+
+
+class Command(BaseCommand):
+    """
+    Управляет секциями таблицы истории цен на PostgreSQL
+    """
+
+    help = (
+        'Секционирует историю цен по event_time, создает будущие секции '
+        'и отсоединяет или удаляет устаревшие'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--convert',
+            action='store_true',
+            help='Однократно превратить таблицу истории в секционированную'
+        )
+        parser.add_argument(
+            '--keep-legacy',
+            action='store_true',
+            help='При --convert сохранить исходную таблицу как *_legacy'
+        )
+        parser.add_argument(
+            '--period',
+            choices=PERIODS,
+            default=PERIOD_MONTH,
+            help='Размер секции: month или day'
+        )
+        parser.add_argument(
+            '--ahead',
+            type=int,
+            default=DEFAULT_AHEAD,
+            help='Сколько будущих секций создавать заранее'
+        )
+        parser.add_argument(
+            '--retention-days',
+            type=int,
+            help='Отсоединить секции, целиком старше указанного числа дней'
+        )
+        parser.add_argument(
+            '--drop',
+            action='store_true',
+            help='Удалять устаревшие секции вместо отсоединения'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Секционирование доступно только на PostgreSQL')
+        table = history_table()
+        period = options['period']
+        until = period_start(timezone.now(), period)
+        for _ in range(options['ahead']):
+            until = next_period(until, period)
+
+        try:
+            with transaction.atomic(), connection.cursor() as cursor:
+                if options['convert']:
+                    convert_to_partitioned(
+                        cursor, table, period, until,
+                        keep_legacy=options['keep_legacy'],
+                    )
+                    self.stdout.write(
+                        self.style.SUCCESS(f'Таблица {table} секционирована')
+                    )
+                for name in ensure_partitions(cursor, table, period, until):
+                    self.stdout.write(
+                        self.style.SUCCESS(f'Создана секция {name}')
+                    )
+                if options['retention_days'] is not None:
+                    before = timezone.now() - timedelta(
+                        days=options['retention_days']
+                    )
+                    for name in expire_partitions(
+                        cursor, table, before, drop=options['drop']
+                    ):
+                        action = 'Удалена' if options['drop'] else (
+                            'Отсоединена'
+                        )
+                        self.stdout.write(
+                            self.style.SUCCESS(f'{action} секция {name}')
+                        )
+        except PartitioningError as e:
+            raise CommandError(str(e))
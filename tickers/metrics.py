@@ -0,0 +1,179 @@
+"""
+Метрики слушателя и WebSocket в текстовом формате Prometheus.
+
+Счетчики и гистограммы — простые объекты в памяти процесса: запись
+метрики стоит одного сложения (и bisect для гистограммы), а формат
+Prometheus собирается только при запросе /metrics.
+Слушатель отдает свои метрики по HTTP (--metrics-port), веб-процесс —
+по адресу /metrics/.
+"""
+import asyncio
+from bisect import bisect_left
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Границы гистограмм длительности, в секундах
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1, 2.5, 5, 10, 30, 60,
+)
+ROWS_BUCKETS = (1, 10, 50, 100, 500, 1000, 5000, 10000, 50000)
+
+
+class Registry:
+    """Набор метрик одного процесса"""
+
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        """Текст всех метрик в формате Prometheus"""
+        lines = []
+        for metric in self.metrics:
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+
+class Counter:
+    """Монотонно растущий счетчик"""
+    type = 'counter'
+
+    def __init__(self, name, help, registry):
+        self.name = name
+        self.help = help
+        self.value = 0
+        registry.register(self)
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def samples(self):
+        return [f'{self.name} {self.value}']
+
+
+class Gauge(Counter):
+    """Значение, которое может расти и уменьшаться"""
+    type = 'gauge'
+    function = None
+
+    def set(self, value):
+        self.value = value
+
+    def set_function(self, function):
+        """Значение берется из function() при каждом запросе метрик"""
+        self.function = function
+
+    def samples(self):
+        value = self.function() if self.function is not None else self.value
+        return [f'{self.name} {value}']
+
+    def dec(self, amount=1):
+        self.value -= amount
+
+
+class Histogram:
+    """Гистограмма с фиксированными границами корзин"""
+    type = 'histogram'
+
+    def __init__(self, name, help, registry, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        # Последняя корзина — значения больше всех границ (+Inf)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0
+        registry.register(self)
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def samples(self):
+        lines = []
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            lines.append(f'{self.name}_bucket{{le="{bound}"}} {total}')
+        total += self.counts[-1]
+        lines.append(f'{self.name}_bucket{{le="+Inf"}} {total}')
+        lines.append(f'{self.name}_sum {self.sum}')
+        lines.append(f'{self.name}_count {total}')
+        return lines
+
+
+async def start_metrics_server(registry, port, host='0.0.0.0'):
+    """
+    Запускает в текущем цикле событий HTTP-сервер, который на любой
+    GET-запрос отвечает метриками registry.
+    """
+    async def handle(reader, writer):
+        try:
+            # Заголовки запроса не нужны: читаем их до пустой строки
+            while (await reader.readline()).strip():
+                pass
+            body = registry.render().encode()
+            writer.write(
+                b'HTTP/1.1 200 OK\r\n'
+                + f'Content-Type: {CONTENT_TYPE}\r\n'.encode()
+                + f'Content-Length: {len(body)}\r\n'.encode()
+                + b'Connection: close\r\n\r\n'
+                + body
+            )
+            await writer.drain()
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
+
+
+# Метрики слушателя Binance
+listener = Registry()
+FRAMES_RECEIVED = Counter(
+    'binance_frames_received_total',
+    'Кадров получено из WebSocket Binance', listener,
+)
+TICKS_PARSED = Counter(
+    'binance_ticks_parsed_total', 'Тиков разобрано из кадров', listener,
+)
+PARSE_FAILURES = Counter(
+    'binance_parse_failures_total', 'Кадров, которые не удалось разобрать',
+    listener,
+)
+RECONNECTS = Counter(
+    'binance_reconnects_total', 'Переподключений к WebSocket', listener,
+)
+QUEUE_DEPTH = Gauge(
+    'binance_queue_depth', 'Тиков в очереди до сброса в БД', listener,
+)
+QUEUE_DROPPED = Counter(
+    'binance_queue_dropped_total',
+    'Тиков отброшено при переполнении очереди', listener,
+)
+FLUSH_SECONDS = Histogram(
+    'binance_flush_duration_seconds', 'Длительность записи сброса в БД',
+    listener,
+)
+FLUSH_ROWS = Histogram(
+    'binance_flush_rows', 'Строк в одном сбросе', listener,
+    buckets=ROWS_BUCKETS,
+)
+BROADCAST_LATENCY = Histogram(
+    'binance_event_to_broadcast_seconds',
+    'Задержка от времени события на бирже до рассылки в WebSocket',
+    listener,
+)
+
+# Метрики веб-процесса
+web = Registry()
+WS_CONNECTIONS = Gauge(
+    'tickers_ws_connections', 'Активных подключений TickerConsumer', web,
+)
+WS_SEND_SECONDS = Histogram(
+    'tickers_ws_send_seconds', 'Длительность отправки кадра клиенту', web,
+)
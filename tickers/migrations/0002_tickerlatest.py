@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:41
+
+from django.db import migrations, models
+
+
+def fill_latest(apps, schema_editor):
+    """Заполняет TickerLatest последними ценами из истории"""
+    TickerPrice = apps.get_model('tickers', 'TickerPrice')
+    TickerLatest = apps.get_model('tickers', 'TickerLatest')
+    symbols = TickerPrice.objects.order_by('symbol').values_list(
+        'symbol', flat=True
+    ).distinct()
+    latest = []
+    for symbol in symbols:
+        ticker = TickerPrice.objects.filter(symbol=symbol).order_by(
+            '-event_time', '-id'
+        ).first()
+        latest.append(TickerLatest(
+            symbol=ticker.symbol,
+            history_id=ticker.id,
+            price=ticker.price,
+            event_time=ticker.event_time,
+            received_at=ticker.received_at,
+        ))
+    TickerLatest.objects.bulk_create(latest)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickers', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TickerLatest',
+            fields=[
+                ('symbol', models.CharField(max_length=20, primary_key=True, serialize=False)),
+                ('history_id', models.BigIntegerField(null=True)),
+                ('price', models.DecimalField(decimal_places=8, max_digits=20)),
+                ('event_time', models.DateTimeField()),
+                ('received_at', models.DateTimeField()),
+            ],
+            options={
+                'ordering': ['-event_time'],
+            },
+        ),
+        migrations.RunPython(fill_latest, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickers', '0002_tickerlatest'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TickerCandle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('symbol', models.CharField(max_length=20)),
+                ('interval', models.CharField(choices=[('1m', '1 минута'), ('1h', '1 час'), ('1d', '1 день')], max_length=3)),
+                ('open_time', models.DateTimeField()),
+                ('open', models.DecimalField(decimal_places=8, max_digits=20)),
+                ('high', models.DecimalField(decimal_places=8, max_digits=20)),
+                ('low', models.DecimalField(decimal_places=8, max_digits=20)),
+                ('close', models.DecimalField(decimal_places=8, max_digits=20)),
+                ('count', models.PositiveIntegerField()),
+                ('first_event_time', models.DateTimeField()),
+                ('last_event_time', models.DateTimeField()),
+                ('closed', models.BooleanField(default=False)),
+            ],
+            options={
+                'ordering': ['symbol', 'interval', 'open_time'],
+                'indexes': [models.Index(condition=models.Q(('closed', False)), fields=['interval', 'open_time'], name='tickers_candle_open_idx')],
+                'constraints': [models.UniqueConstraint(fields=('symbol', 'interval', 'open_time'), name='tickers_candle_symbol_interval_open_time')],
+            },
+        ),
+    ]
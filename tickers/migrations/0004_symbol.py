@@ -0,0 +1,74 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:05
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.functions import Cast, Round
+
+# Строк истории на один UPDATE при переносе
+FILL_CHUNK = 100000
+PRICE_SCALE = 8
+
+
+def fill_symbols(apps, schema_editor):
+    """
+    Создает символы из истории цен и переносит в строки истории ссылку
+    на символ и цену в целых единицах (масштаб 8, как у DecimalField).
+    """
+    Symbol = apps.get_model('tickers', 'Symbol')
+    TickerPrice = apps.get_model('tickers', 'TickerPrice')
+    names = TickerPrice.objects.order_by('symbol').values_list(
+        'symbol', flat=True
+    ).distinct()
+    Symbol.objects.bulk_create(
+        [Symbol(name=name, price_scale=PRICE_SCALE) for name in names],
+        ignore_conflicts=True,
+    )
+    last = TickerPrice.objects.order_by('-id').values_list(
+        'id', flat=True
+    ).first() or 0
+    for start in range(0, last + 1, FILL_CHUNK):
+        TickerPrice.objects.filter(
+            id__gte=start, id__lt=start + FILL_CHUNK
+        ).update(
+            symbol_ref=Subquery(
+                Symbol.objects.filter(name=OuterRef('symbol')).values('id')
+            ),
+            price_units=Cast(
+                Round(F('price') * 10 ** PRICE_SCALE),
+                models.BigIntegerField(),
+            ),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickers', '0003_tickercandle'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Symbol',
+            fields=[
+                ('id', models.SmallAutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=20, unique=True)),
+                ('price_scale', models.PositiveSmallIntegerField(default=8, validators=[django.core.validators.MaxValueValidator(8)])),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='tickerprice',
+            name='symbol_ref',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='prices', to='tickers.symbol'),
+        ),
+        migrations.AddField(
+            model_name='tickerprice',
+            name='price_units',
+            field=models.BigIntegerField(null=True),
+        ),
+        migrations.RunPython(fill_symbols, migrations.RunPython.noop),
+    ]
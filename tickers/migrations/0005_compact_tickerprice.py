@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickers', '0004_symbol'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='tickerprice',
+            name='tickers_tic_symbol_840df6_idx',
+        ),
+        migrations.RemoveField(
+            model_name='tickerprice',
+            name='symbol',
+        ),
+        migrations.RemoveField(
+            model_name='tickerprice',
+            name='price',
+        ),
+        migrations.RemoveField(
+            model_name='tickerprice',
+            name='received_at',
+        ),
+        migrations.RenameField(
+            model_name='tickerprice',
+            old_name='symbol_ref',
+            new_name='symbol',
+        ),
+        migrations.AlterField(
+            model_name='tickerprice',
+            name='symbol',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='prices', to='tickers.symbol'),
+        ),
+        migrations.AlterField(
+            model_name='tickerprice',
+            name='price_units',
+            field=models.BigIntegerField(),
+        ),
+        migrations.AddIndex(
+            model_name='tickerprice',
+            index=models.Index(fields=['symbol', 'event_time'], name='tickers_price_symbol_time'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:10
+
+from django.db import migrations, models, transaction
+from django.db.models import Exists, Max, Min, OuterRef
+
+# Копия tickers.dedup.delete_duplicates на момент миграции: миграция
+# не должна зависеть от кода приложения, который может измениться
+DEDUP_CHUNK = 50000
+
+
+def remove_duplicates(apps, schema_editor):
+    """
+    Удаляет оставшиеся повторы перед созданием уникального ограничения.
+    Миграция неатомарна, поэтому каждый диапазон id фиксируется своей
+    транзакцией и не держит блокировки до конца миграции.
+    """
+    TickerPrice = apps.get_model('tickers', 'TickerPrice')
+    bounds = TickerPrice.objects.aggregate(first=Min('id'), last=Max('id'))
+    if bounds['first'] is None:
+        return
+    newer = TickerPrice.objects.filter(
+        symbol=OuterRef('symbol'),
+        event_time=OuterRef('event_time'),
+        id__gt=OuterRef('id'),
+    )
+    for start in range(bounds['first'], bounds['last'] + 1, DEDUP_CHUNK):
+        with transaction.atomic():
+            TickerPrice.objects.filter(
+                id__gte=start, id__lt=start + DEDUP_CHUNK
+            ).filter(Exists(newer)).delete()
+
+
+class Migration(migrations.Migration):
+    # Без общей транзакции: на PostgreSQL части удаления повторов иначе
+    # стали бы точками сохранения одной долгой транзакции вместе
+    # с построением уникального индекса
+    atomic = False
+
+    dependencies = [
+        ('tickers', '0005_compact_tickerprice'),
+    ]
+
+    # Ограничение создается до удаления старого индекса: если в историю
+    # успели попасть новые повторы, миграция падает с прежним индексом
+    # и ее можно запустить снова
+    operations = [
+        migrations.RunPython(remove_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='tickerprice',
+            constraint=models.UniqueConstraint(fields=('symbol', 'event_time'), name='tickers_price_symbol_time_uniq'),
+        ),
+        migrations.RemoveIndex(
+            model_name='tickerprice',
+            name='tickers_price_symbol_time',
+        ),
+    ]
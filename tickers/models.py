@@ -1,18 +1,171 @@
+from decimal import Decimal
+
+from django.core.validators import MaxValueValidator
 from django.db import models
+from django.db.models import F
+
+# Наибольшее число знаков после запятой в цене, как у цен Binance
+PRICE_SCALE = 8
+
+
+class Symbol(models.Model):
+    """
+    Справочник символов: история цен ссылается на символ по id
+    (smallint), а не повторяет строку в каждой строке.
+    Цены символа хранятся целыми числами price * 10 ** price_scale.
+    Масштаб намеренно один для всех символов — PRICE_SCALE (шаг 1e-8),
+    а не tickSize символа из exchangeInfo: Binance отдает цены
+    с 8 знаками и может уменьшить tickSize, а при шаге 1e-8 цена
+    хранится без потерь при любом tickSize. BigIntegerField вмещает
+    цены до 9 * 10 ** 10 при таком шаге. Поле оставлено для символов
+    с меньшей точностью; после записи цен масштаб не меняется.
+    """
+    id = models.SmallAutoField(primary_key=True)
+    name = models.CharField(max_length=20, unique=True)
+    price_scale = models.PositiveSmallIntegerField(
+        default=PRICE_SCALE, validators=[MaxValueValidator(PRICE_SCALE)]
+    )
+
+    class Meta:
+        ordering = ['name']
+
+    def to_units(self, price):
+        """Цена в целых единицах шага; лишние знаки округляются"""
+        units = Decimal(str(price)).scaleb(self.price_scale)
+        return int(units.to_integral_value())
+
+    def __str__(self):
+        return self.name
+
+
+def units_to_price(units, scale):
+    """
+    Цена из целых единиц шага с масштабом scale в Decimal с PRICE_SCALE
+    знаками после запятой — в том же виде, что давал DecimalField(20, 8)
+    """
+    return Decimal(units * 10 ** (PRICE_SCALE - scale)).scaleb(-PRICE_SCALE)
 
 
 class TickerPrice(models.Model):
-    """Модель для хранения цен тикеров"""
-    symbol = models.CharField(max_length=20, db_index=True)
-    price = models.DecimalField(max_digits=20, decimal_places=8)
+    """
+    Модель для хранения цен тикеров.
+    Символ — ссылка на Symbol, цена — целое число в единицах шага
+    цены символа (см. Symbol.price_scale).
+    """
+    symbol = models.ForeignKey(
+        Symbol,
+        on_delete=models.PROTECT,
+        related_name='prices',
+        # Поиск по символу покрывает уникальный индекс (symbol, event_time)
+        db_index=False,
+    )
+    price_units = models.BigIntegerField()
     event_time = models.DateTimeField(db_index=True)
-    received_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ['-event_time']
-        indexes = [
-            models.Index(fields=['symbol', 'event_time']),
+        constraints = [
+            # Слушатель пропускает уже сохраненные цены по этому ключу
+            models.UniqueConstraint(
+                fields=['symbol', 'event_time'],
+                name='tickers_price_symbol_time_uniq',
+            ),
         ]
 
+    @property
+    def price(self):
+        return units_to_price(self.price_units, self.symbol.price_scale)
+
     def __str__(self):
         return f"{self.symbol}: {self.price} @ {self.event_time}"
+
+
+def price_values(queryset, fields):
+    """
+    values() истории цен для полей fields, среди которых могут быть
+    symbol (имя символа) и price (Decimal). Имя и цена собираются
+    из строки функцией price_row.
+    """
+    columns = [field for field in fields if field not in ('symbol', 'price')]
+    return queryset.values(
+        *columns,
+        'price_units',
+        symbol_name=F('symbol__name'),
+        price_scale=F('symbol__price_scale'),
+    )
+
+
+def price_row(row, fields):
+    """Строка price_values в виде {поле: значение} в порядке fields"""
+    values = {
+        **row,
+        'symbol': row['symbol_name'],
+        'price': units_to_price(row['price_units'], row['price_scale']),
+    }
+    return {field: values[field] for field in fields}
+
+
+class TickerLatest(models.Model):
+    """
+    Последняя цена каждого тикера.
+    Обновляется слушателем в той же транзакции, что и история цен.
+    """
+    symbol = models.CharField(max_length=20, primary_key=True)
+    history_id = models.BigIntegerField(null=True)
+    price = models.DecimalField(max_digits=20, decimal_places=8)
+    event_time = models.DateTimeField()
+    received_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-event_time']
+
+    def __str__(self):
+        return f"{self.symbol}: {self.price} @ {self.event_time}"
+
+
+class TickerCandle(models.Model):
+    """
+    Свеча OHLC символа за интервал 1m/1h/1d.
+    Текущая свеча обновляется слушателем при каждом сбросе
+    и закрывается, когда заканчивается ее интервал.
+    """
+    INTERVAL_CHOICES = [
+        ('1m', '1 минута'),
+        ('1h', '1 час'),
+        ('1d', '1 день'),
+    ]
+
+    symbol = models.CharField(max_length=20)
+    interval = models.CharField(max_length=3, choices=INTERVAL_CHOICES)
+    open_time = models.DateTimeField()
+    open = models.DecimalField(max_digits=20, decimal_places=8)
+    high = models.DecimalField(max_digits=20, decimal_places=8)
+    low = models.DecimalField(max_digits=20, decimal_places=8)
+    close = models.DecimalField(max_digits=20, decimal_places=8)
+    count = models.PositiveIntegerField()
+    first_event_time = models.DateTimeField()
+    last_event_time = models.DateTimeField()
+    closed = models.BooleanField(default=False)
+
+    class Meta:
+        ordering = ['symbol', 'interval', 'open_time']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['symbol', 'interval', 'open_time'],
+                name='tickers_candle_symbol_interval_open_time',
+            ),
+        ]
+        indexes = [
+            # Поиск незакрытых свечей при каждом сбросе
+            models.Index(
+                fields=['interval', 'open_time'],
+                condition=models.Q(closed=False),
+                name='tickers_candle_open_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return (
+            f"{self.symbol} {self.interval} @ {self.open_time}: "
+            f"{self.open}/{self.high}/{self.low}/{self.close}"
+        )
@@ -0,0 +1,69 @@
+import base64
+import binascii
+import json
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+DEFAULT_LIMIT = 1000
+MAX_LIMIT = 10000
+
+
+class InvalidCursor(ValueError):
+    """Курсор страницы поврежден или подделан"""
+
+
+def encode_cursor(event_time, pk):
+    """Кодирует позицию (event_time, id) в непрозрачный токен"""
+    raw = json.dumps([event_time.isoformat(), pk]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Декодирует токен курсора в (event_time, id)"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        event_time, pk = json.loads(raw)
+        event_time = parse_datetime(event_time)
+    except (binascii.Error, TypeError, ValueError):
+        raise InvalidCursor(token)
+    if event_time is None or not isinstance(pk, int):
+        raise InvalidCursor(token)
+    return event_time, pk
+
+
+def keyset_page(queryset, cursor=None, limit=DEFAULT_LIMIT):
+    """
+    Возвращает страницу строк .values() в порядке (-event_time, -id)
+    и токен следующей страницы (None, если страница последняя).
+    Позиция задается ключом, а не смещением, поэтому стоимость запроса
+    не растет с номером страницы.
+    """
+    rows = list(_page_queryset(queryset, cursor, limit))
+    return _finish_page(rows, limit)
+
+
+async def akeyset_page(queryset, cursor=None, limit=DEFAULT_LIMIT):
+    """Асинхронный keyset_page: страница читается через async ORM"""
+    rows = [row async for row in _page_queryset(queryset, cursor, limit)]
+    return _finish_page(rows, limit)
+
+
+def _page_queryset(queryset, cursor, limit):
+    """Выборка страницы после курсора с одной лишней строкой"""
+    queryset = queryset.order_by('-event_time', '-id')
+    if cursor:
+        event_time, pk = decode_cursor(cursor)
+        queryset = queryset.filter(event_time__lte=event_time).filter(
+            Q(event_time__lt=event_time) | Q(event_time=event_time, id__lt=pk)
+        )
+    return queryset[:limit + 1]
+
+
+def _finish_page(rows, limit):
+    """Отрезает лишнюю строку и кодирует курсор следующей страницы"""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last['event_time'], last['id'])
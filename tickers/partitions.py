@@ -0,0 +1,249 @@
+"""
+Секционирование таблицы истории цен по event_time на PostgreSQL.
+
+Таблица TickerPrice превращается в секционированную по диапазонам
+event_time (по месяцам или по дням) командой ticker_partitions.
+Будущие секции создаются заранее, а устаревшие отсоединяются
+или удаляются целиком вместо DELETE по строкам.
+"""
+import re
+from datetime import datetime, timedelta, timezone
+
+from django.utils.dateparse import parse_datetime
+
+from .models import TickerPrice
+
+PERIOD_MONTH = 'month'
+PERIOD_DAY = 'day'
+PERIODS = (PERIOD_MONTH, PERIOD_DAY)
+
+BOUNDS_RE = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+
+class PartitioningError(Exception):
+    """Операция с секциями невозможна в текущем состоянии БД"""
+
+
+def history_table():
+    """Имя таблицы истории цен"""
+    return TickerPrice._meta.db_table
+
+
+def period_start(moment, period):
+    """Начало периода (месяца или дня), в который попадает moment"""
+    moment = moment.astimezone(timezone.utc)
+    day = 1 if period == PERIOD_MONTH else moment.day
+    return datetime(moment.year, moment.month, day, tzinfo=timezone.utc)
+
+
+def next_period(start, period):
+    """Начало периода, следующего за периодом, начинающимся в start"""
+    if period == PERIOD_MONTH:
+        if start.month == 12:
+            return start.replace(year=start.year + 1, month=1)
+        return start.replace(month=start.month + 1)
+    return start + timedelta(days=1)
+
+
+def partition_name(table, start, period):
+    """Имя секции: tickers_tickerprice_p202506 или ..._p20250601"""
+    suffix = '%Y%m' if period == PERIOD_MONTH else '%Y%m%d'
+    return f'{table}_p{start.strftime(suffix)}'
+
+
+def parse_bounds(expression):
+    """
+    Разбирает границы секции из pg_get_expr(relpartbound).
+    Возвращает (start, end) или None для секции DEFAULT.
+    """
+    match = BOUNDS_RE.search(expression)
+    if not match:
+        return None
+    return parse_datetime(match.group(1)), parse_datetime(match.group(2))
+
+
+def is_partitioned(cursor, table):
+    cursor.execute(
+        'SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass',
+        [table],
+    )
+    return cursor.fetchone() is not None
+
+
+def list_partitions(cursor, table):
+    """Возвращает секции таблицы: [(имя, начало, конец)], без DEFAULT"""
+    cursor.execute(
+        'SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) '
+        'FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid '
+        'WHERE i.inhparent = %s::regclass ORDER BY c.relname',
+        [table],
+    )
+    partitions = []
+    for name, expression in cursor.fetchall():
+        bounds = parse_bounds(expression)
+        if bounds:
+            partitions.append((name, *bounds))
+    return partitions
+
+
+def create_partition(cursor, table, start, end, name):
+    """
+    Создает секцию [start, end). Строки этого диапазона, попавшие
+    в секцию DEFAULT, переносятся в новую секцию.
+    """
+    default = f'{table}_default'
+    cursor.execute(f'CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS)')
+    cursor.execute(
+        f'WITH moved AS (DELETE FROM {default} '
+        'WHERE event_time >= %s AND event_time < %s RETURNING *) '
+        f'INSERT INTO {name} SELECT * FROM moved',
+        [start, end],
+    )
+    cursor.execute(
+        f'ALTER TABLE {table} ATTACH PARTITION {name} '
+        'FOR VALUES FROM (%s) TO (%s)',
+        [start, end],
+    )
+
+
+def ensure_partitions(cursor, table, period, until):
+    """
+    Создает недостающие секции от текущего периода до периода,
+    в который попадает until. Возвращает имена созданных секций.
+    """
+    _check_partitioned(cursor, table)
+    existing = list_partitions(cursor, table)
+    created = []
+    start = period_start(datetime.now(timezone.utc), period)
+    while start <= until:
+        end = next_period(start, period)
+        overlaps = any(
+            start < existing_end and existing_start < end
+            for _, existing_start, existing_end in existing
+        )
+        if not overlaps:
+            name = partition_name(table, start, period)
+            create_partition(cursor, table, start, end, name)
+            created.append(name)
+        start = end
+    return created
+
+
+def expire_partitions(cursor, table, before, drop=False):
+    """
+    Отсоединяет (или удаляет при drop) секции, целиком лежащие
+    раньше before. Возвращает имена обработанных секций.
+    """
+    _check_partitioned(cursor, table)
+    expired = []
+    for name, _, end in list_partitions(cursor, table):
+        if end > before:
+            continue
+        cursor.execute(f'ALTER TABLE {table} DETACH PARTITION {name}')
+        if drop:
+            cursor.execute(f'DROP TABLE {name}')
+        expired.append(name)
+    return expired
+
+
+def convert_to_partitioned(cursor, table, period, until, keep_legacy=False):
+    """
+    Превращает обычную таблицу истории в секционированную по event_time.
+    Имена индексов и первичного ключа сохраняются, чтобы миграции
+    Django продолжали работать; первичный ключ становится
+    (id, event_time), так как должен включать ключ секционирования.
+    Значения id выдает новая последовательность, продолжающая старую.
+    Уникальные ограничения и внешние ключи (ссылка на Symbol) создаются
+    заново с прежними именами после переноса строк, а их индексы
+    не копируются отдельно.
+    """
+    if is_partitioned(cursor, table):
+        raise PartitioningError(f'Таблица {table} уже секционирована')
+    sequence = f'{table}_id_part_seq'
+    legacy = f'{table}_legacy'
+    cursor.execute(
+        'SELECT indexname, indexdef FROM pg_indexes '
+        'WHERE tablename = %s AND indexname NOT IN ('
+        'SELECT i.relname FROM pg_constraint c '
+        'JOIN pg_class i ON i.oid = c.conindid '
+        "WHERE c.conrelid = %s::regclass AND c.contype IN ('p', 'u'))",
+        [table, table],
+    )
+    indexes = cursor.fetchall()
+    # Уникальные ограничения создаются раньше внешних ключей
+    cursor.execute(
+        'SELECT conname, contype, pg_get_constraintdef(oid) '
+        'FROM pg_constraint '
+        "WHERE conrelid = %s::regclass AND contype IN ('f', 'u') "
+        'ORDER BY contype DESC, conname',
+        [table],
+    )
+    constraints = cursor.fetchall()
+    cursor.execute('SELECT MIN(event_time) FROM ' + table)
+    first = cursor.fetchone()[0]
+
+    cursor.execute(f'ALTER TABLE {table} RENAME TO {legacy}')
+    cursor.execute(
+        f'ALTER TABLE {legacy} RENAME CONSTRAINT {table}_pkey '
+        f'TO {legacy}_pkey'
+    )
+    for name, _ in indexes:
+        cursor.execute(f'ALTER INDEX {name} RENAME TO {name}_legacy')
+    # Имя уникального ограничения занято его индексом
+    for name, kind, _ in constraints:
+        if kind == 'u':
+            cursor.execute(
+                f'ALTER TABLE {legacy} RENAME CONSTRAINT {name} '
+                f'TO {name}_legacy'
+            )
+
+    cursor.execute(
+        f'CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS) '
+        'PARTITION BY RANGE (event_time)'
+    )
+    cursor.execute(
+        f'CREATE SEQUENCE {sequence} AS bigint OWNED BY {table}.id'
+    )
+    cursor.execute(
+        f"ALTER TABLE {table} ALTER COLUMN id "
+        f"SET DEFAULT nextval('{sequence}')"
+    )
+    cursor.execute(
+        f'ALTER TABLE {table} ADD CONSTRAINT {table}_pkey '
+        'PRIMARY KEY (id, event_time)'
+    )
+    for _, definition in indexes:
+        cursor.execute(definition)
+    cursor.execute(
+        f'CREATE TABLE {table}_default PARTITION OF {table} DEFAULT'
+    )
+
+    start = period_start(first or datetime.now(timezone.utc), period)
+    until = max(until, start)
+    while start <= until:
+        end = next_period(start, period)
+        cursor.execute(
+            f'CREATE TABLE {partition_name(table, start, period)} '
+            f'PARTITION OF {table} FOR VALUES FROM (%s) TO (%s)',
+            [start, end],
+        )
+        start = end
+
+    cursor.execute(f'INSERT INTO {table} SELECT * FROM {legacy}')
+    for name, _, definition in constraints:
+        cursor.execute(
+            f'ALTER TABLE {table} ADD CONSTRAINT {name} {definition}'
+        )
+    cursor.execute(
+        f"SELECT setval('{sequence}', COALESCE(MAX(id), 0) + 1, false) "
+        f'FROM {table}'
+    )
+    if not keep_legacy:
+        cursor.execute(f'DROP TABLE {legacy}')
+
+
+def _check_partitioned(cursor, table):
+    if not is_partitioned(cursor, table):
+        raise PartitioningError(
+            f'Таблица {table} не секционирована, выполните --convert'
+        )
@@ -0,0 +1,365 @@
+import csv
+import io
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .cache import invalidate_candles, publish_version
+from .candles import INTERVALS, ROLLUP_INTERVALS, bucket_start
+from .models import Symbol, TickerCandle, TickerLatest, TickerPrice
+
+DEFAULT_BATCH_SIZE = 1000
+
+HISTORY_COLUMNS = ('symbol', 'price_units', 'event_time')
+# Повторы пропускаются по уникальному ключу (symbol, event_time)
+_SKIP_CONFLICTS_SQL = (
+    'ON CONFLICT (symbol_id, event_time) DO NOTHING '
+    'RETURNING id, symbol_id, event_time'
+)
+
+
+class TickerWriter:
+    """
+    Пакетная запись цен тикеров в БД.
+    Весь сброс выполняется в одной транзакции: история цен вставляется
+    через INSERT ... ON CONFLICT DO NOTHING (или COPY на PostgreSQL при
+    use_copy), а таблица последних цен и текущие свечи обновляются
+    upsert'ами. Цены с уже сохраненной парой (symbol, event_time)
+    пропускаются, поэтому повторная запись тех же тиков (после
+    переподключения, дозагрузки или со второго слушателя) ничего
+    не меняет.
+    """
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, use_copy=False):
+        self.batch_size = batch_size
+        self.use_copy = use_copy
+        # Символы, уже сохраненные в БД: name -> Symbol
+        self._symbols = {}
+
+    def write(self, rows):
+        """
+        Сохраняет строки (symbol, price, event_time) одной транзакцией.
+        Возвращает количество новых строк истории.
+        """
+        rows = list(rows)
+        if not rows:
+            return 0
+        received_at = timezone.now()
+        with transaction.atomic():
+            symbols = self.get_symbols({symbol for symbol, _, _ in rows})
+            tickers = {}
+            for symbol, price, event_time in rows:
+                ticker = TickerPrice(
+                    symbol=symbols[symbol],
+                    price_units=symbols[symbol].to_units(price),
+                    event_time=event_time,
+                )
+                tickers.setdefault(_key(ticker), ticker)
+            if self.use_copy and connection.vendor == 'postgresql':
+                inserted = self._copy(tickers)
+            else:
+                inserted = self._insert(tickers)
+            # Свечи и последние цены обновляются только новыми строками,
+            # чтобы повторные тики не учитывались в свечах дважды
+            self._upsert_latest(inserted, received_at)
+            self._upsert_candles(inserted)
+            self.close_candles()
+            if inserted:
+                # Новая версия данных для ETag ответов REST API
+                transaction.on_commit(publish_version)
+        return len(inserted)
+
+    def get_symbols(self, names):
+        """
+        Возвращает {name: Symbol} для имен names, создавая недостающие
+        символы. Найденные символы запоминаются после фиксации
+        транзакции, чтобы откаченные символы не попали в память.
+        """
+        missing = names - self._symbols.keys()
+        if not missing:
+            return self._symbols
+        Symbol.objects.bulk_create(
+            [Symbol(name=name) for name in missing], ignore_conflicts=True
+        )
+        found = {
+            symbol.name: symbol
+            for symbol in Symbol.objects.filter(name__in=missing)
+        }
+        transaction.on_commit(lambda: self._symbols.update(found))
+        return {**self._symbols, **found}
+
+    def _insert(self, tickers):
+        """
+        Вставляет строки {ключ: TickerPrice} пачками batch_size через
+        INSERT ... ON CONFLICT DO NOTHING RETURNING. Возвращает
+        вставленные строки с заполненным id.
+        """
+        fields = [
+            TickerPrice._meta.get_field(name) for name in HISTORY_COLUMNS
+        ]
+        row = '(' + ', '.join(['%s'] * len(fields)) + ')'
+        batch_size = min(
+            self.batch_size,
+            connection.ops.bulk_batch_size(fields, list(tickers)),
+        )
+        keys = list(tickers)
+        inserted = []
+        for start in range(0, len(keys), batch_size):
+            batch = keys[start:start + batch_size]
+            params = [
+                field.get_db_prep_save(
+                    getattr(tickers[key], field.attname), connection
+                )
+                for key in batch
+                for field in fields
+            ]
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'{_insert_history_sql()} '
+                    f'VALUES {", ".join([row] * len(batch))} '
+                    f'{_SKIP_CONFLICTS_SQL}',
+                    params,
+                )
+                inserted.extend(_returned(tickers, cursor.fetchall()))
+        return inserted
+
+    def _copy(self, tickers):
+        """
+        Загрузка строк через COPY ... FROM STDIN пачками batch_size
+        во временную таблицу и перенос в историю одним
+        INSERT ... SELECT ... ON CONFLICT DO NOTHING RETURNING.
+        Возвращает вставленные строки с заполненным id.
+        """
+        staging = _quote(f'{TickerPrice._meta.db_table}_copy')
+        columns = ', '.join(_quote(column) for column in _history_columns())
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TEMPORARY TABLE IF NOT EXISTS {staging} '
+                f'ON COMMIT DELETE ROWS AS SELECT {columns} '
+                f'FROM {_quote(TickerPrice._meta.db_table)} WITH NO DATA'
+            )
+            sql = (
+                f'COPY {staging} ({columns}) '
+                'FROM STDIN WITH (FORMAT csv)'
+            )
+            values = list(tickers.values())
+            for start in range(0, len(values), self.batch_size):
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                for ticker in values[start:start + self.batch_size]:
+                    writer.writerow([
+                        ticker.symbol_id,
+                        ticker.price_units,
+                        ticker.event_time.isoformat(),
+                    ])
+                buffer.seek(0)
+                cursor.copy_expert(sql, buffer)
+            cursor.execute(
+                f'{_insert_history_sql()} SELECT {columns} FROM {staging} '
+                f'{_SKIP_CONFLICTS_SQL}'
+            )
+            # Временная таблица очищается при фиксации транзакции сброса
+            return list(_returned(tickers, cursor.fetchall()))
+
+    def _upsert_latest(self, tickers, received_at):
+        """
+        Обновляет TickerLatest через INSERT ... ON CONFLICT DO UPDATE.
+        Более старые цены (например, при дозагрузке истории)
+        не перезаписывают более новые.
+        """
+        latest = {}
+        for ticker in tickers:
+            current = latest.get(ticker.symbol.name)
+            if current is None or ticker.event_time >= current.event_time:
+                latest[ticker.symbol.name] = ticker
+        table = _quote(TickerLatest._meta.db_table)
+        self._upsert(
+            [
+                TickerLatest(
+                    symbol=symbol,
+                    history_id=ticker.pk,
+                    price=ticker.price,
+                    event_time=ticker.event_time,
+                    received_at=received_at,
+                )
+                for symbol, ticker in latest.items()
+            ],
+            conflict_fields=['symbol'],
+            updates={
+                column: f'excluded.{_quote(column)}'
+                for column in (
+                    'history_id', 'price', 'event_time', 'received_at'
+                )
+            },
+            where=f'excluded.event_time >= {table}.event_time',
+        )
+
+    def _upsert_candles(self, tickers):
+        """
+        Обновляет текущие свечи TickerCandle ценами сброса.
+        Цены сначала сворачиваются в свечи в памяти, затем каждая свеча
+        объединяется с уже сохраненной одним upsert.
+        Если цены попали в уже закрытые интервалы, после фиксации
+        транзакции сбрасывается кэш закрытых свечей их символов.
+        """
+        candles = {}
+        for ticker in tickers:
+            symbol = ticker.symbol.name
+            price = ticker.price
+            for interval in ROLLUP_INTERVALS:
+                open_time = bucket_start(ticker.event_time, interval)
+                candle = candles.get((symbol, interval, open_time))
+                if candle is None:
+                    candles[symbol, interval, open_time] = TickerCandle(
+                        symbol=symbol,
+                        interval=interval,
+                        open_time=open_time,
+                        open=price,
+                        high=price,
+                        low=price,
+                        close=price,
+                        count=1,
+                        first_event_time=ticker.event_time,
+                        last_event_time=ticker.event_time,
+                        closed=False,
+                    )
+                    continue
+                if ticker.event_time < candle.first_event_time:
+                    candle.open = price
+                    candle.first_event_time = ticker.event_time
+                if ticker.event_time >= candle.last_event_time:
+                    candle.close = price
+                    candle.last_event_time = ticker.event_time
+                candle.high = max(candle.high, price)
+                candle.low = min(candle.low, price)
+                candle.count += 1
+
+        table = _quote(TickerCandle._meta.db_table)
+
+        def pick(column, condition):
+            column = _quote(column)
+            return (
+                f'CASE WHEN {condition} THEN excluded.{column} '
+                f'ELSE {table}.{column} END'
+            )
+
+        earlier = f'excluded.first_event_time < {table}.first_event_time'
+        later = f'excluded.last_event_time >= {table}.last_event_time'
+        self._upsert(
+            list(candles.values()),
+            conflict_fields=['symbol', 'interval', 'open_time'],
+            updates={
+                'open': pick('open', earlier),
+                'first_event_time': pick('first_event_time', earlier),
+                'close': pick('close', later),
+                'last_event_time': pick('last_event_time', later),
+                'high': pick('high', f'excluded.high > {table}.high'),
+                'low': pick('low', f'excluded.low < {table}.low'),
+                'count': f'{table}.{_quote("count")} + excluded.'
+                         f'{_quote("count")}',
+            },
+        )
+
+        # Закрытые свечи всех интервалов, в том числе считаемых
+        # по истории, могли попасть в кэш ответов API
+        now = timezone.now()
+        closed_before = {
+            interval: bucket_start(now, interval) for interval in INTERVALS
+        }
+        stale = {
+            (ticker.symbol.name, interval)
+            for ticker in tickers
+            for interval, current in closed_before.items()
+            if ticker.event_time < current
+        }
+        if stale:
+            transaction.on_commit(lambda: invalidate_candles(stale))
+
+    def close_candles(self, now=None):
+        """
+        Закрывает свечи, интервал которых уже закончился.
+        Возвращает количество закрытых свечей.
+        """
+        now = now or timezone.now()
+        closed = 0
+        for interval in ROLLUP_INTERVALS:
+            closed += TickerCandle.objects.filter(
+                interval=interval,
+                closed=False,
+                open_time__lt=bucket_start(now, interval),
+            ).update(closed=True)
+        return closed
+
+    def _upsert(self, objs, conflict_fields, updates, where=None):
+        """
+        Вставляет объекты одной модели через INSERT ... ON CONFLICT
+        DO UPDATE пачками batch_size. updates задает SQL-выражения
+        для обновляемых столбцов, where — условие обновления.
+        """
+        if not objs:
+            return
+        opts = objs[0]._meta
+        fields = [
+            field for field in opts.concrete_fields
+            if field is not opts.auto_field
+        ]
+        columns = ', '.join(_quote(field.column) for field in fields)
+        row = '(' + ', '.join(['%s'] * len(fields)) + ')'
+        conflict = ', '.join(_quote(name) for name in conflict_fields)
+        assignments = ', '.join(
+            f'{_quote(column)} = {expression}'
+            for column, expression in updates.items()
+        )
+        batch_size = min(
+            self.batch_size, connection.ops.bulk_batch_size(fields, objs)
+        )
+        for start in range(0, len(objs), batch_size):
+            batch = objs[start:start + batch_size]
+            params = [
+                field.get_db_prep_save(getattr(obj, field.attname), connection)
+                for obj in batch
+                for field in fields
+            ]
+            sql = (
+                f'INSERT INTO {_quote(opts.db_table)} ({columns}) '
+                f'VALUES {", ".join([row] * len(batch))} '
+                f'ON CONFLICT ({conflict}) DO UPDATE SET {assignments}'
+            )
+            if where:
+                sql += f' WHERE {where}'
+            with connection.cursor() as cursor:
+                cursor.execute(sql, params)
+
+
+def _quote(name):
+    return connection.ops.quote_name(name)
+
+
+def _history_columns():
+    return [
+        TickerPrice._meta.get_field(name).column for name in HISTORY_COLUMNS
+    ]
+
+
+def _insert_history_sql():
+    columns = ', '.join(_quote(column) for column in _history_columns())
+    return f'INSERT INTO {_quote(TickerPrice._meta.db_table)} ({columns})'
+
+
+def _key(ticker):
+    """Ключ (symbol_id, event_time) строки истории"""
+    return _db_key(ticker.symbol_id, ticker.event_time)
+
+
+def _db_key(symbol_id, event_time):
+    # Время приводится к виду БД: так совпадают время строки
+    # и время из RETURNING (на SQLite — без зоны)
+    return symbol_id, connection.ops.adapt_datetimefield_value(event_time)
+
+
+def _returned(tickers, rows):
+    """Строки tickers, вставленные в БД, по результату RETURNING"""
+    for pk, symbol_id, event_time in rows:
+        ticker = tickers[_db_key(symbol_id, event_time)]
+        ticker.pk = pk
+        yield ticker
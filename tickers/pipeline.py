@@ -0,0 +1,108 @@
+import asyncio
+import random
+
+OVERFLOW_BLOCK = 'block'
+OVERFLOW_DROP_OLDEST = 'drop-oldest'
+OVERFLOW_DROP_NEWEST = 'drop-newest'
+OVERFLOW_POLICIES = (
+    OVERFLOW_BLOCK, OVERFLOW_DROP_OLDEST, OVERFLOW_DROP_NEWEST
+)
+
+DEFAULT_QUEUE_SIZE = 10000
+
+# Количество потоков на одно соединение при автоматическом шардировании;
+# Binance допускает до 1024 потоков на соединение, но длинный URL
+# и разбор всех кадров в одном соединении упираются в лимиты раньше
+STREAMS_PER_SHARD = 200
+
+# Задержки переподключения, в секундах
+RECONNECT_BASE_DELAY = 1
+RECONNECT_MAX_DELAY = 60
+
+
+def backoff_delays(base=RECONNECT_BASE_DELAY, cap=RECONNECT_MAX_DELAY):
+    """
+    Бесконечная последовательность задержек переподключения:
+    экспоненциальный рост до cap со случайным разбросом (full jitter),
+    чтобы шарды и реплики не переподключались одновременно.
+    """
+    attempt = 0
+    while True:
+        delay = min(cap, base * 2 ** attempt)
+        yield random.uniform(0, delay)
+        if delay < cap:
+            attempt += 1
+
+
+def split_shards(symbols, shards=None):
+    """
+    Делит символы на shards непустых групп примерно равного размера.
+    Без shards количество групп выбирается по STREAMS_PER_SHARD.
+    """
+    symbols = list(symbols)
+    if not shards:
+        shards = -(-len(symbols) // STREAMS_PER_SHARD)
+    shards = max(1, min(shards, len(symbols)))
+    return [symbols[index::shards] for index in range(shards)]
+
+
+class TickQueue:
+    """
+    Ограниченная очередь тиков между чтением WebSocket и сбросом в БД.
+    При переполнении либо ждет освобождения места (block), либо
+    отбрасывает самый старый (drop-oldest) или новый (drop-newest) тик.
+    """
+
+    def __init__(
+        self, maxsize=DEFAULT_QUEUE_SIZE, overflow=OVERFLOW_DROP_OLDEST
+    ):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f'Неизвестная политика переполнения: {overflow}')
+        self.overflow = overflow
+        self.dropped = 0
+        self.peak = 0
+        self._queue = asyncio.Queue(maxsize)
+
+    @property
+    def maxsize(self):
+        return self._queue.maxsize
+
+    @property
+    def depth(self):
+        """Текущее количество тиков в очереди"""
+        return self._queue.qsize()
+
+    async def put(self, tick):
+        """Добавляет тик (symbol, price, event_time) в очередь"""
+        if self.overflow == OVERFLOW_BLOCK:
+            await self._queue.put(tick)
+        else:
+            try:
+                self._queue.put_nowait(tick)
+            except asyncio.QueueFull:
+                self.dropped += 1
+                if self.overflow == OVERFLOW_DROP_NEWEST:
+                    return
+                self._queue.get_nowait()
+                self._queue.put_nowait(tick)
+        self.peak = max(self.peak, self._queue.qsize())
+
+    async def get(self):
+        return await self._queue.get()
+
+    def drain_into(self, pending):
+        """
+        Переносит все доступные тики в словарь
+        symbol -> (price, event_time), оставляя последний тик символа.
+        """
+        while True:
+            try:
+                symbol, price, event_time = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return pending
+            pending[symbol] = (price, event_time)
+
+    def reset_stats(self):
+        """Сбрасывает счетчики отброшенных тиков и пиковой глубины"""
+        self.dropped = 0
+        self.peak = self._queue.qsize()
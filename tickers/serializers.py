@@ -1,8 +1,11 @@
 from rest_framework import serializers
-from .models import TickerPrice
+from .models import TickerLatest
 
 
-class TickerPriceSerializer(serializers.ModelSerializer):
+class TickerLatestSerializer(serializers.ModelSerializer):
+    """Последняя цена тикера в формате строки истории цен"""
+    id = serializers.IntegerField(source='history_id')
+
     class Meta:
-        model = TickerPrice
+        model = TickerLatest
         fields = ['id', 'symbol', 'price', 'event_time', 'received_at']
@@ -0,0 +1,140 @@
+"""
+Локальный буфер (спул) цен на диске на время недоступности БД.
+
+Слушатель дописывает в спул сбросы, которые не удалось сохранить,
+и загружает их в БД после восстановления соединения. Файл состоит
+из записей фиксированного размера, поэтому читается через mmap без
+разбора; размер файла ограничен max_bytes.
+"""
+import mmap
+import os
+import struct
+from decimal import Decimal
+
+from .decoding import event_datetime
+
+# symbol (20 байт, как max_length поля), цена в единицах 1e-8,
+# время события в миллисекундах
+RECORD = struct.Struct('<20sqq')
+PRICE_SCALE = 8
+
+DEFAULT_SPOOL_MAX_BYTES = 256 * 1024 * 1024
+REPLAY_CHUNK = 500
+
+
+class TickSpool:
+    """
+    Спул тиков: append-only файл записей RECORD.
+    Повторная загрузка идемпотентна: TickerWriter пропускает строки,
+    которые уже есть в БД с тем же (symbol, event_time), поэтому
+    прерванную загрузку можно просто повторить.
+    """
+
+    def __init__(self, path, max_bytes=DEFAULT_SPOOL_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.dropped = 0
+        # Смещение следующей незагруженной записи (см. replay_chunk)
+        self.offset = 0
+
+    @property
+    def size(self):
+        """Размер файла спула в байтах"""
+        try:
+            return os.path.getsize(self.path)
+        except FileNotFoundError:
+            return 0
+
+    def __len__(self):
+        return self.size // RECORD.size
+
+    def append(self, rows):
+        """
+        Дописывает строки (symbol, price, event_time_ms) в спул.
+        Строки, не помещающиеся в max_bytes, отбрасываются.
+        Возвращает количество записанных строк.
+        """
+        free = max(0, self.max_bytes - self.size) // RECORD.size
+        rows = list(rows)
+        self.dropped += max(0, len(rows) - free)
+        rows = rows[:free]
+        if not rows:
+            return 0
+        data = b''.join(
+            RECORD.pack(
+                symbol.encode(),
+                int(Decimal(price).scaleb(PRICE_SCALE)),
+                event_time,
+            )
+            for symbol, price, event_time in rows
+        )
+        with open(self.path, 'ab') as spool:
+            spool.write(data)
+            spool.flush()
+            os.fsync(spool.fileno())
+        return len(rows)
+
+    def read(self, chunk=REPLAY_CHUNK):
+        """Итерирует спул частями по chunk строк (symbol, price, ms)"""
+        size = self.size - self.size % RECORD.size
+        if not size:
+            return
+        with open(self.path, 'rb') as spool:
+            with mmap.mmap(
+                spool.fileno(), size, access=mmap.ACCESS_READ
+            ) as data:
+                step = chunk * RECORD.size
+                for offset in range(0, size, step):
+                    yield unpack(data[offset:offset + step])
+
+    def replay_chunk(self, writer, chunk=REPLAY_CHUNK):
+        """
+        Загружает в БД через writer следующие chunk строк спула;
+        после последней части очищает файл. Возвращает количество
+        загруженных строк. Позиция хранится в памяти: если writer
+        упал, та же часть загружается при следующем вызове, а после
+        перезапуска процесса спул загружается сначала.
+        """
+        if not self.size:
+            return 0
+        size = self.size - self.size % RECORD.size
+        data = b''
+        if self.offset < size:
+            with open(self.path, 'rb') as spool:
+                spool.seek(self.offset)
+                data = spool.read(
+                    min(chunk * RECORD.size, size - self.offset)
+                )
+        rows = [
+            (symbol, price, event_datetime(event_time))
+            for symbol, price, event_time in unpack(data)
+        ]
+        loaded = writer.write(rows) if rows else 0
+        self.offset += len(data)
+        if self.offset >= size:
+            # Недописанная запись в конце файла тоже удаляется
+            os.truncate(self.path, 0)
+            self.offset = 0
+        return loaded
+
+    def replay(self, writer, chunk=REPLAY_CHUNK):
+        """
+        Загружает весь спул в БД через writer частями по chunk строк
+        и очищает файл. Возвращает количество загруженных строк.
+        """
+        loaded = 0
+        while self.size:
+            loaded += self.replay_chunk(writer, chunk)
+        return loaded
+
+
+def unpack(data):
+    """Строки (symbol, price, event_time_ms) из байтов записей RECORD"""
+    return [
+        (
+            symbol.rstrip(b'\0').decode(),
+            Decimal(price).scaleb(-PRICE_SCALE),
+            event_time,
+        )
+        for symbol, price, event_time in RECORD.iter_unpack(data)
+    ]
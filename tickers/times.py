@@ -0,0 +1,29 @@
+from datetime import timezone as dt_timezone
+
+from django.core.management.base import CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+
+def parse_time(value):
+    """
+    Разбирает время ISO 8601 из параметров запроса или команды;
+    время без зоны считается UTC. Для пустого или неверного значения
+    возвращает None.
+    """
+    try:
+        moment = parse_datetime(value) if value else None
+    except ValueError:
+        # Верный формат, но несуществующая дата: 2025-13-01
+        return None
+    if moment and timezone.is_naive(moment):
+        moment = timezone.make_aware(moment, dt_timezone.utc)
+    return moment
+
+
+def parse_time_option(value, option):
+    """parse_time для параметра команды option: неверное время — ошибка"""
+    moment = parse_time(value)
+    if value is not None and moment is None:
+        raise CommandError(f'Неверное время в {option}: {value}')
+    return moment
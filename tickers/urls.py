@@ -1,15 +1,27 @@
 from django.urls import path
 from . import views
 
+list_view, history_view = views.ticker_views()
+
 urlpatterns = [
     path(
         'tickers/',
-        views.TickerPriceListView.as_view(),
+        list_view,
         name='tickerprice-list'
     ),
     path(
         'tickers/history/',
-        views.TickerPriceHistoryView.as_view(),
+        history_view,
         name='tickerprice-history'
     ),
+    path(
+        'tickers/candles/',
+        views.TickerCandlesView.as_view(),
+        name='tickerprice-candles'
+    ),
+    path(
+        'tickers/export/',
+        views.TickerExportView.as_view(),
+        name='tickerprice-export'
+    ),
 ]
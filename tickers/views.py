@@ -1,37 +1,183 @@
-from django.utils.dateparse import parse_datetime
-from django.db.models import Max
-from rest_framework import generics
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.utils.urls import replace_query_param
 from rest_framework.views import APIView
 from rest_framework.response import Response
 
-from .models import TickerPrice
-from .serializers import TickerPriceSerializer
+from . import export, metrics
+from .cache import (
+    aget_snapshot, aget_version, candles_cache_key, get_snapshot, get_version,
+)
+from .candles import (
+    DEFAULT_CANDLES, INTERVALS, MAX_CANDLES, bucket_end, bucket_start,
+    build_candles,
+)
+from .models import TickerPrice, price_row, price_values
+from .pagination import (
+    DEFAULT_LIMIT, MAX_LIMIT, InvalidCursor, akeyset_page, keyset_page,
+)
+from .times import parse_time
+
+HISTORY_FIELDS = ('id', 'symbol', 'price', 'event_time')
+STREAM_CHUNK_SIZE = 2000
+
+
+def version_etag(version):
+    return f'W/"{version}"'
 
 
-class TickerPriceListView(generics.ListAPIView):
-    serializer_class = TickerPriceSerializer
+def not_modified(request, version):
+    """
+    Ответ 304, если If-None-Match запроса совпадает с версией данных,
+    иначе None. If-Modified-Since не проверяется: за одну секунду
+    Last-Modified может пройти несколько сбросов.
+    """
+    if version is None:
+        return None
+    response = get_conditional_response(request, etag=version_etag(version))
+    if response is not None:
+        set_version_headers(response, version)
+    return response
 
-    def get_queryset(self):
+
+def set_version_headers(response, version):
+    """
+    Заголовки ETag и Last-Modified версии данных. Ответ можно хранить,
+    но перед использованием нужно проверить запросом с If-None-Match.
+    """
+    response['Cache-Control'] = 'no-cache'
+    if version is not None:
+        response['ETag'] = version_etag(version)
+        response['Last-Modified'] = http_date(version // 1_000_000)
+    return response
+
+
+class TickerPriceListView(APIView):
+    """Последние цены символов через REST API"""
+    def get(self, request):
         """
-        Возвращает последний тикер для каждого символа.
-        Если указан символ, возвращает только последний тикер
-        для этого символа.
+        Отдает заранее сериализованный снимок последних цен из кэша,
+        без обращения к БД и сериализации DRF.
+        Если указан символ, отдает только его последнюю цену.
+        Если снимок не изменился с версии из If-None-Match, отвечает 304.
         """
-        symbol = self.request.query_params.get('symbol')
-        subquery = TickerPrice.objects.values('symbol').annotate(
-            latest_event_time=Max('event_time')
-        )
-        queryset = TickerPrice.objects.filter(
-            event_time__in=[entry['latest_event_time'] for entry in subquery]
+        return snapshot_response(request, get_snapshot())
+
+
+def snapshot_response(request, snapshot):
+    """Ответ со снимком последних цен: весь список или один символ"""
+    version = snapshot.get('version')
+    response = not_modified(request, version)
+    if response is not None:
+        return response
+    symbol = request.GET.get('symbol')
+    if symbol:
+        content = snapshot['symbols'].get(symbol.upper(), b'[]')
+    else:
+        content = snapshot['all']
+    return set_version_headers(
+        HttpResponse(content, content_type='application/json'), version
+    )
+
+
+def json_response(data, status=200):
+    """Ответ JSON, совпадающий с ответом Response DRF"""
+    return HttpResponse(
+        JSONRenderer().render(data),
+        content_type='application/json',
+        status=status,
+    )
+
+
+@require_safe
+async def ticker_list_view(request):
+    """
+    Асинхронная версия TickerPriceListView. Снимок из памяти процесса
+    отдается прямо в цикле событий ASGI, без перехода в поток
+    sync_to_async, который нужен синхронному представлению.
+    """
+    return snapshot_response(request, await aget_snapshot())
+
+
+async def stream_ndjson(queryset, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Построчно отдает строки истории из price_values в формате NDJSON.
+    Строки читаются из БД пачками по chunk_size, поэтому память
+    не зависит от размера выборки.
+    """
+    lines = []
+    async for row in queryset.aiterator(chunk_size=chunk_size):
+        row = price_row(row, HISTORY_FIELDS)
+        lines.append(json.dumps(row, cls=JSONEncoder))
+        if len(lines) >= chunk_size:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+def history_queryset(params):
+    """Строки истории price_values по параметрам symbol, start и end"""
+    symbol = params.get('symbol')
+    start = params.get('start')
+    end = params.get('end')
+
+    queryset = TickerPrice.objects.all()
+    if symbol:
+        queryset = queryset.filter(symbol__name=symbol.upper())
+    if start:
+        dt_start = parse_time(start)
+        if dt_start:
+            queryset = queryset.filter(event_time__gte=dt_start)
+    if end:
+        dt_end = parse_time(end)
+        if dt_end:
+            queryset = queryset.filter(event_time__lte=dt_end)
+    return price_values(queryset, HISTORY_FIELDS)
+
+
+def history_stream(queryset, version):
+    """Ответ с выборкой истории потоком NDJSON"""
+    return set_version_headers(
+        StreamingHttpResponse(
+            stream_ndjson(queryset.order_by('-event_time', '-id')),
+            content_type='application/x-ndjson',
+        ),
+        version,
+    )
+
+
+def history_limit(params):
+    """Размер страницы истории из параметра limit"""
+    try:
+        limit = int(params.get('limit', DEFAULT_LIMIT))
+    except ValueError:
+        raise ValidationError({'limit': 'Должно быть целым числом.'})
+    if limit < 1:
+        raise ValidationError({'limit': 'Должно быть больше нуля.'})
+    return min(limit, MAX_LIMIT)
+
+
+def set_next_cursor(response, request, next_cursor):
+    """Заголовки Link и X-Next-Cursor со ссылкой на следующую страницу"""
+    if next_cursor:
+        next_url = replace_query_param(
+            request.build_absolute_uri(), 'cursor', next_cursor
         )
-        if symbol:
-            latest_event_time = TickerPrice.objects.filter(
-                symbol__iexact=symbol
-            ).aggregate(
-                latest_event_time=Max('event_time')
-            )['latest_event_time']
-            queryset = queryset.filter(event_time=latest_event_time)
-        return queryset.order_by('-event_time')
+        response['Link'] = f'<{next_url}>; rel="next"'
+        response['X-Next-Cursor'] = next_cursor
+    return response
 
 
 class TickerPriceHistoryView(APIView):
@@ -40,26 +186,194 @@ class TickerPriceHistoryView(APIView):
         """
         Возвращает историю цен с возможностью фильтрации
         по символу и диапазону времени.
+        Ответ разбит на страницы по limit строк: токен следующей страницы
+        передается в заголовках Link и X-Next-Cursor.
+        С параметром stream=1 вся выборка отдается потоком NDJSON.
+        История меняется только при записи слушателя, поэтому ответ
+        помечается версией данных, а повторный запрос с тем же
+        If-None-Match получает 304 без обращения к БД.
+        """
+        # Версия читается до чтения БД, как и при сборке снимка
+        version = get_version()
+        response = not_modified(request, version)
+        if response is not None:
+            return response
+        queryset = history_queryset(request.query_params)
+        if request.query_params.get('stream') in ('1', 'true'):
+            return history_stream(queryset, version)
+
+        limit = history_limit(request.query_params)
+        try:
+            data, next_cursor = keyset_page(
+                queryset,
+                cursor=request.query_params.get('cursor'),
+                limit=limit,
+            )
+        except InvalidCursor:
+            raise ValidationError({'cursor': 'Неверный курсор.'})
+
+        response = Response([price_row(row, HISTORY_FIELDS) for row in data])
+        set_next_cursor(response, request, next_cursor)
+        return set_version_headers(response, version)
+
+
+@require_safe
+async def ticker_history_view(request):
+    """
+    Асинхронная версия TickerPriceHistoryView с теми же параметрами
+    и ответами. Версия данных и ответ 304 обходятся без потоков,
+    а страница и поток NDJSON читаются через async ORM.
+    """
+    version = await aget_version()
+    response = not_modified(request, version)
+    if response is not None:
+        return response
+    queryset = history_queryset(request.GET)
+    if request.GET.get('stream') in ('1', 'true'):
+        return history_stream(queryset, version)
+
+    try:
+        data, next_cursor = await akeyset_page(
+            queryset,
+            cursor=request.GET.get('cursor'),
+            limit=history_limit(request.GET),
+        )
+    except ValidationError as exc:
+        return json_response(exc.detail, status=400)
+    except InvalidCursor:
+        return json_response({'cursor': 'Неверный курсор.'}, status=400)
+
+    response = json_response(
+        [price_row(row, HISTORY_FIELDS) for row in data]
+    )
+    set_next_cursor(response, request, next_cursor)
+    return set_version_headers(response, version)
+
+
+class TickerCandlesView(APIView):
+    """Свечи OHLC по истории цен через REST API"""
+    def get(self, request):
+        """
+        Возвращает свечи open/high/low/close/count символа за интервал
+        1m/5m/1h/1d в диапазоне [start, end).
+        Ответы, в которых все свечи закрыты TICKERS_CANDLES_CLOSE_DELAY
+        секунд назад, кэшируются; остальные помечаются версией данных
+        и на запрос с тем же If-None-Match получают 304.
         """
         symbol = request.query_params.get('symbol')
-        start = request.query_params.get('start')
-        end = request.query_params.get('end')
+        interval = request.query_params.get('interval', '1m')
+        if not symbol:
+            raise ValidationError({'symbol': 'Обязательный параметр.'})
+        if interval not in INTERVALS:
+            raise ValidationError(
+                {'interval': f'Допустимые значения: {", ".join(INTERVALS)}.'}
+            )
+        step = timedelta(seconds=INTERVALS[interval])
 
-        queryset = TickerPrice.objects.all()
-        if symbol:
-            queryset = queryset.filter(symbol__iexact=symbol)
+        now = timezone.now()
+        end = parse_time(request.query_params.get('end')) or now
+        end = bucket_end(end, interval)
+        start = parse_time(request.query_params.get('start'))
         if start:
-            dt_start = parse_datetime(start)
-            if dt_start:
-                queryset = queryset.filter(event_time__gte=dt_start)
-        if end:
-            dt_end = parse_datetime(end)
-            if dt_end:
-                queryset = queryset.filter(event_time__lte=dt_end)
-
-        data = list(
-            queryset.order_by('-event_time').values(
-                'id', 'symbol', 'price', 'event_time'
+            start = bucket_start(start, interval)
+        else:
+            start = end - step * DEFAULT_CANDLES
+        if start >= end:
+            raise ValidationError({'start': 'Должно быть раньше end.'})
+        if (end - start) / step > MAX_CANDLES:
+            raise ValidationError(
+                {'start': f'Не больше {MAX_CANDLES} свечей за запрос.'}
+            )
+
+        # Свеча закрыта, когда слушатель уже записал цены ее интервала.
+        # Позже ее меняют только дозагрузка и пересчет, а они сбрасывают
+        # кэш через invalidate_candles
+        settled = now - timedelta(
+            seconds=settings.TICKERS_CANDLES_CLOSE_DELAY
+        )
+        closed = end <= bucket_start(settled, interval)
+        if not closed:
+            # Версия читается до чтения БД, как в истории цен
+            version = get_version()
+            response = not_modified(request, version)
+            if response is not None:
+                return response
+        data = None
+        if closed:
+            cache_key = candles_cache_key(
+                symbol.upper(), interval, start, end
             )
+            data = cache.get(cache_key)
+        if data is None:
+            data = build_candles(symbol.upper(), interval, start, end)
+            if closed:
+                cache.set(
+                    cache_key, data, settings.TICKERS_CANDLES_CACHE_TTL
+                )
+
+        response = Response(data)
+        if closed:
+            response['Cache-Control'] = (
+                f'public, max-age={settings.TICKERS_CANDLES_CACHE_TTL}'
+            )
+            return response
+        return set_version_headers(response, version)
+
+
+class TickerExportView(APIView):
+    """Выгрузка истории цен в колоночном формате"""
+    def get(self, request):
+        """
+        Отдает потоком историю цен символов symbols (через запятую)
+        в диапазоне [start, end) в формате type: arrow или parquet
+        (если установлен pyarrow), csv — CSV со сжатием gzip.
+        Параметр называется type, потому что format в DRF выбирает
+        рендерер ответа.
+        """
+        export_format = request.query_params.get('type', export.FORMAT_CSV)
+        formats = export.available_formats()
+        if export_format not in formats:
+            raise ValidationError(
+                {'type': f'Допустимые значения: {", ".join(formats)}.'}
+            )
+        symbols = [
+            symbol.strip().upper()
+            for symbol in request.query_params.get('symbols', '').split(',')
+            if symbol.strip()
+        ]
+        bounds = {}
+        for name in ('start', 'end'):
+            value = request.query_params.get(name)
+            bounds[name] = parse_time(value)
+            if value and bounds[name] is None:
+                raise ValidationError({name: 'Неверный формат времени.'})
+
+        queryset = export.export_queryset(symbols, **bounds)
+        response = StreamingHttpResponse(
+            export.aexport_chunks(queryset, export_format),
+            content_type=export.CONTENT_TYPES[export_format],
         )
-        return Response(data)
+        response['Content-Disposition'] = (
+            'attachment; '
+            f'filename="tickers.{export.EXTENSIONS[export_format]}"'
+        )
+        return response
+
+
+def ticker_views():
+    """
+    Представления списка и истории цен для маршрутов: async-версии
+    или синхронные views DRF в зависимости от TICKERS_ASYNC_VIEWS
+    """
+    if settings.TICKERS_ASYNC_VIEWS:
+        return ticker_list_view, ticker_history_view
+    return (
+        TickerPriceListView.as_view(), TickerPriceHistoryView.as_view()
+    )
+
+
+def metrics_view(request):
+    """Метрики веб-процесса в текстовом формате Prometheus"""
+    return HttpResponse(
+        metrics.web.render(), content_type=metrics.CONTENT_TYPE
+    )